@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Baby-step Giant-step con memoria acotada
+La tabla de pasos pequeños es una tabla hash de direccionamiento abierto
+(sondeo lineal) sobre arrays NumPy: claves uint32/uint64 y valores uint32,
+sin diccionarios ni enteros Python por entrada. Un presupuesto de memoria
+reduce el número de pasos pequeños m y aumenta los pasos gigantes ⌈N/m⌉
+para que la tabla quepa.
+"""
+
+import math
+import time
+import tracemalloc
+
+import numpy as np
+
+from rho_core import generar_parametros_dlp
+
+
+# Las multiplicaciones modulares se hacen en uint64 partiendo el segundo
+# factor en dos mitades de 21 bits, válido mientras p < 2^42
+MAX_BITS_P = 42
+BITS_PARTICION = 21
+
+# Presupuesto por defecto de la tabla de pasos pequeños (bytes)
+MEMORIA_POR_DEFECTO = 256 << 20
+
+# Pasos gigantes evaluados en cada bloque vectorizado
+TAMANO_BLOQUE = 1 << 15
+
+# Constante de hash multiplicativo de Fibonacci (2^64 / φ)
+_MULT_HASH = np.uint64(0x9E3779B97F4A7C15)
+
+
+def bsgs_diccionario(p: int, g: int, h: int, N: int) -> int:
+    """
+    BSGS de referencia con diccionario (versión de la parte obligatoria)
+
+    Cada entrada cuesta un int Python como clave, otro como valor y la ranura
+    del dict (~100 bytes), frente a 8-16 bytes de la tabla compacta.
+    """
+    m = math.isqrt(N - 1) + 1
+    tabla = {}
+    actual = 1
+    for j in range(m):
+        tabla.setdefault(actual, j)
+        actual = actual * g % p
+
+    factor = pow(g, -m, p)
+    gamma = h % p
+    for i in range(m):
+        j = tabla.get(gamma)
+        if j is not None:
+            return (i * m + j) % N
+        gamma = gamma * factor % p
+    raise ValueError("h no pertenece al subgrupo generado por g")
+
+
+def _mulmod(a: np.ndarray, b, p: int) -> np.ndarray:
+    """a·b mod p elemento a elemento en uint64 sin desbordamiento"""
+    P = np.uint64(p)
+    if p < 1 << 32:
+        return a * b % P
+    b = np.asarray(b, dtype=np.uint64)
+    alto = (a * (b >> np.uint64(BITS_PARTICION)) % P) << np.uint64(BITS_PARTICION)
+    bajo = a * (b & np.uint64((1 << BITS_PARTICION) - 1)) % P
+    return (alto % P + bajo) % P
+
+
+def _potencias(base: int, cuenta: int, p: int) -> np.ndarray:
+    """Array [base^0, base^1, ..., base^(cuenta-1)] mod p por duplicación"""
+    potencias = np.empty(cuenta, dtype=np.uint64)
+    potencias[0] = 1
+    paso = base % p  # base^k al inicio de cada iteración
+    k = 1
+    while k < cuenta:
+        t = min(k, cuenta - k)
+        potencias[k:k + t] = _mulmod(potencias[:t], np.uint64(paso), p)
+        paso = paso * paso % p
+        k += t
+    return potencias
+
+
+def _hash(claves: np.ndarray, bits_tabla: int) -> np.ndarray:
+    """Ranura inicial: bits altos del producto por la constante de Fibonacci"""
+    return (claves.astype(np.uint64) * _MULT_HASH) >> np.uint64(64 - bits_tabla)
+
+
+class TablaPasosPequenos:
+    """
+    Tabla hash compacta g^j → j con sondeo lineal
+
+    La clave 0 marca ranura vacía (g^j mod p nunca es 0). Se dimensiona
+    para factor de carga ≤ 0.5, así las cadenas de sondeo son cortas; la
+    inserción y la búsqueda se hacen por rondas vectorizadas.
+    """
+
+    def __init__(self, entradas: int, tipo_clave):
+        self.bits = max(1, (2 * entradas - 1).bit_length())
+        self.mascara = np.uint64((1 << self.bits) - 1)
+        self.claves = np.zeros(1 << self.bits, dtype=tipo_clave)
+        self.valores = np.zeros(1 << self.bits, dtype=np.uint32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.claves.nbytes + self.valores.nbytes
+
+    @staticmethod
+    def bytes_por_ranura(tipo_clave) -> int:
+        return np.dtype(tipo_clave).itemsize + np.dtype(np.uint32).itemsize
+
+    def insertar(self, claves: np.ndarray, valores: np.ndarray) -> None:
+        """Inserta un bloque de pares (clave, valor); las claves no deben ser 0"""
+        claves = claves.astype(self.claves.dtype)
+        ranura = _hash(claves, self.bits)
+        pendientes = np.arange(len(claves))
+        while pendientes.size:
+            r = ranura[pendientes]
+            libres = np.flatnonzero(self.claves[r] == 0)
+            # Si varias claves apuntan a la misma ranura libre, entra la primera
+            _, primero = np.unique(r[libres], return_index=True)
+            ganadores = libres[primero]
+            self.claves[r[ganadores]] = claves[pendientes[ganadores]]
+            self.valores[r[ganadores]] = valores[pendientes[ganadores]]
+
+            colocado = np.zeros(len(pendientes), dtype=bool)
+            colocado[ganadores] = True
+            pendientes = pendientes[~colocado]
+            # Todas las ranuras que probaron los restantes ya están ocupadas
+            ranura[pendientes] = (ranura[pendientes] + np.uint64(1)) & self.mascara
+
+    def buscar(self, consultas: np.ndarray) -> np.ndarray:
+        """Valor j de cada consulta presente en la tabla, −1 si no está"""
+        consultas = consultas.astype(self.claves.dtype)
+        resultado = np.full(len(consultas), -1, dtype=np.int64)
+        ranura = _hash(consultas, self.bits)
+        activos = np.arange(len(consultas))
+        while activos.size:
+            r = ranura[activos]
+            k = self.claves[r]
+            acierto = k == consultas[activos]
+            resultado[activos[acierto]] = self.valores[r[acierto]]
+            activos = activos[~acierto & (k != 0)]
+            ranura[activos] = (ranura[activos] + np.uint64(1)) & self.mascara
+        return resultado
+
+
+def pasos_pequenos_para_memoria(N: int, p: int, memoria_max: int) -> int:
+    """
+    Mayor m ≤ ⌈√N⌉ cuya tabla (2m ranuras redondeadas a potencia de dos)
+    cabe en memoria_max bytes
+    """
+    tipo_clave = np.uint32 if p < 1 << 32 else np.uint64
+    ranuras = memoria_max // TablaPasosPequenos.bytes_por_ranura(tipo_clave)
+    if ranuras < 2:
+        raise ValueError("Presupuesto de memoria insuficiente para la tabla BSGS")
+    ranuras = 1 << (ranuras.bit_length() - 1)
+    return min(math.isqrt(N - 1) + 1, ranuras // 2)
+
+
+def bsgs(p: int, g: int, h: int, N: int = None, memoria_max: int = MEMORIA_POR_DEFECTO,
+         m: int = None, medir_memoria: bool = True) -> dict:
+    """
+    Calcula x tal que g^x ≡ h (mod p) con BSGS de memoria acotada
+
+    Con m pasos pequeños la tabla guarda g^0..g^(m−1) y se prueban
+    h·(g^−m)^i para i < ⌈N/m⌉. m = ⌈√N⌉ minimiza el trabajo total; un m
+    menor reduce la tabla a costa de más pasos gigantes.
+
+    Args:
+        p: Primo del grupo (p < 2^42)
+        g, h: Base y objetivo
+        N: Orden del grupo (por defecto p − 1)
+        memoria_max: Bytes máximos de la tabla de pasos pequeños
+        m: Pasos pequeños explícitos (ignora memoria_max)
+        medir_memoria: Medir el pico de memoria con tracemalloc
+
+    Returns:
+        Diccionario con x, pasos_pequenos, pasos_gigantes, tabla_bytes,
+        memoria_pico_bytes (None si no se mide), tiempo_tabla y tiempo_total
+
+    Raises:
+        ValueError: Si p es demasiado grande, el presupuesto no alcanza o h
+            no pertenece al subgrupo generado por g
+    """
+    if p.bit_length() > MAX_BITS_P:
+        raise ValueError(f"p debe tener como mucho {MAX_BITS_P} bits")
+    if N is None:
+        N = p - 1
+    if m is None:
+        m = pasos_pequenos_para_memoria(N, p, memoria_max)
+    m = max(1, min(m, N))
+    gigantes = -(-N // m)
+
+    iniciado = medir_memoria and not tracemalloc.is_tracing()
+    if iniciado:
+        tracemalloc.start()
+    elif medir_memoria:
+        tracemalloc.reset_peak()
+    memoria_base = tracemalloc.get_traced_memory()[0] if medir_memoria else 0
+
+    try:
+        inicio = time.perf_counter()
+        tipo_clave = np.uint32 if p < 1 << 32 else np.uint64
+        tabla = TablaPasosPequenos(m, tipo_clave)
+        # Construcción por bloques: los temporales no crecen con m
+        bloque = min(TAMANO_BLOQUE, m)
+        potencias_g = _potencias(g, bloque, p)
+        salto = pow(g, bloque, p)
+        actual = 1
+        for base in range(0, m, bloque):
+            cuenta = min(bloque, m - base)
+            tabla.insertar(_mulmod(potencias_g[:cuenta], np.uint64(actual), p),
+                           np.arange(base, base + cuenta, dtype=np.uint32))
+            actual = actual * salto % p
+        del potencias_g
+        tiempo_tabla = time.perf_counter() - inicio
+
+        bloque = min(TAMANO_BLOQUE, gigantes)
+        factor = pow(g, -m, p)
+        potencias_factor = _potencias(factor, bloque, p)
+        salto = pow(factor, bloque, p)
+        actual = h % p
+        x = None
+        pasos_gigantes = gigantes
+
+        for base in range(0, gigantes, bloque):
+            j = tabla.buscar(_mulmod(potencias_factor, np.uint64(actual), p))
+            aciertos = np.flatnonzero(j >= 0)
+            if aciertos.size:
+                i = base + int(aciertos[0])
+                x = (i * m + int(j[aciertos[0]])) % N
+                pasos_gigantes = i + 1
+                break
+            actual = actual * salto % p
+
+        memoria_pico = tracemalloc.get_traced_memory()[1] - memoria_base if medir_memoria else None
+    finally:
+        if iniciado:
+            tracemalloc.stop()
+
+    if x is None or pow(g, x, p) != h % p:
+        raise ValueError("h no pertenece al subgrupo generado por g")
+
+    return {
+        'x': x,
+        'pasos_pequenos': m,
+        'pasos_gigantes': pasos_gigantes,
+        'tabla_bytes': tabla.nbytes,
+        'memoria_pico_bytes': memoria_pico,
+        'tiempo_tabla': tiempo_tabla,
+        'tiempo_total': time.perf_counter() - inicio,
+    }
+
+
+def _medir_diccionario(p: int, g: int, h: int, N: int) -> tuple:
+    """(tiempo, pico tracemalloc) de bsgs_diccionario"""
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    bsgs_diccionario(p, g, h, N)
+    tiempo = time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return tiempo, pico
+
+
+def main():
+    """Tiempo y pico de memoria (tracemalloc) de BSGS con dict y con tabla compacta"""
+    print(f"{'bits':>5} {'dict (s)':>9} {'dict (MB)':>10} {'compacta (s)':>13} {'compacta (MB)':>14} "
+          f"{'tabla (MB)':>11}")
+    for bits in (16, 20, 24, 28, 32, 36, 40):
+        p, N, g, h, _ = generar_parametros_dlp(bits)
+        r = bsgs(p, g, h, N)
+        if bits <= 32:
+            t_dict, pico_dict = _medir_diccionario(p, g, h, N)
+            col_dict = f"{t_dict:>9.3f} {pico_dict / 2**20:>10.2f}"
+        else:
+            col_dict = f"{'-':>9} {'-':>10}"
+        print(f"{bits:>5} {col_dict} {r['tiempo_total']:>13.3f} {r['memoria_pico_bytes'] / 2**20:>14.2f} "
+              f"{r['tabla_bytes'] / 2**20:>11.2f}")
+
+    print("\nReparto pasos pequeños / gigantes con presupuesto de memoria (36 bits)")
+    print(f"{'presupuesto (MB)':>17} {'m':>10} {'gigantes':>12} {'t (s)':>8} {'pico (MB)':>10}")
+    p, N, g, h, _ = generar_parametros_dlp(36)
+    for presupuesto in (64 << 20, 8 << 20, 1 << 20, 128 << 10):
+        r = bsgs(p, g, h, N, memoria_max=presupuesto)
+        print(f"{presupuesto / 2**20:>17.3f} {r['pasos_pequenos']:>10,} {r['pasos_gigantes']:>12,} "
+              f"{r['tiempo_total']:>8.3f} {r['memoria_pico_bytes'] / 2**20:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
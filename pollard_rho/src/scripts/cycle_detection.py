@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Detección de ciclos para Pollard Rho - Floyd, Brent y Nivasch
+Las tres estrategias comparten la misma iteración (step_optimizado con los
+multiplicadores de preparar_multiplicadores) y cuentan las multiplicaciones
+modulares reales que cuesta encontrar una colisión útil.
+"""
+
+import itertools
+import math
+import random
+import statistics
+from typing import Callable, Tuple
+
+from rho_core import (BITS_PRIMOS, ESPACIO_BUSQUEDA, ITERACIONES_BUSQUEDA,
+                      generar_parametros_dlp, preparar_multiplicadores, punto_inicial,
+                      step_optimizado)
+
+
+Estado = Tuple[int, int, int]
+
+
+def _resultado(exito: bool, pasos: int, multiplicaciones: int, T: Estado = None, H: Estado = None,
+               memoria: int = 0) -> dict:
+    return {
+        'exito': exito,
+        'pasos': pasos,
+        'multiplicaciones': multiplicaciones,
+        'T': T,
+        'H': H,
+        'memoria_estados': memoria,
+    }
+
+
+def detectar_floyd(paso: Callable[[int, int, int], Estado], inicial: Estado, max_multiplicaciones: int) -> dict:
+    """
+    Floyd (tortuga y liebre): 3 evaluaciones de paso por iteración
+
+    Igual que el bucle del notebook: una colisión con bT == bH no detiene la
+    búsqueda. 'pasos' cuenta iteraciones de la tortuga.
+    """
+    T = H = inicial
+    pasos = multiplicaciones = 0
+    while multiplicaciones + 3 <= max_multiplicaciones:
+        T = paso(*T)
+        H = paso(*paso(*H))
+        pasos += 1
+        multiplicaciones += 3
+        if T[0] == H[0] and T[2] != H[2]:
+            return _resultado(True, pasos, multiplicaciones, T, H, 2)
+    return _resultado(False, pasos, multiplicaciones, memoria=2)
+
+
+def detectar_brent(paso: Callable[[int, int, int], Estado], inicial: Estado, max_multiplicaciones: int) -> dict:
+    """
+    Brent: la tortuga se teletransporta a la liebre en cada potencia de dos
+
+    Una evaluación de paso por iteración. Si la colisión encontrada no es
+    útil (bT == bH) la caminata no puede producir otra distinta y se abandona.
+    """
+    T = inicial
+    H = paso(*inicial)
+    multiplicaciones = 1
+    potencia = lam = 1
+    while T[0] != H[0]:
+        if multiplicaciones >= max_multiplicaciones:
+            return _resultado(False, multiplicaciones, multiplicaciones, memoria=2)
+        if potencia == lam:
+            T = H
+            potencia *= 2
+            lam = 0
+        H = paso(*H)
+        multiplicaciones += 1
+        lam += 1
+    return _resultado(T[2] != H[2], multiplicaciones, multiplicaciones, T, H, 2)
+
+
+def detectar_nivasch(paso: Callable[[int, int, int], Estado], inicial: Estado, max_multiplicaciones: int) -> dict:
+    """
+    Nivasch: pila de estados con x creciente
+
+    Se detecta el ciclo al volver a ver el mínimo del ciclo, como mucho
+    μ + 2λ evaluaciones de paso. La pila tiene tamaño esperado O(log n).
+    Una colisión no útil (bT == bH) abandona la caminata.
+    """
+    pila = []
+    actual = inicial
+    multiplicaciones = 0
+    max_pila = 0
+    while multiplicaciones < max_multiplicaciones:
+        while pila and pila[-1][0] > actual[0]:
+            pila.pop()
+        if pila and pila[-1][0] == actual[0]:
+            previo = pila[-1]
+            return _resultado(previo[2] != actual[2], multiplicaciones, multiplicaciones, previo, actual, max_pila)
+        pila.append(actual)
+        max_pila = max(max_pila, len(pila))
+        actual = paso(*actual)
+        multiplicaciones += 1
+    return _resultado(False, multiplicaciones, multiplicaciones, memoria=max_pila)
+
+
+ESTRATEGIAS_CICLO = {
+    "floyd": detectar_floyd,
+    "brent": detectar_brent,
+    "nivasch": detectar_nivasch,
+}
+
+
+def pollard_rho_ciclo(p, N, g, h, K, entropia, ramas, a0=None, b0=None,
+                      estrategia_ciclo: str = "floyd", max_multiplicaciones: int = None) -> dict:
+    """
+    Busca una colisión útil con la estrategia de detección indicada
+
+    Args:
+        p, N, g, h: Parámetros DLP
+        K, entropia, ramas: Configuración de la iteración (step_optimizado)
+        a0, b0: Exponentes iniciales (aleatorios si None)
+        estrategia_ciclo: "floyd", "brent" o "nivasch"
+        max_multiplicaciones: Presupuesto de multiplicaciones modulares
+            (por defecto 180·√N, equivalente a los 60·√N pasos de Floyd)
+
+    Returns:
+        Diccionario con exito, pasos, multiplicaciones, estados T/H de la
+        colisión y memoria_estados (estados guardados simultáneamente)
+    """
+    if max_multiplicaciones is None:
+        max_multiplicaciones = int(math.sqrt(N)) * 180
+
+    def paso(x, a, b):
+        return step_optimizado(x, a, b, p, N, K, entropia, ramas)
+
+    inicial = punto_inicial(p, N, g, h, a0, b0)
+    return ESTRATEGIAS_CICLO[estrategia_ciclo](paso, inicial, max_multiplicaciones)
+
+
+def ejecutar_busqueda_por_coste(estrategia_ciclo: str = "floyd", bits_primos=BITS_PRIMOS,
+                                iteraciones: int = ITERACIONES_BUSQUEDA,
+                                espacio: dict = ESPACIO_BUSQUEDA) -> list:
+    """
+    Búsqueda de configuraciones ordenada por multiplicaciones modulares reales
+
+    Mismo esquema que ejecutar_busqueda_por_ratios, pero el score es la media
+    sobre los tamaños de primo de mediana(multiplicaciones) / √N en lugar de
+    iteraciones de Floyd.
+
+    Returns:
+        Lista de resultados {'config', 'score', 'detalle_multiplicaciones',
+        'detalle_pasos'} ordenada de mejor a peor
+    """
+    claves, valores = zip(*espacio.items())
+    combinaciones = [dict(zip(claves, v)) for v in itertools.product(*valores)]
+    resultados = []
+
+    for config in combinaciones:
+        ratios_por_bit = []
+        multiplicaciones_medias = {}
+        pasos_medios = {}
+        valido = True
+
+        for bits in bits_primos:
+            raiz_N = math.sqrt(2**bits)
+            multiplicaciones_bits, pasos_bits = [], []
+
+            for _ in range(iteraciones):
+                p, N, g, h, _ = generar_parametros_dlp(bits)
+                ramas = preparar_multiplicadores(config["K_particiones"], N, g, h, p, config["estrategia_iter"])
+                a0, b0 = random.randint(1, N-1), random.randint(1, N-1)
+                r = pollard_rho_ciclo(p, N, g, h, config["K_particiones"], config["metodo_entropia"], ramas,
+                                      a0, b0, estrategia_ciclo, int(raiz_N) * 180)
+                if r['exito']:
+                    multiplicaciones_bits.append(r['multiplicaciones'])
+                    pasos_bits.append(r['pasos'])
+
+            if not multiplicaciones_bits:
+                valido = False
+                break
+
+            mediana = statistics.median(multiplicaciones_bits)
+            multiplicaciones_medias[str(bits)] = mediana
+            pasos_medios[str(bits)] = statistics.median(pasos_bits)
+            ratios_por_bit.append(mediana / raiz_N)
+
+        if not valido:
+            continue
+
+        resultados.append({
+            "config": config,
+            "score": sum(ratios_por_bit) / len(bits_primos),
+            "detalle_multiplicaciones": multiplicaciones_medias,
+            "detalle_pasos": pasos_medios,
+        })
+
+    resultados.sort(key=lambda r: r["score"])
+    return resultados
+
+
+def main():
+    """Compara multiplicaciones por colisión de las tres estrategias (K=8, shift_4, Teske)"""
+    iteraciones = 100
+    print(f"{'bits':>5} " + " ".join(f"{e:>16}" for e in ESTRATEGIAS_CICLO) + "   (mediana de multiplicaciones)")
+    for bits in BITS_PRIMOS:
+        medianas = {}
+        for estrategia in ESTRATEGIAS_CICLO:
+            costes = []
+            for _ in range(iteraciones):
+                p, N, g, h, _ = generar_parametros_dlp(bits)
+                ramas = preparar_multiplicadores(8, N, g, h, p, "teske_aleatorio")
+                r = pollard_rho_ciclo(p, N, g, h, 8, "shift_4", ramas, estrategia_ciclo=estrategia)
+                if r['exito']:
+                    costes.append(r['multiplicaciones'])
+            medianas[estrategia] = statistics.median(costes) if costes else float('nan')
+        print(f"{bits:>5} " + " ".join(f"{medianas[e]:>16,.0f}" for e in ESTRATEGIAS_CICLO))
+
+
+if __name__ == '__main__':
+    main()
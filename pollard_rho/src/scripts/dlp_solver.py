@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Resolución completa del DLP con Pollard Rho
+Lleva la colisión hasta el logaritmo: resuelve la congruencia, prueba los
+candidatos cuando gcd > 1, verifica con pow(g, x, p) == h y, si falla,
+reinicia desde un nuevo punto aleatorio reutilizando los multiplicadores.
+"""
+
+import random
+import time
+
+from sympy.ntheory import n_order
+
+from cycle_detection import ESTRATEGIAS_CICLO, pollard_rho_ciclo
+from rho_core import generar_parametros_dlp, preparar_multiplicadores, resolver_colision
+
+
+# Configuración ganadora de la búsqueda (README, sección de resultados)
+K_OPTIMO = 8
+ENTROPIA_OPTIMA = "shift_4"
+ESTRATEGIA_OPTIMA = "teske_aleatorio"
+
+
+def solve_dlp(p: int, g: int, h: int, N: int = None, K: int = K_OPTIMO, entropia: str = ENTROPIA_OPTIMA,
+              estrategia_ciclo: str = "brent", max_reinicios: int = 64) -> dict:
+    """
+    Calcula x tal que g^x ≡ h (mod p)
+
+    Usa caminatas de Teske con K particiones y selector de entropía. Cada
+    colisión útil se convierte en candidatos resolviendo
+    x·(b_T − b_H) ≡ (a_H − a_T) (mod N); si la congruencia no tiene solución
+    módulo N (g no genera todo el grupo) se repite módulo el orden de g.
+
+    Args:
+        p: Primo del grupo
+        g, h: Base y objetivo
+        N: Orden del grupo (por defecto p − 1)
+        K, entropia: Configuración de la iteración
+        estrategia_ciclo: "floyd", "brent" o "nivasch"
+        max_reinicios: Reinicios permitidos antes de rendirse
+
+    Returns:
+        Diccionario con x, verificado, reinicios, candidatos_probados,
+        multiplicaciones, tiempo_colision y tiempo_total
+
+    Raises:
+        ValueError: Si no se encuentra el logaritmo (p. ej. h no está en <g>)
+    """
+    inicio = time.perf_counter()
+    if N is None:
+        N = p - 1
+    if estrategia_ciclo not in ESTRATEGIAS_CICLO:
+        raise ValueError(f"Estrategia de ciclo desconocida: {estrategia_ciclo}")
+
+    metricas = {
+        'x': None,
+        'verificado': False,
+        'reinicios': 0,
+        'candidatos_probados': 0,
+        'multiplicaciones': 0,
+        'tiempo_colision': 0.0,
+        'tiempo_total': 0.0,
+    }
+
+    if h % p == 1:
+        metricas.update(x=0, verificado=True, tiempo_total=time.perf_counter() - inicio)
+        return metricas
+
+    ramas = preparar_multiplicadores(K, N, g, h, p, ESTRATEGIA_OPTIMA)
+    orden_g = None
+
+    for intento in range(max_reinicios + 1):
+        metricas['reinicios'] = intento
+        a0, b0 = random.randint(1, N - 1), random.randint(1, N - 1)
+
+        t = time.perf_counter()
+        r = pollard_rho_ciclo(p, N, g, h, K, entropia, ramas, a0, b0, estrategia_ciclo)
+        metricas['tiempo_colision'] += time.perf_counter() - t
+        metricas['multiplicaciones'] += r['multiplicaciones']
+        if not r['exito']:
+            continue
+
+        (_, aT, bT), (_, aH, bH) = r['T'], r['H']
+        x, probados = resolver_colision(aT, bT, aH, bH, p, N, g, h)
+        metricas['candidatos_probados'] += probados
+
+        if x is None:
+            # La relación solo es válida módulo ord(g) si g no genera el grupo
+            if orden_g is None:
+                orden_g = n_order(g, p)
+            if orden_g != N:
+                x, probados = resolver_colision(aT, bT, aH, bH, p, orden_g, g, h)
+                metricas['candidatos_probados'] += probados
+
+        if x is not None and pow(g, x, p) == h % p:
+            metricas.update(x=x, verificado=True, tiempo_total=time.perf_counter() - inicio)
+            return metricas
+
+    raise ValueError(f"No se encontró el logaritmo tras {max_reinicios} reinicios")
+
+
+def main():
+    """Resuelve instancias de 10 a 32 bits y muestra las métricas extremo a extremo"""
+    print(f"{'bits':>5} {'ok':>4} {'reinicios':>10} {'candidatos':>11} {'mults':>10} "
+          f"{'t colisión (s)':>15} {'t total (s)':>12}")
+    for bits in (10, 14, 18, 22, 24, 28, 32):
+        p, N, g, h, _ = generar_parametros_dlp(bits)
+        r = solve_dlp(p, g, h, N)
+        print(f"{bits:>5} {str(r['verificado']):>4} {r['reinicios']:>10} {r['candidatos_probados']:>11} "
+              f"{r['multiplicaciones']:>10,} {r['tiempo_colision']:>15.4f} {r['tiempo_total']:>12.4f}")
+
+
+if __name__ == '__main__':
+    main()
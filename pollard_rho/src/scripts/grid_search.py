@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Búsqueda de configuraciones Pollard Rho paralela y reanudable
+Reparte tareas (configuración, bits, ensayo) entre procesos con una semilla
+determinista por tarea y añade cada resultado a un almacén JSONL. Si la
+ejecución se interrumpe, al relanzarla solo se evalúan las tareas que faltan.
+Con halving sucesivo las configuraciones peores se descartan con pocos
+ensayos en lugar de gastar ITERACIONES_BUSQUEDA en todas.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+import sympy.core.random
+
+from rho_core import (BITS_PRIMOS, ESPACIO_BUSQUEDA, ITERACIONES_BUSQUEDA,
+                      generar_parametros_dlp, pollard_rho_optimizado_steps,
+                      preparar_multiplicadores)
+
+
+# Pasos máximos por ensayo: igual que el notebook, 60·√N
+FACTOR_MAX_PASOS = 60
+
+Tarea = Tuple[str, int, int]  # (clave de configuración, bits, ensayo)
+
+# Campos de cada registro del almacén
+CAMPOS_REGISTRO = ('config', 'bits', 'ensayo', 'semilla', 'pasos')
+
+
+class AlmacenIncompatible(ValueError):
+    """El almacén se escribió con otra semilla global y no se puede reanudar"""
+
+
+def clave_config(config: dict) -> str:
+    """Identificador estable de una configuración, p. ej. 'K=8|shift_4|teske_aleatorio'"""
+    return f"K={config['K_particiones']}|{config['metodo_entropia']}|{config['estrategia_iter']}"
+
+
+def combinaciones(espacio: dict = ESPACIO_BUSQUEDA) -> Dict[str, dict]:
+    """Todas las configuraciones del espacio indexadas por clave_config"""
+    claves, valores = zip(*espacio.items())
+    configs = [dict(zip(claves, v)) for v in itertools.product(*valores)]
+    return {clave_config(c): c for c in configs}
+
+
+def semilla_tarea(semilla: int, clave: str, bits: int, ensayo: int) -> int:
+    """Semilla de 64 bits derivada de la tarea; no depende del orden ni del worker"""
+    datos = f"{semilla}|{clave}|{bits}|{ensayo}".encode()
+    return int.from_bytes(hashlib.sha256(datos).digest()[:8], 'big')
+
+
+def evaluar_tarea(config: dict, bits: int, ensayo: int, semilla: int) -> dict:
+    """
+    Ejecuta un ensayo: genera parámetros, multiplicadores y punto inicial
+    con la semilla de la tarea y mide los pasos de Floyd hasta la colisión
+
+    Returns:
+        Registro {'config', 'bits', 'ensayo', 'semilla', 'pasos'} con
+        pasos = None si no hay colisión útil en 60·√N pasos
+    """
+    s = semilla_tarea(semilla, clave_config(config), bits, ensayo)
+    random.seed(s)
+    sympy.core.random.seed(s)  # randprime usa el generador propio de sympy
+
+    p, N, g, h, _ = generar_parametros_dlp(bits)
+    K = config["K_particiones"]
+    ramas = preparar_multiplicadores(K, N, g, h, p, config["estrategia_iter"])
+    a0, b0 = random.randint(1, N - 1), random.randint(1, N - 1)
+    max_pasos = int(math.sqrt(2**bits)) * FACTOR_MAX_PASOS
+    pasos = pollard_rho_optimizado_steps(p, N, g, h, K, config["metodo_entropia"], ramas, a0, b0, max_pasos)
+
+    return {
+        'config': clave_config(config),
+        'bits': bits,
+        'ensayo': ensayo,
+        'semilla': s,
+        'pasos': pasos,
+    }
+
+
+def _evaluar_tarea_empaquetada(args) -> dict:
+    return evaluar_tarea(*args)
+
+
+class AlmacenResultados:
+    """
+    Almacén JSONL de solo anexado: una línea por ensayo terminado
+
+    Cada registro se escribe y se vacía al disco en cuanto llega, de modo que
+    una interrupción pierde como mucho los ensayos en curso. Una última línea
+    truncada (corte a mitad de escritura) se elimina al abrir el almacén.
+    Un almacén solo se reanuda con la semilla global con la que se escribió:
+    cada registro guarda la semilla de su tarea y se comprueba al abrirlo.
+    Las líneas que no son un registro completo se ignoran, igual que las
+    que no son JSON válido.
+    """
+
+    def __init__(self, ruta: str, semilla: int = 0):
+        """
+        Raises:
+            AlmacenIncompatible: Si algún registro se generó con otra semilla global
+        """
+        self.ruta = ruta
+        self.registros: Dict[Tarea, dict] = {}
+        if not os.path.exists(ruta):
+            return
+        with open(ruta, 'rb+') as f:
+            datos = f.read()
+            completo = datos.rfind(b'\n') + 1
+            if completo < len(datos):
+                # Descartar la línea a medias para no pegarle el siguiente registro
+                f.truncate(completo)
+        for linea in datos[:completo].splitlines():
+            try:
+                r = json.loads(linea)
+            except json.JSONDecodeError:
+                continue
+            if not isinstance(r, dict) or any(campo not in r for campo in CAMPOS_REGISTRO):
+                continue
+            if r['semilla'] != semilla_tarea(semilla, r['config'], r['bits'], r['ensayo']):
+                # Mezclar ensayos de otra semilla rompería la reanudación determinista
+                raise AlmacenIncompatible(f"El almacén {ruta} se escribió con otra semilla global (no es {semilla}); "
+                                 f"use la semilla original u otro fichero")
+            self.registros[(r['config'], r['bits'], r['ensayo'])] = r
+
+    def __contains__(self, tarea: Tarea) -> bool:
+        return tarea in self.registros
+
+    def __len__(self) -> int:
+        return len(self.registros)
+
+    def anadir(self, registros: Iterable[dict]) -> int:
+        """Añade registros al fichero y al índice en memoria; devuelve cuántos"""
+        n = 0
+        with open(self.ruta, 'a', encoding='utf-8') as f:
+            for r in registros:
+                f.write(json.dumps(r) + '\n')
+                f.flush()
+                self.registros[(r['config'], r['bits'], r['ensayo'])] = r
+                n += 1
+        return n
+
+    def pasos(self, clave: str, bits: int, ensayos: int) -> List[int]:
+        """Pasos de los ensayos exitosos 0..ensayos−1 de (clave, bits)"""
+        resultado = []
+        for ensayo in range(ensayos):
+            r = self.registros.get((clave, bits, ensayo))
+            if r is not None and r['pasos'] is not None:
+                resultado.append(r['pasos'])
+        return resultado
+
+
+def puntuar(almacen: AlmacenResultados, clave: str, bits_primos: List[int], ensayos: int) -> dict:
+    """
+    Score del notebook sobre los primeros `ensayos` ensayos: media por bits
+    de mediana(pasos) / √N. None si algún tamaño no tiene ninguna colisión.
+    """
+    ratios = []
+    detalle = {}
+    for bits in bits_primos:
+        pasos = almacen.pasos(clave, bits, ensayos)
+        if not pasos:
+            return None
+        mediana = statistics.median(pasos)
+        detalle[str(bits)] = mediana
+        ratios.append(mediana / math.sqrt(2**bits))
+    return {'score': sum(ratios) / len(bits_primos), 'detalle_pasos': detalle}
+
+
+def _ejecutar_tareas(almacen: AlmacenResultados, configs: Dict[str, dict], bits_primos: List[int],
+                     ensayos: int, semilla: int, workers: int) -> int:
+    """Evalúa en paralelo las tareas 0..ensayos−1 que faltan en el almacén"""
+    pendientes = [(configs[clave], bits, ensayo, semilla)
+                  for clave in configs for bits in bits_primos for ensayo in range(ensayos)
+                  if (clave, bits, ensayo) not in almacen]
+    if not pendientes:
+        return 0
+    if workers == 1:
+        return almacen.anadir(map(_evaluar_tarea_empaquetada, pendientes))
+
+    chunksize = max(1, min(64, len(pendientes) // (workers * 8)))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return almacen.anadir(executor.map(_evaluar_tarea_empaquetada, pendientes, chunksize=chunksize))
+
+
+def ejecutar_busqueda(ruta_almacen: str, espacio: dict = ESPACIO_BUSQUEDA, bits_primos=BITS_PRIMOS,
+                      iteraciones: int = ITERACIONES_BUSQUEDA, semilla: int = 0, workers: int = None,
+                      halving: bool = True, eta: int = 3, ensayos_iniciales: int = 6,
+                      verbose: bool = True) -> list:
+    """
+    Búsqueda de configuraciones paralela, reanudable y con halving sucesivo
+
+    Sin halving se evalúan todas las configuraciones con `iteraciones`
+    ensayos por tamaño de primo. Con halving, en cada ronda se evalúan los
+    supervivientes con el presupuesto de ensayos actual, se conserva el
+    mejor 1/eta y el presupuesto se multiplica por eta hasta `iteraciones`.
+
+    Args:
+        ruta_almacen: Fichero JSONL de resultados (se crea o se reanuda)
+        espacio: Espacio de búsqueda (como ESPACIO_BUSQUEDA)
+        bits_primos: Tamaños de primo evaluados
+        iteraciones: Ensayos por (configuración, bits) de la ronda final
+        semilla: Semilla global; cada tarea deriva la suya de ella
+        workers: Procesos (por defecto os.cpu_count())
+        halving: Activar halving sucesivo
+        eta: Factor de reducción por ronda
+        ensayos_iniciales: Ensayos por (configuración, bits) de la primera ronda
+
+    Returns:
+        Lista de resultados {'config', 'score', 'detalle_pasos', 'ensayos'}
+        de las configuraciones de la ronda final, de mejor a peor
+
+    Raises:
+        AlmacenIncompatible: Si el almacén se escribió con otra semilla
+    """
+    workers = workers or os.cpu_count() or 1
+    almacen = AlmacenResultados(ruta_almacen, semilla)
+    configs = combinaciones(espacio)
+    bits_primos = list(bits_primos)
+
+    presupuestos = [iteraciones]
+    if halving:
+        presupuestos = []
+        ensayos = min(ensayos_iniciales, iteraciones)
+        while ensayos < iteraciones:
+            presupuestos.append(ensayos)
+            ensayos *= eta
+        presupuestos.append(iteraciones)
+
+    if verbose:
+        print(f"Configuraciones: {len(configs)} | almacén: {ruta_almacen} ({len(almacen)} ensayos previos)")
+
+    supervivientes = dict(configs)
+    resultados = []
+    for ronda, ensayos in enumerate(presupuestos):
+        inicio = time.perf_counter()
+        nuevos = _ejecutar_tareas(almacen, supervivientes, bits_primos, ensayos, semilla, workers)
+
+        resultados = []
+        for clave, config in supervivientes.items():
+            puntuacion = puntuar(almacen, clave, bits_primos, ensayos)
+            if puntuacion is not None:
+                resultados.append({'config': config, **puntuacion, 'ensayos': ensayos})
+        resultados.sort(key=lambda r: r['score'])
+
+        if verbose:
+            mejor = f"{resultados[0]['score']:.4f} {clave_config(resultados[0]['config'])}" if resultados else "-"
+            print(f"Ronda {ronda + 1}/{len(presupuestos)}: {len(supervivientes)} configs × {ensayos} ensayos, "
+                  f"{nuevos} nuevos en {time.perf_counter() - inicio:.1f}s | mejor: {mejor}")
+
+        if ronda < len(presupuestos) - 1:
+            conservar = max(1, len(resultados) // eta)
+            supervivientes = {clave_config(r['config']): r['config'] for r in resultados[:conservar]}
+
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Búsqueda de configuraciones Pollard Rho reanudable")
+    parser.add_argument('almacen', help="Fichero JSONL de resultados")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--iteraciones', type=int, default=ITERACIONES_BUSQUEDA)
+    parser.add_argument('--bits', type=int, nargs='+', default=BITS_PRIMOS)
+    parser.add_argument('--K', type=int, nargs='+', default=ESPACIO_BUSQUEDA["K_particiones"])
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--sin-halving', action='store_true', help="Evaluar todas las configuraciones completas")
+    parser.add_argument('--eta', type=int, default=3)
+    args = parser.parse_args()
+
+    espacio = dict(ESPACIO_BUSQUEDA, K_particiones=args.K)
+    try:
+        resultados = ejecutar_busqueda(args.almacen, espacio, args.bits, args.iteraciones, args.semilla,
+                                       args.workers, halving=not args.sin_halving, eta=args.eta)
+    except AlmacenIncompatible as e:
+        parser.error(str(e))
+
+    print(f"\n{'#':>3} {'score':>8}  configuración")
+    for i, r in enumerate(resultados[:10], 1):
+        print(f"{i:>3} {r['score']:>8.4f}  {clave_config(r['config'])}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Pohlig–Hellman sobre Pollard Rho
+Factoriza el orden del grupo (N = p − 1), resuelve el DLP en cada subgrupo
+de orden primo con BSGS o con la caminata de Teske (según el tamaño del
+factor) y recombina los resultados con el Teorema Chino del Resto.
+"""
+
+import math
+import time
+
+from sympy import factorint
+from sympy.ntheory.modular import crt
+
+from bsgs import MAX_BITS_P, bsgs
+from dlp_solver import solve_dlp
+from rho_core import generar_parametros_dlp
+
+
+# BSGS es determinista y tiene menor constante que rho, pero necesita ⌈√q⌉
+# entradas de tabla; se usa mientras la tabla quepa en este límite
+MAX_TABLA_BSGS = 1 << 16
+
+# En grupos diminutos la caminata aleatoria degenera (ciclos de longitud 1-2)
+MIN_ORDEN_RHO = 1 << 10
+
+
+def orden_elemento(g: int, p: int, factores_N: dict) -> int:
+    """Orden de g en Z_p* a partir de la factorización de N = p − 1"""
+    orden = p - 1
+    for q, e in factores_N.items():
+        for _ in range(e):
+            if pow(g, orden // q, p) == 1:
+                orden //= q
+            else:
+                break
+    return orden
+
+
+def elegir_metodo(q: int, max_tabla_bsgs: int = MAX_TABLA_BSGS, p: int = None) -> str:
+    """
+    Elige el algoritmo para un subgrupo de orden primo q
+
+    Ambos cuestan O(√q) multiplicaciones; BSGS (≈2√q, sin reinicios) gana
+    mientras su tabla de √q entradas quepa en max_tabla_bsgs. Por debajo de
+    MIN_ORDEN_RHO se usa siempre BSGS. La tabla compacta de bsgs solo admite
+    p de hasta MAX_BITS_P bits: con p mayor se usa rho, y búsqueda
+    exhaustiva (como mucho q multiplicaciones) si q es demasiado pequeño
+    para rho.
+    """
+    if p is not None and p.bit_length() > MAX_BITS_P:
+        return "exhaustiva" if q < MIN_ORDEN_RHO else "rho"
+    if q < MIN_ORDEN_RHO or math.isqrt(q - 1) + 1 <= max_tabla_bsgs:
+        return "bsgs"
+    return "rho"
+
+
+def _dlp_subgrupo_primo(p: int, g: int, h: int, q: int, metodo: str, metricas: dict) -> int:
+    """
+    Resuelve g^d ≡ h en el subgrupo de orden primo q con el método indicado
+
+    Las multiplicaciones que se suman a metricas son las realizadas en
+    cada método (en BSGS, tabla más pasos gigantes hasta el acierto), así
+    que los métodos se pueden comparar entre sí.
+    """
+    if h % p == 1:
+        return 0
+    if metodo == "bsgs":
+        r = bsgs(p, g, h, q, m=math.isqrt(q - 1) + 1, medir_memoria=False)
+        metricas['multiplicaciones'] += r['pasos_pequenos'] + r['pasos_gigantes']
+        return r['x']
+    if metodo == "exhaustiva":
+        actual = 1
+        for d in range(q):
+            if actual == h % p:
+                metricas['multiplicaciones'] += d
+                return d
+            actual = actual * g % p
+        raise ValueError("h no pertenece al subgrupo generado por g")
+    r = solve_dlp(p, g, h, q)
+    metricas['multiplicaciones'] += r['multiplicaciones']
+    metricas['reinicios'] += r['reinicios']
+    return r['x']
+
+
+def _dlp_potencia_prima(p: int, g: int, h: int, n: int, q: int, e: int, max_tabla_bsgs: int) -> dict:
+    """
+    Resuelve x mod q^e dígito a dígito en base q
+
+    gamma = g^(n/q) tiene orden q; en el paso k se lleva (g^-x_k · h) al
+    subgrupo de orden q elevando a n / q^(k+1) y se obtiene el dígito d_k.
+    """
+    inicio = time.perf_counter()
+    metodo = elegir_metodo(q, max_tabla_bsgs, p)
+    metricas = {'multiplicaciones': 0, 'reinicios': 0}
+    gamma = pow(g, n // q, p)
+    g_inv = pow(g, -1, p)
+    x = 0
+
+    for k in range(e):
+        h_k = pow(pow(g_inv, x, p) * h % p, n // q**(k + 1), p)
+        d_k = _dlp_subgrupo_primo(p, gamma, h_k, q, metodo, metricas)
+        x += d_k * q**k
+
+    return {
+        'q': q,
+        'e': e,
+        'metodo': metodo,
+        'x_mod': x,
+        'tiempo': time.perf_counter() - inicio,
+        **metricas,
+    }
+
+
+def pohlig_hellman(p: int, g: int, h: int, N: int = None, max_tabla_bsgs: int = MAX_TABLA_BSGS) -> dict:
+    """
+    Calcula x tal que g^x ≡ h (mod p) con Pohlig–Hellman
+
+    Se trabaja sobre el orden real de g (divisor de N), de modo que el
+    resultado es válido aunque g no genere todo Z_p*.
+
+    Args:
+        p: Primo del grupo
+        g, h: Base y objetivo
+        N: Orden del grupo (por defecto p − 1)
+        max_tabla_bsgs: Entradas máximas de tabla BSGS por subgrupo
+
+    Returns:
+        Diccionario con x, verificado, orden, factores (detalle por factor:
+        q, e, metodo, x_mod, tiempo, multiplicaciones, reinicios),
+        tiempo_factorizacion y tiempo_total
+
+    Raises:
+        ValueError: Si h no pertenece al subgrupo generado por g
+    """
+    inicio = time.perf_counter()
+    if N is None:
+        N = p - 1
+
+    factores_N = factorint(N)
+    n = orden_elemento(g, p, factores_N)
+    factores = {q: e for q, e in factores_N.items() if n % q == 0}
+    for q in factores:
+        while n % q**factores[q] != 0:
+            factores[q] -= 1
+    tiempo_factorizacion = time.perf_counter() - inicio
+
+    detalle = [_dlp_potencia_prima(p, g, h, n, q, e, max_tabla_bsgs) for q, e in sorted(factores.items())]
+
+    if detalle:
+        x, _ = crt([d['q']**d['e'] for d in detalle], [d['x_mod'] for d in detalle])
+        x = int(x)
+    else:
+        x = 0
+    if pow(g, x, p) != h % p:
+        raise ValueError("h no pertenece al subgrupo generado por g")
+
+    return {
+        'x': x,
+        'verificado': True,
+        'orden': n,
+        'factores': detalle,
+        'tiempo_factorizacion': tiempo_factorizacion,
+        'tiempo_total': time.perf_counter() - inicio,
+    }
+
+
+def main():
+    """Compara Pohlig–Hellman con rho sobre el grupo completo en parámetros de 24 a 48 bits"""
+    print(f"{'bits':>5} {'factores de N':<40} {'PH (s)':>9} {'rho (s)':>9} {'x':>8}")
+    for bits in (24, 32, 40, 48):
+        p, N, g, h, _ = generar_parametros_dlp(bits)
+        ph = pohlig_hellman(p, g, h, N)
+        factores = " · ".join(f"{d['q']}^{d['e']}" if d['e'] > 1 else str(d['q']) for d in ph['factores'])
+
+        if bits <= 40:
+            rho = solve_dlp(p, g, h, N)
+            t_rho = f"{rho['tiempo_total']:>9.3f}"
+            speedup = f"{rho['tiempo_total'] / ph['tiempo_total']:>7.1f}x"
+        else:
+            t_rho, speedup = f"{'-':>9}", f"{'-':>8}"
+        print(f"{bits:>5} {factores[:40]:<40} {ph['tiempo_total']:>9.3f} {t_rho} {speedup}")
+        for d in ph['factores']:
+            print(f"{'':>7}q={d['q']}^{d['e']}: {d['metodo']:<10} {d['tiempo'] * 1000:>9.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
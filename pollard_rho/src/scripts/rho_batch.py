@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Pollard Rho por lotes - Motor vectorizado
+Avanza miles de caminatas independientes (tortuga y liebre de Floyd) a la
+vez como arrays de NumPy. Cada caminata puede tener su propio primo,
+generadores y multiplicadores; los pasos por caminata coinciden con las
+funciones escalares de rho_core.
+"""
+
+import math
+import time
+from typing import List, Sequence, Tuple, Union
+
+import numpy as np
+from rho_core import (SELECTOR_DESPLAZAMIENTO, generar_parametros_dlp,
+                      pollard_rho_optimizado_steps, preparar_multiplicadores, punto_inicial)
+
+
+# x · M < 2^62 cabe en uint64 mientras p < 2^31; por encima se usan enteros Python
+MAX_BITS_UINT64 = 31
+
+
+def tipo_array(p_max: int) -> np.dtype:
+    """Elige uint64 (aritmética nativa) o object (enteros arbitrarios) según el módulo"""
+    return np.dtype(np.uint64) if p_max < 2**MAX_BITS_UINT64 else np.dtype(object)
+
+
+def _array(valores, dtype: np.dtype) -> np.ndarray:
+    if dtype == object:
+        arr = np.empty(len(valores), dtype=object)
+        arr[:] = [int(v) for v in valores]
+        return arr
+    return np.array(valores, dtype=dtype)
+
+
+def _tablas_ramas(ramas: Sequence[List[Tuple[int, int, int]]], dtype: np.dtype):
+    """Convierte las ramas (M_i, c_i, d_i) de cada caminata en tablas (W, K)"""
+    W, K = len(ramas), len(ramas[0])
+    tablas = []
+    for col in range(3):
+        tabla = np.empty((W, K), dtype=dtype)
+        for w, rs in enumerate(ramas):
+            tabla[w, :] = [int(r[col]) for r in rs]
+        tablas.append(tabla)
+    return tablas
+
+
+def _max_pasos_array(max_pasos: Union[int, Sequence[int]], W: int) -> np.ndarray:
+    if np.isscalar(max_pasos):
+        return np.full(W, int(max_pasos), dtype=np.int64)
+    return np.asarray(max_pasos, dtype=np.int64)
+
+
+def pollard_rho_lote_steps(p: Sequence[int], N: Sequence[int], g: Sequence[int], h: Sequence[int],
+                           K: int, entropia: str, ramas: Sequence[List[Tuple[int, int, int]]],
+                           a0: Sequence[int], b0: Sequence[int],
+                           max_pasos: Union[int, Sequence[int]]) -> np.ndarray:
+    """
+    Ejecuta W caminatas optimizadas (Teske/híbrido) en paralelo con Floyd
+
+    Equivale a llamar pollard_rho_optimizado_steps una vez por caminata.
+    El selector de rama se resuelve una sola vez con SELECTOR_DESPLAZAMIENTO
+    en lugar de comparar la cadena de entropía en cada paso.
+
+    Args:
+        p, N, g, h: Parámetros DLP de cada caminata
+        K: Número de particiones
+        entropia: Método de entropía ("modulo", "shift_2", "shift_4", "shift_8")
+        ramas: Multiplicadores (M_i, c_i, d_i) de cada caminata
+        a0, b0: Exponentes iniciales de cada caminata
+        max_pasos: Límite de pasos (común o por caminata)
+
+    Returns:
+        Array int64 con los pasos hasta la colisión de cada caminata
+        (-1 si no colisiona dentro de su límite)
+    """
+    W = len(p)
+    dtype = tipo_array(max(p))
+    desplazamiento = SELECTOR_DESPLAZAMIENTO[entropia]
+    if dtype != object:
+        desplazamiento = np.uint64(desplazamiento)
+        K_arr = np.uint64(K)
+    else:
+        K_arr = K
+
+    P, Nn = _array(p, dtype), _array(N, dtype)
+    M, C, D = _tablas_ramas(ramas, dtype)
+    iniciales = [punto_inicial(p[w], N[w], g[w], h[w], a0[w], b0[w]) for w in range(W)]
+    x = _array([v[0] for v in iniciales], dtype)
+    a = _array([v[1] for v in iniciales], dtype)
+    b = _array([v[2] for v in iniciales], dtype)
+    limites = _max_pasos_array(max_pasos, W)
+
+    # Tablas aplanadas: la rama i de la caminata w está en w * K + i
+    M, C, D = M.ravel(), C.ravel(), D.ravel()
+
+    filas = np.arange(W)                       # Índice original de cada caminata activa
+    xT, aT, bT = x, a, b
+    xH, aH, bH = x.copy(), a.copy(), b.copy()
+    Pf, Nf, Lf = P, Nn, limites
+    base = filas * K
+    resultado = np.full(W, -1, dtype=np.int64)
+
+    def paso(xv, av, bv):
+        i = base + ((xv >> desplazamiento) % K_arr).astype(np.intp)
+        return (xv * M[i]) % Pf, (av + C[i]) % Nf, (bv + D[i]) % Nf
+
+    pasos = 0
+    while filas.size:
+        pasos += 1
+        xT, aT, bT = paso(xT, aT, bT)
+        xH, aH, bH = paso(xH, aH, bH)
+        xH, aH, bH = paso(xH, aH, bH)
+
+        # a, b ∈ [0, N): (bT - bH) % N != 0  <=>  bT != bH
+        colision = (xT == xH) & (bT != bH)
+        agotada = Lf <= pasos
+        resultado[filas[colision]] = pasos
+        terminadas = colision | agotada
+
+        if terminadas.any():
+            seguir = ~terminadas
+            filas = filas[seguir]
+            xT, aT, bT, xH, aH, bH = (v[seguir] for v in (xT, aT, bT, xH, aH, bH))
+            Pf, Nf, Lf, base = Pf[seguir], Nf[seguir], Lf[seguir], base[seguir]
+
+    return resultado
+
+
+def pollard_rho_classico_lote_steps(p: Sequence[int], N: Sequence[int],
+                                    g: Sequence[int], h: Sequence[int]) -> np.ndarray:
+    """
+    Ejecuta W caminatas del algoritmo clásico (mod 3 + cuadrado) en paralelo
+
+    Equivale a llamar pollard_rho_classico_steps una vez por caminata,
+    incluido su límite int(sqrt(N)) * 15 (devuelto si no hay colisión).
+
+    Returns:
+        Array int64 con los pasos de cada caminata
+    """
+    W = len(p)
+    dtype = tipo_array(max(p))
+    tres, uno, dos = (3, 1, 2) if dtype == object else (np.uint64(3), np.uint64(1), np.uint64(2))
+
+    P, Nn, G, H = (_array(v, dtype) for v in (p, N, g, h))
+    limites = np.array([int(np.sqrt(n)) * 15 for n in N], dtype=np.int64)
+    resultado = limites.copy()
+
+    filas = np.arange(W)
+    xT, aT, bT = _array([1] * W, dtype), _array([0] * W, dtype), _array([0] * W, dtype)
+    xH, aH, bH = xT.copy(), aT.copy(), bT.copy()
+    Pf, Nf, Gf, Hf, Lf = P, Nn, G, H, limites
+
+    def paso(xv, av, bv):
+        r = xv % tres
+        r0, r1, r2 = r == 0, r == 1, r == 2
+        multiplicador = np.where(r0, Hf, np.where(r1, xv, Gf))
+        factor = np.where(r1, dos, uno)
+        return ((xv * multiplicador) % Pf,
+                (av * factor + r2.astype(dtype)) % Nf,
+                (bv * factor + r0.astype(dtype)) % Nf)
+
+    pasos = 0
+    while filas.size:
+        pasos += 1
+        xT, aT, bT = paso(xT, aT, bT)
+        xH, aH, bH = paso(xH, aH, bH)
+        xH, aH, bH = paso(xH, aH, bH)
+
+        colision = (xT == xH) & (bT != bH)
+        resultado[filas[colision]] = pasos
+        terminadas = colision | (Lf <= pasos)
+
+        if terminadas.any():
+            seguir = ~terminadas
+            filas = filas[seguir]
+            xT, aT, bT, xH, aH, bH = (v[seguir] for v in (xT, aT, bT, xH, aH, bH))
+            Pf, Nf, Gf, Hf, Lf = Pf[seguir], Nf[seguir], Gf[seguir], Hf[seguir], Lf[seguir]
+
+    return resultado
+
+
+def generar_lote(bits: int, W: int, K: int, estrategia: str) -> dict:
+    """
+    Genera W instancias DLP independientes con sus multiplicadores y puntos iniciales
+
+    Mismo orden de llamadas a random que el bucle de ejecutar_busqueda_por_ratios.
+
+    Returns:
+        Diccionario con listas p, N, g, h, x_real, ramas, a0, b0
+    """
+    lote = {clave: [] for clave in ("p", "N", "g", "h", "x_real", "ramas", "a0", "b0")}
+    for _ in range(W):
+        p, N, g, h, x_real = generar_parametros_dlp(bits)
+        ramas = preparar_multiplicadores(K, N, g, h, p, estrategia)
+        _, a0, b0 = punto_inicial(p, N, g, h)
+        for clave, valor in zip(lote, (p, N, g, h, x_real, ramas, a0, b0)):
+            lote[clave].append(valor)
+    return lote
+
+
+def main():
+    """Compara el motor escalar con el de lotes (K=8, shift_4, Teske) y verifica los pasos"""
+    K, entropia, estrategia, W = 8, "shift_4", "teske_aleatorio", 1000
+    print(f"{'bits':>5} {'escalar (s)':>12} {'lote (s)':>10} {'x':>7}  pasos idénticos")
+    for bits in (14, 18, 22, 24):
+        lote = generar_lote(bits, W, K, estrategia)
+        max_pasos = int(math.sqrt(2**bits)) * 60
+
+        inicio = time.perf_counter()
+        referencia = [pollard_rho_optimizado_steps(lote["p"][w], lote["N"][w], lote["g"][w], lote["h"][w],
+                                                   K, entropia, lote["ramas"][w], lote["a0"][w],
+                                                   lote["b0"][w], max_pasos) for w in range(W)]
+        t_escalar = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        pasos = pollard_rho_lote_steps(lote["p"], lote["N"], lote["g"], lote["h"], K, entropia,
+                                       lote["ramas"], lote["a0"], lote["b0"], max_pasos)
+        t_lote = time.perf_counter() - inicio
+
+        identicos = list(pasos) == [-1 if r is None else r for r in referencia]
+        print(f"{bits:>5} {t_escalar:>12.3f} {t_lote:>10.3f} {t_escalar / t_lote:>6.1f}x  {identicos}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Paso compilado de Pollard Rho
+Precalcula las ramas de Teske como tablas separadas (M, C, D) y especializa
+el selector una sola vez: (x >> s) & (K − 1) si K es potencia de dos y
+(x >> s) % K en otro caso. Los exponentes a y b se acumulan sin reducir y
+solo se reducen módulo N al comprobar una colisión. step_optimizado se
+conserva intacto como referencia.
+"""
+
+import math
+import random
+import time
+from typing import Callable, NamedTuple, Optional, Tuple
+
+from rho_core import (SELECTOR_DESPLAZAMIENTO, generar_parametros_dlp, pollard_rho_optimizado_steps,
+                      preparar_multiplicadores, punto_inicial, step_optimizado)
+
+
+class RamasCompiladas(NamedTuple):
+    """Ramas en forma de estructura de arrays y selector ya resuelto"""
+    M: Tuple[int, ...]
+    C: Tuple[int, ...]
+    D: Tuple[int, ...]
+    K: int
+    desplazamiento: int
+    mascara: Optional[int]  # K − 1 si K es potencia de dos, None si no
+
+
+def compilar_ramas(ramas, K: int, entropia: str) -> RamasCompiladas:
+    """Convierte las ramas [(M_i, c_i, d_i)] de preparar_multiplicadores"""
+    M, C, D = (tuple(col) for col in zip(*ramas))
+    mascara = K - 1 if K & (K - 1) == 0 else None
+    return RamasCompiladas(M, C, D, K, SELECTOR_DESPLAZAMIENTO[entropia], mascara)
+
+
+def preparar_multiplicadores_compilados(K, N, g, h, p, estrategia, entropia) -> RamasCompiladas:
+    """Como preparar_multiplicadores, pero devuelve las ramas compiladas"""
+    return compilar_ramas(preparar_multiplicadores(K, N, g, h, p, estrategia), K, entropia)
+
+
+def paso_compilado(ramas: RamasCompiladas, p: int) -> Callable[[int, int, int], Tuple[int, int, int]]:
+    """
+    Cierre paso(x, a, b) especializado para las ramas dadas
+
+    Devuelve a y b sin reducir: quien compare exponentes debe hacerlo
+    módulo N.
+    """
+    M, C, D, K, s, mascara = ramas
+
+    if mascara is not None:
+        def paso(x, a, b):
+            i = (x >> s) & mascara
+            return x * M[i] % p, a + C[i], b + D[i]
+    else:
+        def paso(x, a, b):
+            i = (x >> s) % K
+            return x * M[i] % p, a + C[i], b + D[i]
+    return paso
+
+
+def pollard_rho_compilado_steps(p, N, g, h, ramas: RamasCompiladas, a0, b0, max_pasos) -> Optional[int]:
+    """
+    Floyd con el paso compilado en línea
+
+    Recorre exactamente la misma caminata que pollard_rho_optimizado_steps
+    con las mismas ramas y punto inicial, y devuelve los mismos pasos. Solo
+    se acumula b: a no interviene en la condición de colisión útil.
+    """
+    xT, _, bT = punto_inicial(p, N, g, h, a0, b0)
+    xH, bH = xT, bT
+    M, C, D, K, s, mascara = ramas
+
+    if mascara is not None:
+        for pasos in range(1, max_pasos + 1):
+            i = (xT >> s) & mascara
+            xT = xT * M[i] % p
+            bT += D[i]
+            i = (xH >> s) & mascara
+            xH = xH * M[i] % p
+            bH += D[i]
+            i = (xH >> s) & mascara
+            xH = xH * M[i] % p
+            bH += D[i]
+            if xT == xH and (bT - bH) % N != 0:
+                return pasos
+    else:
+        for pasos in range(1, max_pasos + 1):
+            i = (xT >> s) % K
+            xT = xT * M[i] % p
+            bT += D[i]
+            i = (xH >> s) % K
+            xH = xH * M[i] % p
+            bH += D[i]
+            i = (xH >> s) % K
+            xH = xH * M[i] % p
+            bH += D[i]
+            if xT == xH and (bT - bH) % N != 0:
+                return pasos
+    return None
+
+
+def _pasos_por_segundo(funcion, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    return repeticiones / (time.perf_counter() - inicio)
+
+
+def _floyd_por_segundo(caminata, inicios) -> float:
+    """Pasos/s de Floyd (3 evaluaciones por iteración) sobre varias caminatas"""
+    inicio = time.perf_counter()
+    total = sum(caminata(a0, b0) or 0 for a0, b0 in inicios)
+    return 3 * total / (time.perf_counter() - inicio)
+
+
+def main():
+    """Micro-benchmark de pasos/s: step_optimizado frente al paso compilado"""
+    bits = 31
+    pasos = 200_000
+    p, N, g, h, _ = generar_parametros_dlp(bits)
+    max_pasos = int(math.sqrt(N)) * 60
+    inicios = [(random.randint(1, N - 1), random.randint(1, N - 1)) for _ in range(5)]
+
+    print(f"Primo de {bits} bits: {pasos:,} pasos sueltos y {len(inicios)} caminatas de Floyd por medida")
+    print(f"{'K':>4} {'entropía':>9} {'referencia':>12} {'cierre':>12} {'Floyd ref':>12} {'Floyd comp':>12} "
+          f"{'x cierre':>9} {'x Floyd':>8}")
+    for K in (8, 16, 20, 32):
+        for entropia in SELECTOR_DESPLAZAMIENTO:
+            ramas = preparar_multiplicadores(K, N, g, h, p, "teske_aleatorio")
+            compiladas = compilar_ramas(ramas, K, entropia)
+            paso = paso_compilado(compiladas, p)
+            x0, a0, b0 = punto_inicial(p, N, g, h)
+
+            def referencia():
+                x, a, b = x0, a0, b0
+                for _ in range(pasos):
+                    x, a, b = step_optimizado(x, a, b, p, N, K, entropia, ramas)
+
+            def cierre():
+                x, a, b = x0, a0, b0
+                for _ in range(pasos):
+                    x, a, b = paso(x, a, b)
+
+            v_ref = _pasos_por_segundo(referencia, pasos)
+            v_cierre = _pasos_por_segundo(cierre, pasos)
+            v_floyd_ref = _floyd_por_segundo(
+                lambda a, b: pollard_rho_optimizado_steps(p, N, g, h, K, entropia, ramas, a, b, max_pasos), inicios)
+            v_floyd_comp = _floyd_por_segundo(
+                lambda a, b: pollard_rho_compilado_steps(p, N, g, h, compiladas, a, b, max_pasos), inicios)
+            print(f"{K:>4} {entropia:>9} {v_ref:>12,.0f} {v_cierre:>12,.0f} {v_floyd_ref:>12,.0f} "
+                  f"{v_floyd_comp:>12,.0f} {v_cierre / v_ref:>8.2f}x {v_floyd_comp / v_floyd_ref:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Núcleo Pollard Rho - Funciones de referencia
+Funciones del notebook pollard_rho_challenge.ipynb extraídas a un módulo
+importable, junto con la caminata optimizada de una sola ejecución
+"""
+
+import math
+import random
+from typing import List, Optional, Tuple
+
+from sympy import randprime
+
+
+# Configuración del espacio de búsqueda (igual que en el notebook)
+BITS_PRIMOS = [10, 14, 18, 22, 24]
+ITERACIONES_BUSQUEDA = 50
+
+ESPACIO_BUSQUEDA = {
+    "K_particiones": [8, 16, 20, 24, 32],
+    "metodo_entropia": ["modulo", "shift_2", "shift_4", "shift_8"],
+    "estrategia_iter": ["teske_aleatorio", "hibrido"]
+}
+
+# Desplazamiento aplicado por cada método de entropía: i = (x >> s) % K
+SELECTOR_DESPLAZAMIENTO = {
+    "modulo": 0,
+    "shift_2": 2,
+    "shift_4": 4,
+    "shift_8": 8,
+}
+
+
+def generar_parametros_dlp(bits):
+    """Genera parámetros para el problema del logaritmo discreto"""
+    p = randprime(2**(bits-1), 2**bits)
+    N = p - 1
+    g = random.randint(2, p - 2)
+    x_real = random.randint(1, N - 1)
+    h = pow(g, x_real, p)
+    return p, N, g, h, x_real
+
+
+def preparar_multiplicadores(K, N, g, h, p, estrategia):
+    """Prepara los multiplicadores para cada partición"""
+    ramas = []
+    for i in range(K):
+        if estrategia == "teske_aleatorio":
+            c_i = random.randint(1, N - 1)
+            d_i = random.randint(1, N - 1)
+        else:  # Híbrido
+            c_i = (i + 1) % N
+            d_i = (i * 2) % N
+        M_i = (pow(g, c_i, p) * pow(h, d_i, p)) % p
+        ramas.append((M_i, c_i, d_i))
+    return ramas
+
+
+def step_optimizado(x, a, b, p, N, K, entropia, ramas):
+    """Función de paso optimizada"""
+    if entropia == "shift_8": i = (x >> 8) % K
+    elif entropia == "shift_4": i = (x >> 4) % K
+    elif entropia == "shift_2": i = (x >> 2) % K
+    else: i = x % K
+
+    M_i, c_i, d_i = ramas[i]
+    return (x * M_i) % p, (a + c_i) % N, (b + d_i) % N
+
+
+def pollard_rho_classico_steps(p, N, g, h):
+    """Implementación del algoritmo clásico de Pollard Rho"""
+    def step(x, a, b):
+        if x % 3 == 0:
+            return (x * h) % p, a, (b + 1) % N
+        elif x % 3 == 1:
+            return (x * x) % p, (2 * a) % N, (2 * b) % N
+        else:
+            return (x * g) % p, (a + 1) % N, b
+
+    x, a, b = 1, 0, 0
+    X, A, B = x, a, b
+    pasos = 0
+    max_pasos = int(math.sqrt(N)) * 15
+
+    for _ in range(max_pasos):
+        x, a, b = step(x, a, b)
+        X, A, B = step(X, A, B)
+        X, A, B = step(X, A, B)
+        pasos += 1
+        if x == X and (b - B) % N != 0:
+            return pasos
+    return max_pasos
+
+
+def punto_inicial(p, N, g, h, a0=None, b0=None) -> Tuple[int, int, int]:
+    """Genera (x0, a0, b0) con x0 = g^a0 · h^b0 mod p"""
+    if a0 is None:
+        a0 = random.randint(1, N - 1)
+    if b0 is None:
+        b0 = random.randint(1, N - 1)
+    x0 = (pow(g, a0, p) * pow(h, b0, p)) % p
+    return x0, a0, b0
+
+
+def pollard_rho_optimizado_steps(p, N, g, h, K, entropia, ramas: List[Tuple[int, int, int]],
+                                 a0, b0, max_pasos) -> Optional[int]:
+    """
+    Caminata optimizada con Floyd, tal como se mide en la búsqueda de configuraciones
+
+    Returns:
+        Pasos hasta la primera colisión útil ((bT - bH) % N != 0), o None si
+        no se alcanza en max_pasos
+    """
+    x0, a0, b0 = punto_inicial(p, N, g, h, a0, b0)
+    xT, aT, bT = x0, a0, b0
+    xH, aH, bH = x0, a0, b0
+    pasos = 0
+
+    for _ in range(max_pasos):
+        xT, aT, bT = step_optimizado(xT, aT, bT, p, N, K, entropia, ramas)
+        pasos += 1
+        xH, aH, bH = step_optimizado(xH, aH, bH, p, N, K, entropia, ramas)
+        xH, aH, bH = step_optimizado(xH, aH, bH, p, N, K, entropia, ramas)
+        if xT == xH and (bT - bH) % N != 0:
+            return pasos
+    return None
+
+
+def resolver_colision(a1, b1, a2, b2, p, N, g, h, max_candidatos=1 << 16) -> Tuple[Optional[int], int]:
+    """
+    Convierte una colisión g^a1·h^b1 ≡ g^a2·h^b2 en el logaritmo de h
+
+    Resuelve x·(b1 − b2) ≡ (a2 − a1) (mod N). Si d = gcd(b1 − b2, N) > 1 hay
+    d candidatos x0 + k·N/d; se prueban con pow(g, x, p) == h.
+
+    Args:
+        a1, b1, a2, b2: Exponentes de los dos puntos que colisionan
+        p, N, g, h: Parámetros DLP
+        max_candidatos: Máximo de candidatos a comprobar cuando d es grande
+
+    Returns:
+        (x o None si ningún candidato verifica, candidatos comprobados)
+    """
+    db = (b1 - b2) % N
+    da = (a2 - a1) % N
+    if db == 0:
+        return None, 0
+
+    d = math.gcd(db, N)
+    if da % d != 0:
+        return None, 0
+
+    n_red = N // d
+    x0 = (da // d) * pow(db // d, -1, n_red) % n_red if n_red > 1 else 0
+
+    probados = 0
+    for k in range(min(d, max_candidatos)):
+        x = x0 + k * n_red
+        probados += 1
+        if pow(g, x, p) == h:
+            return x, probados
+    return None, probados
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Pollard Rho paralelo con puntos distinguidos (van Oorschot–Wiener)
+Cada proceso lanza caminatas de Teske desde puntos aleatorios y solo envía
+al almacén central los puntos cuyo valor tiene sus bits bajos a cero. Cuando
+dos caminatas llegan al mismo punto distinguido con distinto b, el almacén
+resuelve el logaritmo discreto.
+"""
+
+import multiprocessing
+import os
+import queue
+import random
+import sys
+import time
+from typing import List, Tuple
+
+from rho_core import (SELECTOR_DESPLAZAMIENTO, generar_parametros_dlp,
+                      preparar_multiplicadores, resolver_colision)
+
+
+# Puntos distinguidos que un worker acumula antes de enviarlos al almacén
+TAMANO_ENVIO = 16
+
+
+def bits_distinguidos_por_defecto(N: int, workers: int) -> int:
+    """
+    Elige cuántos bits bajos deben ser cero para que un punto sea distinguido
+
+    Con θ = 2^-d la caminata media mide 2^d pasos y la tabla guarda unos
+    √N / 2^d puntos. Se busca ~√N / 2^d ≈ 2^(bits/4) para que la tabla sea
+    pequeña y el trabajo extra tras la colisión (~2^d por worker) despreciable.
+    """
+    bits = N.bit_length()
+    d = bits // 4 - max(0, workers.bit_length() - 1)
+    return max(0, d)
+
+
+def _trabajador(id_trabajador: int, p: int, N: int, g: int, h: int, K: int, desplazamiento: int,
+                ramas: List[Tuple[int, int, int]], mascara: int, max_longitud: int,
+                semilla: int, cola, parar) -> None:
+    """
+    Bucle de un proceso: caminatas de Teske hasta un punto distinguido
+
+    Envía a la cola tuplas (id, pasos_desde_último_envío, [(x, a, b), ...]).
+    Las caminatas que superan max_longitud sin encontrar un punto
+    distinguido (ciclo sin puntos distinguidos) se abandonan.
+    """
+    rng = random.Random(semilla)
+    M = [r[0] for r in ramas]
+    C = [r[1] for r in ramas]
+    D = [r[2] for r in ramas]
+    pendientes = []
+    pasos = 0
+
+    while not parar.is_set():
+        a, b = rng.randint(1, N - 1), rng.randint(1, N - 1)
+        x = (pow(g, a, p) * pow(h, b, p)) % p
+
+        for _ in range(max_longitud):
+            i = (x >> desplazamiento) % K
+            x = (x * M[i]) % p
+            a += C[i]
+            b += D[i]
+            pasos += 1
+            if x & mascara == 0:
+                # Reducción perezosa de exponentes: solo al publicar el punto
+                pendientes.append((x, a % N, b % N))
+                break
+
+        if len(pendientes) >= TAMANO_ENVIO:
+            cola.put((id_trabajador, pasos, pendientes))
+            pendientes, pasos = [], 0
+
+    cola.put((id_trabajador, pasos, pendientes))
+
+
+def memoria_tabla(tabla: dict) -> int:
+    """Estimación en bytes de la tabla de puntos distinguidos (dict + claves + tuplas)"""
+    total = sys.getsizeof(tabla)
+    for x, ab in tabla.items():
+        total += sys.getsizeof(x) + sys.getsizeof(ab) + sum(sys.getsizeof(v) for v in ab)
+    return total
+
+
+def pollard_rho_distinguidos(p: int, N: int, g: int, h: int, K: int = 8, entropia: str = "shift_4",
+                             workers: int = None, bits_distinguidos: int = None,
+                             semilla: int = None, timeout: float = None) -> dict:
+    """
+    Resuelve g^x ≡ h (mod p) con caminatas paralelas y puntos distinguidos
+
+    Todas las caminatas comparten los mismos multiplicadores de Teske
+    (preparar_multiplicadores), de modo que dos caminatas que coinciden en
+    un punto siguen el mismo camino hasta el siguiente punto distinguido.
+
+    Args:
+        p, N, g, h: Parámetros DLP (N = orden del grupo, p − 1)
+        K: Número de particiones
+        entropia: Método de entropía del selector de rama
+        workers: Procesos (por defecto os.cpu_count())
+        bits_distinguidos: Bits bajos a cero de un punto distinguido
+        semilla: Semilla de multiplicadores y caminatas (reproducibilidad)
+        timeout: Segundos máximos de búsqueda (None = sin límite)
+
+    Returns:
+        Diccionario con x (None si no se resuelve), pasos, pasos_por_segundo,
+        puntos_distinguidos, colisiones, candidatos_probados,
+        memoria_tabla_bytes, tiempo, workers y bits_distinguidos
+    """
+    workers = workers or os.cpu_count() or 1
+    if bits_distinguidos is None:
+        bits_distinguidos = bits_distinguidos_por_defecto(N, workers)
+    mascara = (1 << bits_distinguidos) - 1
+    max_longitud = 20 << bits_distinguidos
+
+    semillas = random.Random(semilla)
+    estado_random = random.getstate()
+    random.seed(semillas.getrandbits(64))
+    ramas = preparar_multiplicadores(K, N, g, h, p, "teske_aleatorio")
+    random.setstate(estado_random)
+
+    ctx = multiprocessing.get_context()
+    cola = ctx.Queue()
+    parar = ctx.Event()
+    procesos = [ctx.Process(target=_trabajador,
+                            args=(i, p, N, g, h, K, SELECTOR_DESPLAZAMIENTO[entropia], ramas, mascara,
+                                  max_longitud, semillas.getrandbits(64), cola, parar),
+                            daemon=True)
+                for i in range(workers)]
+
+    tabla = {}
+    pasos_totales = 0
+    colisiones = 0
+    candidatos = 0
+    resultado = None
+    inicio = time.perf_counter()
+
+    for proceso in procesos:
+        proceso.start()
+    try:
+        while resultado is None:
+            if timeout is not None and time.perf_counter() - inicio > timeout:
+                break
+            try:
+                _, pasos, puntos = cola.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            pasos_totales += pasos
+
+            for x, a, b in puntos:
+                previo = tabla.get(x)
+                if previo is None:
+                    tabla[x] = (a, b)
+                    continue
+                if previo[1] == b:
+                    continue  # Misma caminata o colisión inútil
+                colisiones += 1
+                log, probados = resolver_colision(previo[0], previo[1], a, b, p, N, g, h)
+                candidatos += probados
+                if log is not None:
+                    resultado = log
+                    break
+                tabla[x] = (a, b)
+    finally:
+        parar.set()
+        # Vaciar la cola para que los procesos puedan terminar su último put
+        fin = time.perf_counter() + 2.0
+        while any(proc.is_alive() for proc in procesos) and time.perf_counter() < fin:
+            try:
+                pasos_totales += cola.get(timeout=0.1)[1]
+            except queue.Empty:
+                pass
+        for proceso in procesos:
+            if proceso.is_alive():
+                proceso.terminate()
+            proceso.join()
+
+    tiempo = time.perf_counter() - inicio
+    return {
+        'x': resultado,
+        'pasos': pasos_totales,
+        'pasos_por_segundo': pasos_totales / tiempo if tiempo > 0 else 0.0,
+        'puntos_distinguidos': len(tabla),
+        'colisiones': colisiones,
+        'candidatos_probados': candidatos,
+        'memoria_tabla_bytes': memoria_tabla(tabla),
+        'tiempo': tiempo,
+        'workers': workers,
+        'bits_distinguidos': bits_distinguidos,
+    }
+
+
+def main():
+    """Resuelve instancias DLP crecientes e informa del rendimiento"""
+    workers = os.cpu_count() or 1
+    print(f"Workers: {workers}")
+    print(f"{'bits':>5} {'d':>3} {'pasos':>12} {'pasos/s':>12} {'PD':>8} {'tabla (KB)':>11} {'t (s)':>8}  ok")
+    for bits in (24, 28, 32, 36):
+        p, N, g, h, _ = generar_parametros_dlp(bits)
+        r = pollard_rho_distinguidos(p, N, g, h, workers=workers)
+        ok = r['x'] is not None and pow(g, r['x'], p) == h
+        print(f"{bits:>5} {r['bits_distinguidos']:>3} {r['pasos']:>12,} {r['pasos_por_segundo']:>12,.0f} "
+              f"{r['puntos_distinguidos']:>8,} {r['memoria_tabla_bytes'] / 1024:>11.1f} {r['tiempo']:>8.2f}  {ok}")
+
+
+if __name__ == '__main__':
+    main()
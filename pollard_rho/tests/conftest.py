@@ -0,0 +1,12 @@
+"""
+Configuración común de las pruebas de Pollard Rho
+
+Los scripts se importan como módulos planos (igual que entre ellos), así
+que se añade src/scripts al path.
+"""
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
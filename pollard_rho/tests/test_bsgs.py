@@ -0,0 +1,88 @@
+"""Pruebas de BSGS con memoria acotada (bsgs.py)"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+from sympy import isprime, primitive_root
+
+from bsgs import (MAX_BITS_P, TablaPasosPequenos, _mulmod, bsgs, bsgs_diccionario,
+                  pasos_pequenos_para_memoria)
+
+PRIMOS = [1_000_003, 4_294_967_311, 1_099_511_627_791]  # 20, 33 y 40 bits
+
+
+def _instancia(p: int, semilla: int):
+    g = primitive_root(p)
+    x = random.Random(semilla).randrange(1, p - 1)
+    return g, pow(g, x, p), x
+
+
+@pytest.mark.parametrize('p', PRIMOS)
+def test_recovers_logarithm(p):
+    assert isprime(p)
+    g, h, x = _instancia(p, p)
+    r = bsgs(p, g, h)
+    assert r['x'] == x
+    assert r['pasos_pequenos'] == math.isqrt(p - 2) + 1
+    assert 1 <= r['pasos_gigantes'] <= -(-(p - 1) // r['pasos_pequenos'])
+
+
+def test_matches_dictionary_reference():
+    p = PRIMOS[0]
+    for semilla in range(5):
+        g, h, _ = _instancia(p, semilla)
+        assert bsgs(p, g, h, medir_memoria=False)['x'] == bsgs_diccionario(p, g, h, p - 1)
+
+
+def test_memory_budget_trades_table_for_giant_steps():
+    p = PRIMOS[1]
+    g, h, x = _instancia(p, 1)
+    completo = bsgs(p, g, h)
+    acotado = bsgs(p, g, h, memoria_max=64 << 10)
+    assert acotado['x'] == completo['x'] == x
+    assert acotado['tabla_bytes'] <= 64 << 10 < completo['tabla_bytes']
+    assert acotado['pasos_pequenos'] < completo['pasos_pequenos']
+    assert acotado['memoria_pico_bytes'] < completo['memoria_pico_bytes']
+    assert pasos_pequenos_para_memoria(p - 1, p, 64 << 10) == acotado['pasos_pequenos']
+
+
+def test_explicit_small_steps_and_subgroup_order():
+    p = PRIMOS[0]
+    raiz = primitive_root(p)
+    g = pow(raiz, 2, p)  # orden (p − 1) / 2
+    N = (p - 1) // 2
+    h = pow(g, 12_345, p)
+    r = bsgs(p, g, h, N, m=100, medir_memoria=False)
+    assert r['x'] == 12_345
+    assert r['pasos_pequenos'] == 100
+    assert r['memoria_pico_bytes'] is None
+
+
+def test_errors():
+    p = PRIMOS[0]
+    raiz = primitive_root(p)
+    with pytest.raises(ValueError, match="subgrupo"):
+        bsgs(p, pow(raiz, 2, p), raiz, (p - 1) // 2)
+    with pytest.raises(ValueError, match="bits"):
+        bsgs((1 << MAX_BITS_P) + 15, 3, 5)
+    with pytest.raises(ValueError, match="memoria"):
+        bsgs(p, raiz, 5, memoria_max=8)
+
+
+def test_mulmod_near_the_limit():
+    rng = random.Random(0)
+    p = (1 << MAX_BITS_P) - 11
+    a = [rng.randrange(p) for _ in range(1000)]
+    b = rng.randrange(p)
+    esperado = [v * b % p for v in a]
+    assert _mulmod(np.array(a, dtype=np.uint64), np.uint64(b), p).tolist() == esperado
+
+
+def test_compact_table_with_probe_collisions():
+    claves = np.arange(1, 2001, dtype=np.uint64) * 4096  # mismos bits bajos
+    tabla = TablaPasosPequenos(len(claves), np.uint64)
+    tabla.insertar(claves, np.arange(len(claves), dtype=np.uint32))
+    consultas = np.concatenate([claves[::-1], np.array([3, 5, 7], dtype=np.uint64)])
+    assert tabla.buscar(consultas).tolist() == list(range(1999, -1, -1)) + [-1, -1, -1]
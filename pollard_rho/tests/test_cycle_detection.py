@@ -0,0 +1,60 @@
+"""Pruebas de las estrategias de detección de ciclos (cycle_detection.py)"""
+
+import random
+
+import pytest
+
+from cycle_detection import ESTRATEGIAS_CICLO, pollard_rho_ciclo
+from rho_core import generar_parametros_dlp, preparar_multiplicadores
+
+
+def _rho(mu: int, lam: int):
+    """Iteración de prueba con cola μ y ciclo λ; b cuenta los pasos dados"""
+    def paso(x, a, b):
+        siguiente = x + 1 if x + 1 < mu + lam else mu
+        return siguiente, a, b + 1
+    return paso
+
+
+@pytest.mark.parametrize('estrategia', sorted(ESTRATEGIAS_CICLO))
+@pytest.mark.parametrize('mu, lam', [(0, 1), (0, 17), (5, 1), (37, 64), (100, 3)])
+def test_finds_the_cycle(estrategia, mu, lam):
+    r = ESTRATEGIAS_CICLO[estrategia](_rho(mu, lam), (0, 0, 0), 10_000)
+    assert r['exito']
+    T, H = r['T'], r['H']
+    assert T[0] == H[0] >= mu
+    # Los dos estados están a un múltiplo de λ de distancia
+    assert (H[2] - T[2]) % lam == 0 and H[2] != T[2]
+    limites = {'floyd': 3 * (mu + lam), 'brent': 2 * max(mu, lam) + lam + 1, 'nivasch': mu + 2 * lam}
+    assert r['multiplicaciones'] <= limites[estrategia]
+
+
+@pytest.mark.parametrize('estrategia', sorted(ESTRATEGIAS_CICLO))
+def test_budget_exhausted(estrategia):
+    r = ESTRATEGIAS_CICLO[estrategia](_rho(1000, 1000), (0, 0, 0), 100)
+    assert not r['exito']
+    assert r['multiplicaciones'] <= 100
+
+
+def test_nivasch_stack_stays_small():
+    r = ESTRATEGIAS_CICLO['nivasch'](_rho(50, 200), (0, 0, 0), 10_000)
+    # x crece a lo largo de la cola: solo el mínimo del ciclo reinicia la pila
+    assert r['memoria_estados'] <= 250
+    assert ESTRATEGIAS_CICLO['brent'](_rho(50, 200), (0, 0, 0), 10_000)['memoria_estados'] == 2
+
+
+@pytest.mark.parametrize('estrategia', sorted(ESTRATEGIAS_CICLO))
+def test_dlp_collisions_are_consistent(estrategia):
+    random.seed(11)
+    p, N, g, h, _ = generar_parametros_dlp(24)
+    ramas = preparar_multiplicadores(16, N, g, h, p, 'teske_aleatorio')
+    exitos = 0
+    for _ in range(5):
+        r = pollard_rho_ciclo(p, N, g, h, 16, 'shift_4', ramas, estrategia_ciclo=estrategia)
+        if not r['exito']:
+            continue
+        exitos += 1
+        for x, a, b in (r['T'], r['H']):
+            assert x == pow(g, a, p) * pow(h, b, p) % p
+        assert r['T'][0] == r['H'][0] and r['T'][2] != r['H'][2]
+    assert exitos >= 3
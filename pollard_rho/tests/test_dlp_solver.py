@@ -0,0 +1,62 @@
+"""Pruebas del resolvedor completo del DLP (dlp_solver.py y resolver_colision)"""
+
+import random
+
+import pytest
+from sympy import primitive_root
+
+from dlp_solver import solve_dlp
+from rho_core import resolver_colision
+
+P = 1_000_003  # p − 1 = 2 · 3 · 166667
+
+
+@pytest.mark.parametrize('estrategia', ['floyd', 'brent', 'nivasch'])
+@pytest.mark.parametrize('semilla', range(3))
+def test_solves_random_instances(estrategia, semilla):
+    rng = random.Random(semilla)
+    g = primitive_root(P)
+    x = rng.randrange(1, P - 1)
+    random.seed(semilla)
+    r = solve_dlp(P, g, pow(g, x, P), estrategia_ciclo=estrategia)
+    assert r['verificado'] and r['x'] == x
+    assert r['multiplicaciones'] > 0
+
+
+def test_base_of_small_order():
+    # g = raíz^2 genera el subgrupo de índice 2: la relación solo vale módulo (p − 1) / 2
+    random.seed(3)
+    g = pow(primitive_root(P), 2, P)
+    h = pow(g, 424242, P)
+    r = solve_dlp(P, g, h)
+    assert pow(g, r['x'], P) == h
+
+
+def test_trivial_target():
+    assert solve_dlp(P, primitive_root(P), 1)['x'] == 0
+
+
+def test_target_outside_subgroup_raises():
+    random.seed(4)
+    raiz = primitive_root(P)
+    with pytest.raises(ValueError, match="No se encontró el logaritmo"):
+        solve_dlp(P, pow(raiz, 2, P), raiz, max_reinicios=3)
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        solve_dlp(P, 2, 4, estrategia_ciclo="otra")
+
+
+def test_collision_with_common_factor_enumerates_candidates():
+    g = primitive_root(P)
+    x = 123_457
+    h = pow(g, x, P)
+    N = P - 1
+    # a1 + x·b1 ≡ a2 + x·b2 con b1 − b2 = 6: d = gcd(6, N) = 6 candidatos
+    b1, b2, a2 = 10, 4, 77
+    a1 = (a2 - x * (b1 - b2)) % N
+    encontrado, probados = resolver_colision(a1, b1, a2, b2, P, N, g, h)
+    assert encontrado == x
+    assert 1 <= probados <= 6
+    assert resolver_colision(a1, b1, a2, b1, P, N, g, h) == (None, 0)
@@ -0,0 +1,82 @@
+"""Pruebas de la búsqueda reanudable (grid_search.py)"""
+
+import json
+
+import pytest
+
+import grid_search
+from grid_search import AlmacenIncompatible, AlmacenResultados, ejecutar_busqueda
+
+ESPACIO = {
+    "K_particiones": [4],
+    "metodo_entropia": ["shift_4"],
+    "estrategia_iter": ["teske_aleatorio", "hibrido"],
+}
+
+
+def _buscar(ruta, semilla=0, workers=1, iteraciones=2):
+    return ejecutar_busqueda(str(ruta), ESPACIO, [12], iteraciones, semilla, workers,
+                             halving=False, verbose=False)
+
+
+def test_resume_only_runs_missing_trials(tmp_path):
+    ruta = tmp_path / 'resultados.jsonl'
+    primera = _buscar(ruta)
+    assert len(AlmacenResultados(str(ruta))) == 4
+
+    # Relanzar con más ensayos solo añade los que faltan y da los mismos pasos
+    segunda = _buscar(ruta, iteraciones=3)
+    lineas = ruta.read_text().splitlines()
+    assert len(lineas) == 6
+    assert {r['config']['estrategia_iter'] for r in segunda} == set(ESPACIO['estrategia_iter'])
+    assert len(primera) == 2
+
+
+def test_results_do_not_depend_on_workers(tmp_path):
+    serie = _buscar(tmp_path / 'serie.jsonl', workers=1)
+    paralelo = _buscar(tmp_path / 'paralelo.jsonl', workers=2)
+    assert [(r['score'], r['detalle_pasos']) for r in serie] == \
+        [(r['score'], r['detalle_pasos']) for r in paralelo]
+
+
+def test_resume_with_other_seed_is_refused(tmp_path):
+    ruta = tmp_path / 'resultados.jsonl'
+    _buscar(ruta, semilla=0)
+    with pytest.raises(AlmacenIncompatible):
+        _buscar(ruta, semilla=5)
+    assert len(AlmacenResultados(str(ruta), semilla=0)) == 4
+
+
+def test_truncated_and_incomplete_lines_are_ignored(tmp_path):
+    ruta = tmp_path / 'resultados.jsonl'
+    _buscar(ruta, iteraciones=1)
+    with open(ruta, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'config': 'K=4|shift_4|hibrido', 'bits': 12}) + '\n')
+        f.write('[1, 2, 3]\n')
+        f.write('{"config": "K=4|sh')
+    almacen = AlmacenResultados(str(ruta))
+    assert len(almacen) == 2
+    # La línea a medias se trunca para que el siguiente registro empiece en su propia línea
+    assert ruta.read_text().endswith('\n')
+
+
+def test_cli_reports_seed_mismatch_as_usage_error(tmp_path, monkeypatch, capsys):
+    ruta = tmp_path / 'resultados.jsonl'
+    _buscar(ruta, semilla=0, iteraciones=1)
+    monkeypatch.setattr('sys.argv', ['grid_search.py', str(ruta), '--workers', '1', '--iteraciones', '1',
+                                     '--bits', '12', '--K', '4', '--sin-halving', '--semilla', '5'])
+    with pytest.raises(SystemExit) as salida:
+        grid_search.main()
+    assert salida.value.code == 2
+    assert 'otra semilla' in capsys.readouterr().err
+
+
+def test_cli_does_not_hide_other_value_errors(tmp_path, monkeypatch):
+    def falla(*args, **kwargs):
+        raise ValueError("fallo en un worker")
+
+    monkeypatch.setattr(grid_search, 'evaluar_tarea', falla)
+    monkeypatch.setattr('sys.argv', ['grid_search.py', str(tmp_path / 'r.jsonl'), '--workers', '1',
+                                     '--iteraciones', '1', '--bits', '12', '--K', '4', '--sin-halving'])
+    with pytest.raises(ValueError, match="fallo en un worker"):
+        grid_search.main()
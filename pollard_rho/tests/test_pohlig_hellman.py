@@ -0,0 +1,73 @@
+"""Pruebas de Pohlig–Hellman (pohlig_hellman.py)"""
+
+import math
+import random
+
+import pytest
+from sympy import isprime, primitive_root
+
+import pohlig_hellman
+from pohlig_hellman import elegir_metodo, pohlig_hellman as resolver
+
+
+def _grupo(p: int, semilla: int):
+    """(g, h, x) con g de orden p − 1 y h = g^x"""
+    rng = random.Random(semilla)
+    g = primitive_root(p)
+    x = rng.randrange(1, p - 1)
+    return g, pow(g, x, p), x
+
+
+@pytest.mark.parametrize('p', [1_000_003, 2_147_483_659, 1_099_511_627_791])
+def test_recovers_logarithm(p):
+    assert isprime(p)
+    g, h, x = _grupo(p, p)
+    resultado = resolver(p, g, h)
+    assert resultado['x'] == x % resultado['orden']
+    assert pow(g, resultado['x'], p) == h
+
+
+def test_large_p_uses_rho_or_exhaustive_search():
+    p = 281_474_976_710_677  # 48 bits: fuera de la tabla compacta de bsgs
+    assert isprime(p)
+    g, h, x = _grupo(p, 7)
+    resultado = resolver(p, g, h)
+    assert pow(g, resultado['x'], p) == h
+    assert {d['metodo'] for d in resultado['factores']} <= {'rho', 'exhaustiva'}
+
+
+def test_bsgs_counts_measured_multiplications(monkeypatch):
+    p = 1_000_003
+    g, h, _ = _grupo(p, 3)
+    llamadas = []
+    bsgs_real = pohlig_hellman.bsgs
+
+    def espia(*args, **kwargs):
+        r = bsgs_real(*args, **kwargs)
+        llamadas.append(r)
+        return r
+
+    monkeypatch.setattr(pohlig_hellman, 'bsgs', espia)
+    resultado = resolver(p, g, h)
+    assert llamadas
+    total_bsgs = sum(r['pasos_pequenos'] + r['pasos_gigantes'] for r in llamadas)
+    assert sum(d['multiplicaciones'] for d in resultado['factores'] if d['metodo'] == 'bsgs') == total_bsgs
+    # Medido, no la estimación 2·⌈√q⌉: el acierto puede llegar antes del último paso gigante
+    for r in llamadas:
+        assert r['pasos_gigantes'] <= r['pasos_pequenos']
+
+
+def test_method_choice():
+    assert elegir_metodo(101) == 'bsgs'
+    assert elegir_metodo((1 << 40) + 15, max_tabla_bsgs=1 << 16) == 'rho'
+    assert elegir_metodo(101, p=(1 << 50) + 1) == 'exhaustiva'
+    assert elegir_metodo(1 << 20, p=(1 << 50) + 1) == 'rho'
+    assert elegir_metodo(1 << 20, max_tabla_bsgs=math.isqrt(1 << 20) + 1) == 'bsgs'
+
+
+def test_h_outside_subgroup_is_rejected():
+    p = 1_000_003
+    g, _, _ = _grupo(p, 1)
+    cuadrado = pow(g, 2, p)  # orden (p − 1) / 2
+    with pytest.raises(ValueError):
+        resolver(p, cuadrado, g)
@@ -0,0 +1,52 @@
+"""Pruebas del motor por lotes (rho_batch.py) frente a las funciones escalares de rho_core"""
+
+import random
+
+import numpy as np
+import pytest
+
+from rho_batch import generar_lote, pollard_rho_classico_lote_steps, pollard_rho_lote_steps, tipo_array
+from rho_core import pollard_rho_classico_steps, pollard_rho_optimizado_steps
+
+
+def test_array_type_switches_at_31_bits():
+    assert tipo_array(2**31 - 1) == np.uint64
+    assert tipo_array(2**31) == object
+
+
+@pytest.mark.parametrize('bits', [14, 22, 32])  # 32 bits: enteros Python (dtype object)
+@pytest.mark.parametrize('entropia', ['modulo', 'shift_4'])
+def test_batch_matches_scalar_walks(bits, entropia):
+    random.seed(bits)
+    W, K = 6, 16
+    lote = generar_lote(bits, W, K, 'teske_aleatorio')
+    max_pasos = 3 * int(2 ** (bits / 2))
+    lote_pasos = pollard_rho_lote_steps(lote['p'], lote['N'], lote['g'], lote['h'], K, entropia,
+                                        lote['ramas'], lote['a0'], lote['b0'], max_pasos)
+    escalar = [pollard_rho_optimizado_steps(lote['p'][w], lote['N'][w], lote['g'][w], lote['h'][w], K,
+                                            entropia, lote['ramas'][w], lote['a0'][w], lote['b0'][w],
+                                            max_pasos) for w in range(W)]
+    assert lote_pasos.tolist() == [-1 if s is None else s for s in escalar]
+
+
+def test_per_walk_step_limits():
+    random.seed(1)
+    lote = generar_lote(20, 4, 8, 'hibrido')
+    completo = pollard_rho_lote_steps(lote['p'], lote['N'], lote['g'], lote['h'], 8, 'shift_2',
+                                      lote['ramas'], lote['a0'], lote['b0'], 10**6)
+    assert (completo > 0).all()
+    limites = [int(s) - 1 for s in completo]
+    limites[0] = int(completo[0])
+    cortado = pollard_rho_lote_steps(lote['p'], lote['N'], lote['g'], lote['h'], 8, 'shift_2',
+                                     lote['ramas'], lote['a0'], lote['b0'], limites)
+    assert cortado.tolist() == [int(completo[0])] + [-1] * 3
+
+
+@pytest.mark.parametrize('bits', [12, 20, 24])
+def test_classic_batch_matches_scalar(bits):
+    random.seed(bits)
+    lote = generar_lote(bits, 4, 8, 'hibrido')
+    lote_pasos = pollard_rho_classico_lote_steps(lote['p'], lote['N'], lote['g'], lote['h'])
+    escalar = [pollard_rho_classico_steps(p, N, g, h)
+               for p, N, g, h in zip(lote['p'], lote['N'], lote['g'], lote['h'])]
+    assert lote_pasos.tolist() == escalar
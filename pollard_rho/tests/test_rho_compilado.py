@@ -0,0 +1,58 @@
+"""Pruebas del paso compilado (rho_compilado.py) frente a step_optimizado"""
+
+import random
+
+import pytest
+
+from rho_compilado import (compilar_ramas, paso_compilado, pollard_rho_compilado_steps,
+                           preparar_multiplicadores_compilados)
+from rho_core import generar_parametros_dlp, pollard_rho_optimizado_steps, punto_inicial, step_optimizado
+
+ENTROPIAS = ['modulo', 'shift_2', 'shift_4', 'shift_8']
+
+
+@pytest.mark.parametrize('K', [8, 16, 20, 24, 32])
+@pytest.mark.parametrize('entropia', ENTROPIAS)
+def test_step_matches_reference(K, entropia):
+    random.seed(K)
+    p, N, g, h, _ = generar_parametros_dlp(30)
+    ramas = preparar_multiplicadores_compilados(K, N, g, h, p, 'teske_aleatorio', entropia)
+    assert (ramas.mascara is not None) == (K & (K - 1) == 0)
+    referencia = list(zip(ramas.M, ramas.C, ramas.D))
+    paso = paso_compilado(ramas, p)
+
+    x, a, b = punto_inicial(p, N, g, h)
+    xc, ac, bc = x, a, b
+    for _ in range(500):
+        x, a, b = step_optimizado(x, a, b, p, N, K, entropia, referencia)
+        xc, ac, bc = paso(xc, ac, bc)
+        # a y b se acumulan sin reducir: iguales módulo N
+        assert (xc, ac % N, bc % N) == (x, a, b)
+
+
+@pytest.mark.parametrize('K', [16, 20])
+@pytest.mark.parametrize('estrategia', ['teske_aleatorio', 'hibrido'])
+def test_floyd_walk_matches_reference_steps(K, estrategia):
+    random.seed(K + len(estrategia))
+    for _ in range(4):
+        p, N, g, h, _ = generar_parametros_dlp(22)
+        ramas = preparar_multiplicadores_compilados(K, N, g, h, p, estrategia, 'shift_4')
+        referencia = list(zip(ramas.M, ramas.C, ramas.D))
+        a0, b0 = random.randint(1, N - 1), random.randint(1, N - 1)
+        max_pasos = 20 * int(N ** 0.5)
+        assert (pollard_rho_compilado_steps(p, N, g, h, ramas, a0, b0, max_pasos) ==
+                pollard_rho_optimizado_steps(p, N, g, h, K, 'shift_4', referencia, a0, b0, max_pasos))
+
+
+def test_step_budget_exhausted():
+    random.seed(0)
+    p, N, g, h, _ = generar_parametros_dlp(30)
+    ramas = preparar_multiplicadores_compilados(8, N, g, h, p, 'teske_aleatorio', 'modulo')
+    assert pollard_rho_compilado_steps(p, N, g, h, ramas, 1, 1, 5) is None
+
+
+def test_compile_keeps_branch_order():
+    ramas = [(11, 1, 2), (13, 3, 4), (17, 5, 6)]
+    compiladas = compilar_ramas(ramas, 3, 'shift_2')
+    assert (compiladas.M, compiladas.C, compiladas.D) == ((11, 13, 17), (1, 3, 5), (2, 4, 6))
+    assert compiladas.desplazamiento == 2 and compiladas.mascara is None
@@ -0,0 +1,47 @@
+"""Pruebas de Pollard Rho con puntos distinguidos (rho_distinguished.py)"""
+
+import random
+
+import pytest
+from sympy import primitive_root
+
+from rho_distinguished import bits_distinguidos_por_defecto, pollard_rho_distinguidos
+
+P = 4_294_967_311  # Primo de 33 bits
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_recovers_logarithm(workers):
+    g = primitive_root(P)
+    x = random.Random(workers).randrange(1, P - 1)
+    h = pow(g, x, P)
+    resultado = pollard_rho_distinguidos(P, P - 1, g, h, workers=workers, semilla=5, timeout=60)
+    assert resultado['x'] is not None
+    assert pow(g, resultado['x'], P) == h
+    assert resultado['workers'] == workers
+    assert resultado['puntos_distinguidos'] > 0
+    assert resultado['colisiones'] >= 1
+    assert resultado['pasos'] > 0
+
+
+def test_global_random_state_is_preserved():
+    g = primitive_root(P)
+    h = pow(g, 12345, P)
+    estado = random.getstate()
+    pollard_rho_distinguidos(P, P - 1, g, h, workers=1, semilla=1, timeout=60)
+    assert random.getstate() == estado
+
+
+def test_unsolvable_instance_times_out():
+    # g es un residuo cuadrático y h no: h no está en el subgrupo generado por g
+    raiz = primitive_root(P)
+    resultado = pollard_rho_distinguidos(P, P - 1, pow(raiz, 2, P), raiz, workers=1,
+                                         semilla=2, timeout=1.0)
+    assert resultado['x'] is None
+    assert resultado['tiempo'] < 10
+
+
+def test_default_distinguished_bits():
+    assert bits_distinguidos_por_defecto(2**32, 1) == 8
+    assert bits_distinguidos_por_defecto(2**32, 4) == 6
+    assert bits_distinguidos_por_defecto(100, 64) == 0
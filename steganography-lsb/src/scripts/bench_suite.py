@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks y regresiones - Sistema de Esteganografía
+Mide por etapa (KDF, generación de posiciones, embed/extract, E/S PNG y los
+tres detectores de estegoanálisis) el tiempo y el pico de memoria para
+varios tamaños de imagen y porcentajes de llenado, escribe los resultados
+en JSON y los compara con una línea base guardada: si una etapa empeora más
+de la tolerancia, la ejecución termina con código 1.
+
+Los tiempos se normalizan con una carga de calibración fija (SHA-256 y
+numpy) medida en la misma ejecución, de modo que una línea base tomada en
+otra máquina sigue siendo comparable.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import PIL
+from PIL import Image
+from benchmark import _peak_rss_call, _synthetic_photo
+from steganalysis import DETECTORS
+from stego_system import (CryptoEngine, FeistelPositionGenerator, LSBSteganography, PixelBufferPool,
+                          SteganographyConfig)
+
+
+# Perfiles de tamaños (megapíxeles) y porcentajes de llenado
+PROFILES = {
+    'quick': {'sizes_mp': (0.1, 1.0, 4.0), 'fill_ratios': (0.1, 0.5, 1.0)},
+    'full': {'sizes_mp': (0.1, 1.0, 4.0, 12.0, 25.0, 50.0), 'fill_ratios': (0.01, 0.1, 0.5, 1.0)},
+}
+
+# La permutación legacy materializa capacidad × 8 bytes: por encima se omite
+LEGACY_MAX_MP = 12.0
+
+# Detectores medidos (los tres del notebook)
+BENCH_DETECTORS = ('histogram', 'chi_square', 'rs')
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+# Márgenes de regresión: relativo sobre la línea base más un mínimo absoluto
+# para que las etapas de pocos milisegundos no fallen por ruido
+TIME_TOLERANCE = 0.30
+TIME_MIN_DELTA_S = 0.02
+MEMORY_TOLERANCE = 0.10
+MEMORY_MIN_DELTA_MB = 1.0
+
+
+def calibrate(repeat: int = 5) -> float:
+    """Segundos (mínimo de repeat) de una carga fija de SHA-256 y numpy"""
+    data = bytes(range(256)) * 16384  # 4 MB
+    values = np.random.RandomState(0).random_sample(1_000_000)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hashlib.sha256(data).digest()
+        np.sort(values)
+        np.cumsum(values * 3.0 + 1.0)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure(func: Callable[[], None], repeat: int = 3) -> dict:
+    """
+    Tiempo (mínimo de repeat) y pico de memoria de func
+
+    El pico de tracemalloc cuenta las asignaciones de Python y numpy y es
+    determinista; el de RSS (solo Linux) incluye además los buffers
+    internos de PIL y zlib.
+
+    Returns:
+        {'time_s', 'peak_mb', 'rss_peak_mb'}
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    try:
+        _, rss_peak = _peak_rss_call(func)
+    except OSError:
+        rss_peak = None
+    return {'time_s': min(times), 'peak_mb': peak / 2**20, 'rss_peak_mb': rss_peak}
+
+
+def _size_stages(stego: LSBSteganography, cover_path: str, output_path: str,
+                 pixels: np.ndarray) -> Dict[str, Callable[[], None]]:
+    """Etapas que dependen solo del tamaño de la imagen"""
+    stages = {}
+
+    def png_load():
+        _, buffer = stego._load_pixels(cover_path)
+        stego._release_pixels(buffer)
+
+    def png_save():
+        stego._save_pixels(pixels, None, output_path)
+
+    stages['png_load'] = png_load
+    stages['png_save'] = png_save
+    for name in BENCH_DETECTORS:
+        detector = DETECTORS[name][0]
+        stages[f'detect_{name}'] = lambda detector=detector: detector(pixels)
+
+    if pixels.shape[0] * pixels.shape[1] / 1e6 <= LEGACY_MAX_MP:
+        capacity = pixels.size
+        stages['positions_legacy'] = lambda: stego._generate_position_pool(capacity)
+    return stages
+
+
+def _fill_stages(stego: LSBSteganography, pixels: np.ndarray, fill_ratio: float,
+                 rng: np.random.RandomState) -> Dict[str, Callable[[], None]]:
+    """Etapas que dependen del número de bits ocultos"""
+    capacity = pixels.size
+    bit_count = max(8, int(capacity * fill_ratio) // 8 * 8)
+    generator = FeistelPositionGenerator(stego.crypto.aes_key, stego.crypto.prng_seed)
+    positions = generator.permute(capacity, 0, bit_count)
+    bits = LSBSteganography._bytes_to_bits(rng.bytes(bit_count // 8))
+    work = pixels.copy()
+
+    return {
+        'positions_feistel': lambda: generator.permute(capacity, 0, bit_count),
+        'embed': lambda: LSBSteganography._embed_bits(work, positions, bits),
+        'extract': lambda: LSBSteganography._bits_to_bytes(LSBSteganography._extract_bits(work, positions)),
+    }
+
+
+def run_suite(sizes_mp=PROFILES['quick']['sizes_mp'], fill_ratios=PROFILES['quick']['fill_ratios'],
+              repeat: int = 3, seed: int = 1234, verbose: bool = True, only: Optional[set] = None) -> dict:
+    """
+    Ejecuta todas las etapas y devuelve los resultados
+
+    Args:
+        sizes_mp: Tamaños de imagen en megapíxeles (imágenes sintéticas
+            cuadradas, suaves y con ruido leve)
+        fill_ratios: Fracciones de la capacidad a 1 LSB para embed,
+            extract y posiciones Feistel
+        repeat: Repeticiones por etapa (se guarda el mínimo)
+        seed: Seed de los datos
+        only: Si se indica, solo se miden las claves (etapa, MP, llenado)
+            de este conjunto (para volver a medir las regresiones)
+
+    Returns:
+        {'meta': {...}, 'results': [{'stage', 'megapixels', 'fill_ratio',
+        'time_s', 'peak_mb', 'rss_peak_mb'}, ...]}
+    """
+    rng = np.random.RandomState(seed)
+    stego = LSBSteganography(CryptoEngine('benchmark', b'\x00' * SteganographyConfig.KDF_SALT_SIZE),
+                             buffer_pool=PixelBufferPool())
+    results = []
+
+    def record(stage: str, mp: Optional[float], fill: Optional[float], func: Callable[[], None]) -> None:
+        if only is not None and (stage, mp, fill) not in only:
+            return
+        row = {'stage': stage, 'megapixels': mp, 'fill_ratio': fill, **measure(func, repeat)}
+        results.append(row)
+        if verbose:
+            print(f"  {stage:<20} {_label(row)} {row['time_s']:>10.4f} s {row['peak_mb']:>9.1f} MB")
+
+    salt = b'\x01' * SteganographyConfig.KDF_SALT_SIZE
+    record('kdf', None, None, lambda: CryptoEngine.derive_key('benchmark', salt))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cover_path = os.path.join(tmp, 'cover.png')
+        output_path = os.path.join(tmp, 'out.png')
+        for mp in sizes_mp:
+            if only is not None and not any(key[1] == mp for key in only):
+                continue
+            side = max(16, int(np.sqrt(mp * 1_000_000)))
+            pixels = _synthetic_photo(side, rng)
+            Image.fromarray(pixels, 'RGB').save(cover_path, compress_level=1)
+
+            for stage, func in _size_stages(stego, cover_path, output_path, pixels).items():
+                record(stage, mp, None, func)
+            for fill in fill_ratios:
+                for stage, func in _fill_stages(stego, pixels, fill, rng).items():
+                    record(stage, mp, fill, func)
+            del pixels
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pillow': PIL.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'repeat': repeat,
+            'calibration_s': calibrate(),
+        },
+        'results': results,
+    }
+
+
+def _label(row: dict) -> str:
+    """Tamaño y llenado de una fila en columnas fijas ('   4 MP    50%')"""
+    size = '' if row['megapixels'] is None else f"{row['megapixels']:g} MP"
+    fill = '' if row['fill_ratio'] is None else f"{row['fill_ratio']:.0%}"
+    return f"{size:>8} {fill:>6}"
+
+
+def _key(row: dict) -> Tuple[str, Optional[float], Optional[float]]:
+    return row['stage'], row['megapixels'], row['fill_ratio']
+
+
+def compare(current: dict, baseline: dict, time_tolerance: float = TIME_TOLERANCE,
+            memory_tolerance: float = MEMORY_TOLERANCE) -> List[dict]:
+    """
+    Compara los resultados con la línea base
+
+    El tiempo esperado es el de la línea base escalado por la relación de
+    calibraciones (máquina actual / máquina de la línea base). Una etapa
+    regresa si supera lo esperado en más de la tolerancia relativa y del
+    margen absoluto; las etapas sin línea base no se comparan.
+
+    Returns:
+        Lista de regresiones {'stage', 'megapixels', 'fill_ratio', 'metric',
+        'baseline', 'expected', 'current', 'ratio'}
+    """
+    scale = current['meta']['calibration_s'] / baseline['meta']['calibration_s']
+    reference = {_key(row): row for row in baseline['results']}
+    regressions = []
+    for row in current['results']:
+        base = reference.get(_key(row))
+        if base is None:
+            continue
+        checks = (
+            ('time_s', base['time_s'] * scale, time_tolerance, TIME_MIN_DELTA_S),
+            ('peak_mb', base['peak_mb'], memory_tolerance, MEMORY_MIN_DELTA_MB),
+        )
+        for metric, expected, tolerance, min_delta in checks:
+            value = row[metric]
+            if value > expected * (1 + tolerance) and value - expected > min_delta:
+                regressions.append({
+                    'stage': row['stage'], 'megapixels': row['megapixels'], 'fill_ratio': row['fill_ratio'],
+                    'metric': metric, 'baseline': base[metric], 'expected': expected, 'current': value,
+                    'ratio': value / expected if expected else float('inf'),
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks por etapa de stego_system con línea base")
+    parser.add_argument('--profile', choices=PROFILES, default='quick')
+    parser.add_argument('--sizes', type=float, nargs='+', help="Megapíxeles (sustituye al perfil)")
+    parser.add_argument('--fills', type=float, nargs='+', help="Porcentajes de llenado 0-1 (sustituye al perfil)")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='bench_results.json', help="JSON de resultados")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true', help="Guardar los resultados como línea base")
+    parser.add_argument('--tolerance', type=float, default=TIME_TOLERANCE, help="Tolerancia relativa de tiempo")
+    parser.add_argument('--memory-tolerance', type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument('--confirm', type=int, default=2,
+                        help="Veces que se vuelven a medir las etapas que regresan antes de fallar")
+    args = parser.parse_args()
+
+    profile = PROFILES[args.profile]
+    sizes = args.sizes or profile['sizes_mp']
+    fills = args.fills or profile['fill_ratios']
+    print(f"Perfil {args.profile}: {list(sizes)} MP × llenados {list(fills)}, {args.repeat} repeticiones")
+    current = run_suite(sizes, fills, args.repeat)
+
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        # Un pico puntual de carga en la máquina no debe fallar la ejecución:
+        # las etapas que regresan se miden de nuevo y se conserva el mejor valor
+        for attempt in range(args.confirm):
+            regressions = compare(current, baseline, args.tolerance, args.memory_tolerance)
+            if not regressions:
+                break
+            print(f"Confirmando {len(regressions)} posibles regresiones ({attempt + 1}/{args.confirm})")
+            retry = run_suite(sizes, fills, args.repeat, verbose=False, only={_key(r) for r in regressions})
+            rows = {_key(row): row for row in current['results']}
+            for row in retry['results']:
+                best = rows[_key(row)]
+                best['time_s'] = min(best['time_s'], row['time_s'])
+                best['peak_mb'] = min(best['peak_mb'], row['peak_mb'])
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(current, f, indent=1)
+    print(f"Resultados: {args.output} (calibración {current['meta']['calibration_s'] * 1000:.1f} ms)")
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=1)
+        print(f"[✓] Línea base actualizada: {args.baseline}")
+        return
+
+    if baseline is None:
+        print(f"[!] Sin línea base en {args.baseline}; use --update-baseline para crearla")
+        return
+
+    regressions = compare(current, baseline, args.tolerance, args.memory_tolerance)
+    if not regressions:
+        print(f"[✓] Sin regresiones frente a {args.baseline}")
+        return
+
+    print(f"[✗] {len(regressions)} regresiones frente a {args.baseline}:")
+    for r in regressions:
+        print(f"    {r['stage']:<20} {_label(r)} {r['metric']:<8} {r['current']:.4f} > {r['expected']:.4f} "
+              f"({r['ratio']:.2f}x)")
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
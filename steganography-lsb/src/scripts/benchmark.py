@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Benchmarks - Sistema de Esteganografía
+Mediciones de rendimiento de las etapas de LSBSteganography
+"""
+
+import os
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+from PIL import Image
+from png_output import PNG_PRESETS
+from stego_system import CryptoEngine, LSBSteganography, PixelBufferPool, SteganographyConfig
+
+
+def _legacy_embed(pixels: np.ndarray, positions: np.ndarray, payload: bytes) -> None:
+    """Bucle escalar original: cadena '0'/'1' y escritura píxel a píxel"""
+    width = pixels.shape[1]
+    payload_binary = ''.join(format(byte, '08b') for byte in payload)
+    for i, pos in enumerate(positions):
+        pixel_idx = pos // 3
+        channel = pos % 3
+        y, x = pixel_idx // width, pixel_idx % width
+        bit = int(payload_binary[i])
+        pixels[y, x, channel] = (pixels[y, x, channel] & 0xFE) | bit
+
+
+def _legacy_extract(pixels: np.ndarray, positions: np.ndarray) -> bytes:
+    """Bucle escalar original: lectura píxel a píxel e int(s[i:i+8], 2)"""
+    width = pixels.shape[1]
+    extracted_bits = []
+    for pos in positions:
+        pixel_idx = pos // 3
+        channel = pos % 3
+        y, x = pixel_idx // width, pixel_idx % width
+        extracted_bits.append(pixels[y, x, channel] & 1)
+    binary_string = ''.join(str(bit) for bit in extracted_bits)
+    return bytes(int(binary_string[i:i+8], 2) for i in range(0, len(binary_string), 8))
+
+
+def benchmark_embed_engine(sizes_mp: List[float] = (0.25, 1.0, 4.0),
+                           fill_ratio: float = 0.5,
+                           seed: int = 1234) -> List[dict]:
+    """
+    Compara el motor de embed/extract escalar con el vectorizado
+
+    Para cada tamaño se genera una imagen aleatoria, un payload que ocupa
+    fill_ratio de la capacidad y una permutación de posiciones. Se verifica
+    que ambos motores producen exactamente los mismos píxeles y bytes.
+
+    Args:
+        sizes_mp: Tamaños de imagen en megapíxeles
+        fill_ratio: Fracción de la capacidad LSB utilizada
+        seed: Seed para datos reproducibles
+
+    Returns:
+        Lista de resultados por tamaño (tiempos en s y s/MP, speedup)
+    """
+    rng = np.random.RandomState(seed)
+    results = []
+
+    for mp in sizes_mp:
+        side = int(np.sqrt(mp * 1_000_000))
+        pixels = rng.randint(0, 256, (side, side, 3)).astype(np.uint8)
+        capacity_bits = pixels.size
+        payload = rng.bytes(int(capacity_bits * fill_ratio) // 8)
+        positions = rng.permutation(capacity_bits)[:len(payload) * 8]
+        real_mp = side * side / 1_000_000
+
+        legacy_pixels = pixels.copy()
+        start = time.perf_counter()
+        _legacy_embed(legacy_pixels, positions, payload)
+        t_legacy_embed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        legacy_bytes = _legacy_extract(legacy_pixels, positions)
+        t_legacy_extract = time.perf_counter() - start
+
+        fast_pixels = pixels.copy()
+        start = time.perf_counter()
+        LSBSteganography._embed_bits(fast_pixels, positions, LSBSteganography._bytes_to_bits(payload))
+        t_fast_embed = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fast_bytes = LSBSteganography._bits_to_bytes(LSBSteganography._extract_bits(fast_pixels, positions))
+        t_fast_extract = time.perf_counter() - start
+
+        if not np.array_equal(legacy_pixels, fast_pixels) or legacy_bytes != fast_bytes or fast_bytes != payload:
+            raise AssertionError(f"Motores no equivalentes para {mp} MP")
+
+        results.append({
+            'megapixels': real_mp,
+            'payload_bytes': len(payload),
+            'legacy_embed_s_per_mp': t_legacy_embed / real_mp,
+            'legacy_extract_s_per_mp': t_legacy_extract / real_mp,
+            'vectorized_embed_s_per_mp': t_fast_embed / real_mp,
+            'vectorized_extract_s_per_mp': t_fast_extract / real_mp,
+            'embed_speedup': t_legacy_embed / t_fast_embed,
+            'extract_speedup': t_legacy_extract / t_fast_extract,
+        })
+
+    return results
+
+
+def benchmark_position_generation(sizes_mp: List[float] = (1.0, 12.0, 24.0),
+                                  payload_bytes: int = 200) -> List[dict]:
+    """
+    Compara la generación de posiciones legacy (permutación completa) con Feistel
+
+    Args:
+        sizes_mp: Tamaños de imagen en megapíxeles
+        payload_bytes: Tamaño del payload completo (header incluido)
+
+    Returns:
+        Lista de resultados por tamaño (tiempos en s)
+    """
+    stego = LSBSteganography(CryptoEngine('benchmark', b'\x00' * SteganographyConfig.KDF_SALT_SIZE))
+    seed = stego.crypto.prng_seed
+    bits_needed = payload_bytes * 8
+    results = []
+
+    for mp in sizes_mp:
+        capacity_bits = int(mp * 1_000_000) * SteganographyConfig.CHANNELS_USED
+        timings = {}
+        for name, version in (('legacy', SteganographyConfig.FORMAT_VERSION_LEGACY),
+                              ('feistel', SteganographyConfig.FORMAT_VERSION_FEISTEL)):
+            start = time.perf_counter()
+            stego._select_positions(capacity_bits, bits_needed, seed, version)
+            timings[name] = time.perf_counter() - start
+
+        results.append({
+            'megapixels': mp,
+            'legacy_s': timings['legacy'],
+            'feistel_s': timings['feistel'],
+            'speedup': timings['legacy'] / timings['feistel'],
+        })
+
+    return results
+
+
+def _rss_kb(field: str) -> int:
+    """Lee VmRSS / VmHWM (kB) de /proc/self/status"""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field):
+                return int(line.split()[1])
+    raise OSError(f"{field} no disponible")
+
+
+def _peak_rss_call(func: Callable[[], None]) -> tuple:
+    """
+    Ejecuta func y devuelve (tiempo en s, pico de RSS sobre el RSS inicial en MB)
+
+    Reinicia el máximo del proceso (VmHWM) escribiendo 5 en
+    /proc/self/clear_refs (Linux), de modo que cada llamada se mide aislada.
+    """
+    with open('/proc/self/clear_refs', 'w') as f:
+        f.write('5')
+    rss_before = _rss_kb('VmRSS')
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    return elapsed, (_rss_kb('VmHWM') - rss_before) / 1024
+
+
+def _legacy_io(image_path: str, output_path: str) -> None:
+    """E/S original de encode: convert('RGB') + np.array + Image.fromarray + save"""
+    img = Image.open(image_path).convert('RGB')
+    pixels = np.array(img)
+    Image.fromarray(pixels, 'RGB').save(output_path, 'PNG')
+
+
+def benchmark_io_memory(sizes_mp: List[float] = (1.0, 4.0, 12.0), seed: int = 1234) -> List[dict]:
+    """
+    Pico de RSS por llamada de la E/S PNG clásica frente a la de buffer compartido
+
+    Para cada tamaño se mide la E/S original de encode, _load_pixels +
+    _save_pixels sin pool y con un pool ya caliente, y un encode completo
+    con pool. El pico incluye la imagen y todas las copias intermedias.
+
+    Args:
+        sizes_mp: Tamaños de imagen en megapíxeles
+        seed: Seed para datos reproducibles
+
+    Returns:
+        Lista de resultados por tamaño (MB de pico y s por llamada)
+    """
+    rng = np.random.RandomState(seed)
+    crypto = CryptoEngine('benchmark', b'\x00' * SteganographyConfig.KDF_SALT_SIZE)
+    plain = LSBSteganography(crypto)
+    pooled = LSBSteganography(crypto, buffer_pool=PixelBufferPool())
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cover = os.path.join(tmp, 'cover.png')
+        output = os.path.join(tmp, 'out.png')
+        for mp in sizes_mp:
+            side = int(np.sqrt(mp * 1_000_000))
+            Image.fromarray(rng.randint(0, 256, (side, side, 3)).astype(np.uint8), 'RGB').save(cover)
+            frame_mb = side * side * 3 / 2**20
+
+            def buffered_io(stego):
+                pixels, buffer = stego._load_pixels(cover)
+                try:
+                    stego._save_pixels(pixels, buffer, output)
+                finally:
+                    stego._release_pixels(buffer)
+
+            buffered_io(pooled)  # Calentar el pool para este tamaño
+            t_legacy, peak_legacy = _peak_rss_call(lambda: _legacy_io(cover, output))
+            t_plain, peak_plain = _peak_rss_call(lambda: buffered_io(plain))
+            t_pooled, peak_pooled = _peak_rss_call(lambda: buffered_io(pooled))
+            t_encode, peak_encode = _peak_rss_call(lambda: pooled.encode(cover, b'x' * 1000, output))
+
+            results.append({
+                'megapixels': side * side / 1_000_000,
+                'frame_mb': frame_mb,
+                'legacy_peak_mb': peak_legacy,
+                'buffer_peak_mb': peak_plain,
+                'pooled_peak_mb': peak_pooled,
+                'pooled_encode_peak_mb': peak_encode,
+                'legacy_s': t_legacy,
+                'buffer_s': t_plain,
+                'pooled_s': t_pooled,
+                'pooled_encode_s': t_encode,
+            })
+
+    return results
+
+
+def _synthetic_photo(side: int, rng: np.random.RandomState) -> np.ndarray:
+    """Imagen suave (gradientes y ondas) con ruido leve, más realista para PNG que ruido puro"""
+    y, x = np.mgrid[0:side, 0:side].astype(np.float32) / side
+    channels = [128 + 60 * np.sin(6 * x + k) + 50 * np.cos(4 * y - k) + 20 * np.sin(25 * x * y)
+                for k in range(3)]
+    image = np.stack(channels, axis=-1) + rng.normal(0, 2, (side, side, 3))
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def benchmark_png_presets(sizes_mp: List[float] = (4.0, 12.0), seed: int = 1234) -> List[dict]:
+    """
+    Tiempo por MP y bytes de salida de cada preset de PNG_PRESETS
+
+    Se guarda la misma imagen (con LSB ya alterados en el 20 % de los
+    canales, como tras un encode) con cada preset y se comprueba que los
+    píxeles leídos de vuelta son idénticos.
+
+    Args:
+        sizes_mp: Tamaños de imagen en megapíxeles
+        seed: Seed para datos reproducibles
+
+    Returns:
+        Lista de resultados por (tamaño, preset) con s/MP, bytes y ratios
+        frente al preset 'default'
+    """
+    rng = np.random.RandomState(seed)
+    stego = LSBSteganography(CryptoEngine('benchmark', b'\x00' * SteganographyConfig.KDF_SALT_SIZE))
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'out.png')
+        for mp in sizes_mp:
+            side = int(np.sqrt(mp * 1_000_000))
+            pixels = _synthetic_photo(side, rng)
+            pixels ^= (rng.random_sample(pixels.shape) < 0.2).astype(np.uint8)
+            real_mp = side * side / 1_000_000
+
+            rows = []
+            for name in PNG_PRESETS:
+                start = time.perf_counter()
+                stego._save_pixels(pixels, None, output, name)
+                elapsed = time.perf_counter() - start
+                if not np.array_equal(np.array(Image.open(output)), pixels):
+                    raise AssertionError(f"El preset {name} altera los píxeles")
+                rows.append({'megapixels': real_mp, 'preset': name, 's_per_mp': elapsed / real_mp,
+                             'output_bytes': os.path.getsize(output)})
+
+            default = next(r for r in rows if r['preset'] == 'default')
+            for r in rows:
+                r['speedup'] = default['s_per_mp'] / r['s_per_mp']
+                r['size_ratio'] = r['output_bytes'] / default['output_bytes']
+            results.extend(rows)
+
+    return results
+
+
+def main():
+    """Ejecuta los benchmarks e imprime una tabla resumen"""
+    print("=" * 70)
+    print("  BENCHMARK - Motor de embed/extract LSB")
+    print("=" * 70)
+    print(f"{'MP':>6} {'Embed esc.':>12} {'Embed vec.':>12} {'x':>8} "
+          f"{'Extr. esc.':>12} {'Extr. vec.':>12} {'x':>8}")
+    print(f"{'':>6} {'(s/MP)':>12} {'(s/MP)':>12} {'':>8} {'(s/MP)':>12} {'(s/MP)':>12}")
+    for r in benchmark_embed_engine():
+        print(f"{r['megapixels']:>6.2f} "
+              f"{r['legacy_embed_s_per_mp']:>12.4f} {r['vectorized_embed_s_per_mp']:>12.4f} "
+              f"{r['embed_speedup']:>7.1f}x "
+              f"{r['legacy_extract_s_per_mp']:>12.4f} {r['vectorized_extract_s_per_mp']:>12.4f} "
+              f"{r['extract_speedup']:>7.1f}x")
+
+    print()
+    print("=" * 70)
+    print("  BENCHMARK - Generación de posiciones (payload de 200 bytes)")
+    print("=" * 70)
+    print(f"{'MP':>6} {'Legacy (s)':>12} {'Feistel (s)':>12} {'x':>10}")
+    for r in benchmark_position_generation():
+        print(f"{r['megapixels']:>6.1f} {r['legacy_s']:>12.4f} {r['feistel_s']:>12.6f} {r['speedup']:>9.0f}x")
+
+    print()
+    print("=" * 70)
+    print("  BENCHMARK - Pico de RSS por llamada de E/S PNG (MB)")
+    print("=" * 70)
+    print(f"{'MP':>6} {'Imagen':>8} {'Clásica':>9} {'Buffer':>9} {'Pool':>9} {'encode+pool':>12} "
+          f"{'t clás.':>8} {'t pool':>8}")
+    for r in benchmark_io_memory():
+        print(f"{r['megapixels']:>6.1f} {r['frame_mb']:>8.1f} {r['legacy_peak_mb']:>9.1f} "
+              f"{r['buffer_peak_mb']:>9.1f} {r['pooled_peak_mb']:>9.1f} {r['pooled_encode_peak_mb']:>12.1f} "
+              f"{r['legacy_s']:>8.2f} {r['pooled_s']:>8.2f}")
+
+    print()
+    print("=" * 70)
+    print(f"  BENCHMARK - Presets de salida PNG ({os.cpu_count()} núcleos)")
+    print("=" * 70)
+    print(f"{'MP':>6} {'Preset':>10} {'s/MP':>8} {'x':>7} {'Bytes':>12} {'Tamaño':>8}")
+    for r in benchmark_png_presets():
+        print(f"{r['megapixels']:>6.1f} {r['preset']:>10} {r['s_per_mp']:>8.3f} {r['speedup']:>6.1f}x "
+              f"{r['output_bytes']:>12,} {r['size_ratio']:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Entrada PNG por franjas - Sistema de Esteganografía
+Lectura de un PNG por franjas de filas con memoria acotada y solo con la
+API pública de Pillow. El IDAT se descomprime de forma incremental con
+zlib; cada franja se envuelve en un PNG mínimo (con la última fila de la
+franja anterior, ya reconstruida, como fila sin filtro) y Pillow deshace
+los filtros en C. En memoria solo hay una franja, nunca la imagen entera.
+"""
+
+import io
+import struct
+import zlib
+from typing import Iterator, List, Tuple
+
+import numpy as np
+from PIL import Image
+
+from png_output import _PNG_SIGNATURE, _write_chunk
+
+
+# (tipo de color, profundidad) -> bytes por píxel. Son los formatos en los
+# que tobytes() de Pillow devuelve los bytes crudos de la fila
+_NATIVE_FORMATS = {(0, 8): 1, (2, 8): 3, (3, 8): 1, (4, 8): 2, (6, 8): 4}
+
+# Chunks auxiliares necesarios para decodificar la franja (paleta y transparencia)
+_DECODE_CHUNKS = (b'PLTE', b'tRNS')
+
+_READ_BYTES = 1 << 16  # Lectura del IDAT comprimido por trozos
+
+
+def _read_chunk_header(f) -> Tuple[int, bytes]:
+    header = f.read(8)
+    if len(header) < 8:
+        raise ValueError("PNG truncado")
+    return struct.unpack('>I4s', header)
+
+
+def _mini_png(width: int, rows: int, ihdr_tail: bytes, extra: List[Tuple[bytes, bytes]], body: bytes) -> bytes:
+    """PNG de rows filas con las filas filtradas de body en un IDAT sin comprimir"""
+    out = io.BytesIO()
+    out.write(_PNG_SIGNATURE)
+    _write_chunk(out, b'IHDR', struct.pack('>II', width, rows) + ihdr_tail)
+    for chunk_type, data in extra:
+        _write_chunk(out, chunk_type, data)
+    _write_chunk(out, b'IDAT', zlib.compress(body, 0))
+    _write_chunk(out, b'IEND', b'')
+    return out.getvalue()
+
+
+def png_strip_reader_supported(image_path: str) -> bool:
+    """True si iter_png_strips puede leer la imagen (PNG de 8 bits no entrelazado)"""
+    try:
+        with open(image_path, 'rb') as f:
+            if f.read(8) != _PNG_SIGNATURE:
+                return False
+            length, chunk_type = _read_chunk_header(f)
+            if chunk_type != b'IHDR' or length != 13:
+                return False
+            _, _, depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', f.read(13))
+    except (OSError, ValueError, struct.error):
+        return False
+    return not interlace and (color_type, depth) in _NATIVE_FORMATS
+
+
+def iter_png_strips(image_path: str, rows_per_strip: int, max_rows: int = None) -> Iterator[Image.Image]:
+    """
+    Decodifica un PNG por franjas consecutivas de filas
+
+    Args:
+        image_path: Ruta del PNG (8 bits por muestra, no entrelazado)
+        rows_per_strip: Filas por franja (la última puede ser menor)
+        max_rows: Detenerse tras esta fila (por defecto, la imagen entera);
+            el resto del IDAT no se lee ni se descomprime
+
+    Yields:
+        Imágenes PIL de cada franja en el modo nativo del PNG ('L', 'LA',
+        'P', 'RGB' o 'RGBA'), ya decodificadas
+
+    Raises:
+        ValueError: Si el fichero no es un PNG admitido (ver
+            png_strip_reader_supported) o está truncado
+    """
+    if rows_per_strip < 1:
+        raise ValueError("rows_per_strip debe ser >= 1")
+    with open(image_path, 'rb') as f:
+        if f.read(8) != _PNG_SIGNATURE:
+            raise ValueError("No es un PNG")
+        length, chunk_type = _read_chunk_header(f)
+        if chunk_type != b'IHDR' or length != 13:
+            raise ValueError("PNG sin IHDR")
+        ihdr = f.read(13)
+        f.read(4)
+        width, height, depth, color_type, _, _, interlace = struct.unpack('>IIBBBBB', ihdr)
+        if interlace or (color_type, depth) not in _NATIVE_FORMATS:
+            raise ValueError(f"PNG no admitido por el lector por franjas (tipo {color_type}, {depth} bits, "
+                             f"entrelazado {interlace})")
+
+        extra = []
+        while True:
+            length, chunk_type = _read_chunk_header(f)
+            if chunk_type == b'IDAT':
+                break
+            if chunk_type == b'IEND':
+                raise ValueError("PNG sin IDAT")
+            data = f.read(length)
+            f.read(4)
+            if chunk_type in _DECODE_CHUNKS:
+                extra.append((chunk_type, data))
+
+        def compressed_pieces(length: int) -> Iterator[bytes]:
+            # IDAT consecutivos: un único stream zlib repartido en chunks
+            while True:
+                while length:
+                    piece = f.read(min(length, _READ_BYTES))
+                    if not piece:
+                        raise ValueError("PNG truncado")
+                    length -= len(piece)
+                    yield piece
+                f.read(4)
+                length, chunk_type = _read_chunk_header(f)
+                if chunk_type != b'IDAT':
+                    return
+
+        pieces = compressed_pieces(length)
+        inflater = zlib.decompressobj()
+        stride = width * _NATIVE_FORMATS[(color_type, depth)] + 1
+        total_rows = height if max_rows is None else min(height, max_rows)
+        pending = bytearray()
+        previous_row = None
+
+        for top in range(0, total_rows, rows_per_strip):
+            rows = min(rows_per_strip, total_rows - top)
+            needed = rows * stride
+            while len(pending) < needed:
+                data = inflater.unconsumed_tail or next(pieces, None)
+                if data is None:
+                    raise ValueError("PNG truncado")
+                pending += inflater.decompress(data, needed - len(pending))
+            body = bytes(pending[:needed])
+            del pending[:needed]
+
+            if previous_row is not None:
+                # La fila anterior reconstruida, sin filtro, sirve de referencia a Up/Average/Paeth
+                body = b'\x00' + previous_row + body
+            strip_rows = rows + (previous_row is not None)
+            strip = Image.open(io.BytesIO(_mini_png(width, strip_rows, ihdr[8:], extra, body)))
+            strip.load()
+            previous_row = strip.crop((0, strip_rows - 1, width, strip_rows)).tobytes()
+            yield strip.crop((0, strip_rows - rows, width, strip_rows)) if strip_rows > rows else strip
+
+
+def read_png_rows(image_path: str, rows: int, mode: str = 'RGB') -> Tuple[np.ndarray, Tuple[int, int]]:
+    """
+    Decodifica solo las primeras filas de una imagen
+
+    Con un PNG admitido por iter_png_strips solo se descomprime el IDAT de
+    esas filas; con cualquier otra imagen se decodifica entera (API pública
+    de Pillow) y se recorta.
+
+    Returns:
+        (pixels de las primeras filas en mode, (width, height) de la imagen completa)
+    """
+    with Image.open(image_path) as img:
+        width, height = img.size
+        rows = min(rows, height)
+        if img.format != 'PNG' or not png_strip_reader_supported(image_path):
+            return np.array(img.crop((0, 0, width, rows)).convert(mode)), (width, height)
+    strip = next(iter_png_strips(image_path, rows, rows))
+    return np.array(strip.convert(mode)), (width, height)
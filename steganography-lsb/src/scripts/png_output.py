@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Salida PNG configurable - Sistema de Esteganografía
+Política de salida (nivel zlib, filtro de fila, workers) con presets y un
+escritor PNG propio que filtra las filas con NumPy y comprime el IDAT por
+bloques en paralelo. Cada bloque es un trozo de un único stream deflate
+(como pigz): se cierra con Z_SYNC_FLUSH y se comprime con los últimos 32 KB
+del bloque anterior como diccionario, de modo que el resultado es un PNG
+estándar y apenas más grande que el de un solo hilo.
+"""
+
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+
+import numpy as np
+
+
+# Tipos de filtro PNG por fila; 'adaptive' elige por fila el de menor suma
+# de valores absolutos (heurística de libpng, la que usa Pillow)
+FILTERS = {'none': 0, 'sub': 1, 'up': 2, 'average': 3, 'paeth': 4, 'adaptive': None}
+
+DEFAULT_CHUNK_BYTES = 1 << 21  # Bytes sin comprimir por bloque paralelo
+_WINDOW_BYTES = 1 << 15        # Ventana de deflate: diccionario entre bloques
+_ADLER_BASE = 65521
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+_COLOR_TYPES = {3: 2, 4: 6}    # Canales -> tipo de color PNG (RGB, RGBA)
+
+
+class PNGOutputPolicy:
+    """
+    Política de compresión de la imagen esteganografiada
+
+    Con un solo worker y filtro adaptativo se guarda con Pillow (mismo
+    resultado que antes para compress_level=6); en otro caso se usa
+    write_png. Ningún preset cambia los píxeles, solo tiempo y tamaño.
+
+    Atributos:
+        compress_level: Nivel zlib 0-9 (0 = sin compresión)
+        filter: Filtro de fila (clave de FILTERS)
+        workers: Hilos de compresión (None = os.cpu_count())
+        chunk_bytes: Bytes sin comprimir por bloque paralelo
+    """
+
+    def __init__(self, compress_level: int = 6, filter: str = 'adaptive', workers: Optional[int] = 1,
+                 chunk_bytes: int = DEFAULT_CHUNK_BYTES):
+        if not 0 <= compress_level <= 9:
+            raise ValueError(f"compress_level debe estar entre 0 y 9: {compress_level}")
+        if filter not in FILTERS:
+            raise ValueError(f"Filtro desconocido: {filter}. Opciones: {', '.join(FILTERS)}")
+        if workers is not None and workers < 1:
+            raise ValueError("workers debe ser >= 1")
+        if chunk_bytes < _WINDOW_BYTES:
+            raise ValueError(f"chunk_bytes debe ser >= {_WINDOW_BYTES}")
+        self.compress_level = compress_level
+        self.filter = filter
+        self.workers = workers
+        self.chunk_bytes = chunk_bytes
+
+    @classmethod
+    def resolve(cls, policy: Union[None, str, 'PNGOutputPolicy']) -> 'PNGOutputPolicy':
+        """Acepta None (preset 'default'), el nombre de un preset o una política"""
+        if policy is None:
+            policy = 'default'
+        if isinstance(policy, cls):
+            return policy
+        if policy not in PNG_PRESETS:
+            raise ValueError(f"Preset PNG desconocido: {policy}. Opciones: {', '.join(PNG_PRESETS)}")
+        return PNG_PRESETS[policy]
+
+    @property
+    def uses_pillow(self) -> bool:
+        """True si se guarda con el codificador de Pillow"""
+        return self.workers == 1 and self.filter == 'adaptive'
+
+    def as_dict(self) -> dict:
+        return {
+            'compress_level': self.compress_level,
+            'filter': self.filter,
+            'workers': self.workers,
+            'chunk_bytes': self.chunk_bytes,
+        }
+
+    def __repr__(self) -> str:
+        args = ', '.join(f"{k}={v!r}" for k, v in self.as_dict().items())
+        return f"PNGOutputPolicy({args})"
+
+
+PNG_PRESETS = {
+    'default': PNGOutputPolicy(),                                   # Comportamiento de Pillow
+    'small': PNGOutputPolicy(compress_level=9),                     # Menor tamaño, más lento
+    'parallel': PNGOutputPolicy(workers=None),                      # Como default, en todos los núcleos
+    'fast': PNGOutputPolicy(compress_level=1, filter='sub', workers=None),
+    'store': PNGOutputPolicy(compress_level=0, filter='none', workers=None),  # Sin compresión
+}
+
+
+def _filter_rows(rows: np.ndarray, prev_row: np.ndarray, filter: str, bpp: int) -> np.ndarray:
+    """
+    Aplica el filtro PNG a un bloque de filas
+
+    Todos los filtros se calculan sobre los bytes originales, así que cada
+    fila es independiente de las demás salvo por su fila anterior.
+
+    Args:
+        rows: Filas (n, W*bpp) uint8
+        prev_row: Fila anterior al bloque (W*bpp,) uint8 (ceros en la primera)
+        filter: Clave de FILTERS
+        bpp: Bytes por píxel (3 o 4)
+
+    Returns:
+        Filas filtradas (n, 1 + W*bpp) con el tipo de filtro en la columna 0
+    """
+    n, row_bytes = rows.shape
+    out = np.empty((n, row_bytes + 1), dtype=np.uint8)
+    if filter == 'none':
+        out[:, 0] = 0
+        out[:, 1:] = rows
+        return out
+
+    up = np.empty_like(rows)
+    up[0] = prev_row
+    up[1:] = rows[:-1]
+    left = np.zeros_like(rows)
+    left[:, bpp:] = rows[:, :-bpp]
+
+    def predictor(kind):
+        if kind == 'sub':
+            return left
+        if kind == 'up':
+            return up
+        if kind == 'average':
+            return ((left.astype(np.uint16) + up) >> 1).astype(np.uint8)
+        upper_left = np.zeros_like(rows)
+        upper_left[:, bpp:] = up[:, :-bpp]
+        a, b, c = (v.astype(np.int16) for v in (left, up, upper_left))
+        pa, pb, pc = np.abs(b - c), np.abs(a - c), np.abs(a + b - 2 * c)
+        return np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, upper_left))
+
+    if filter != 'adaptive':
+        out[:, 0] = FILTERS[filter]
+        np.subtract(rows, predictor(filter), out=out[:, 1:])
+        return out
+
+    # Adaptativo: por fila, el filtro con menor suma de |byte con signo|
+    candidates = [rows] + [rows - predictor(kind) for kind in ('sub', 'up', 'average', 'paeth')]
+    scores = np.stack([np.abs(c.view(np.int8).astype(np.int16)).sum(axis=1) for c in candidates])
+    best = scores.argmin(axis=0)
+    out[:, 0] = best
+    for kind, filtered in enumerate(candidates):
+        selected = best == kind
+        out[selected, 1:] = filtered[selected]
+    return out
+
+
+def _compress_block(pixels: np.ndarray, start: int, stop: int, dict_rows: int, last: bool,
+                    compress_level: int, filter: str) -> tuple:
+    """
+    Filtra y comprime las filas [start, stop) como un trozo de stream deflate
+
+    Las últimas filas del bloque anterior se vuelven a filtrar para obtener
+    el diccionario (la ventana de 32 KB que vería un compresor secuencial).
+
+    Returns:
+        (bytes comprimidos, adler32 de los datos filtrados, longitud)
+    """
+    first = max(0, start - dict_rows)
+    width, bpp = pixels.shape[1:]
+    rows = np.ascontiguousarray(pixels[first:stop]).reshape(stop - first, width * bpp)
+    prev_row = pixels[first - 1].reshape(-1) if first > 0 else np.zeros(width * bpp, dtype=np.uint8)
+    filtered = _filter_rows(rows, prev_row, filter, bpp)
+    data = filtered[start - first:].tobytes()
+    zdict = filtered[:start - first].tobytes()[-_WINDOW_BYTES:]
+
+    if zdict:
+        compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -15)
+    compressed = compressor.compress(data) + compressor.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+    return compressed, zlib.adler32(data), len(data)
+
+
+def _adler32_combine(adler1: int, adler2: int, len2: int) -> int:
+    """adler32(A + B) a partir de adler32(A), adler32(B) y len(B) (zlib adler32_combine)"""
+    rem = len2 % _ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1) % _ADLER_BASE
+    sum1 = (sum1 + (adler2 & 0xFFFF) + _ADLER_BASE - 1) % _ADLER_BASE
+    sum2 = (sum2 + (adler1 >> 16) + (adler2 >> 16) + _ADLER_BASE - rem) % _ADLER_BASE
+    return sum1 | (sum2 << 16)
+
+
+def _zlib_header(compress_level: int) -> bytes:
+    """Cabecera zlib (CMF, FLG) con ventana de 32 KB y FLEVEL del nivel"""
+    cmf = 0x78
+    flevel = 0 if compress_level < 2 else 1 if compress_level < 6 else 2 if compress_level == 6 else 3
+    flg = flevel << 6
+    flg += (31 - ((cmf << 8) | flg) % 31) % 31
+    return bytes((cmf, flg))
+
+
+def _write_chunk(f, chunk_type: bytes, data: bytes) -> None:
+    f.write(struct.pack('>I', len(data)))
+    f.write(chunk_type)
+    f.write(data)
+    f.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def write_png(pixels: np.ndarray, output_path: str, compress_level: int = 6, filter: str = 'adaptive',
+              workers: Optional[int] = None, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> int:
+    """
+    Escribe un PNG RGB o RGBA de 8 bits comprimiendo por bloques en paralelo
+
+    Los bloques de filas se filtran y comprimen en hilos (zlib y NumPy
+    liberan el GIL) y se escriben en orden como chunks IDAT, con un número
+    acotado de bloques en vuelo.
+
+    Args:
+        pixels: Array (H, W, 3) o (H, W, 4) uint8 (admite vistas con strides)
+        output_path: Ruta del PNG de salida
+        compress_level: Nivel zlib 0-9
+        filter: Filtro de fila (clave de FILTERS)
+        workers: Hilos de compresión (None = os.cpu_count())
+        chunk_bytes: Bytes sin comprimir por bloque
+
+    Returns:
+        Bytes escritos
+    """
+    if pixels.dtype != np.uint8 or pixels.ndim != 3 or pixels.shape[2] not in _COLOR_TYPES:
+        raise ValueError("write_png espera un array (H, W, 3) o (H, W, 4) uint8")
+    if filter not in FILTERS:
+        raise ValueError(f"Filtro desconocido: {filter}. Opciones: {', '.join(FILTERS)}")
+
+    height, width, channels = pixels.shape
+    row_bytes = width * channels + 1
+    rows_per_block = max(1, chunk_bytes // row_bytes)
+    dict_rows = -(-_WINDOW_BYTES // row_bytes)
+    starts = list(range(0, height, rows_per_block))
+    blocks = [(pixels, start, min(start + rows_per_block, height), dict_rows,
+               start + rows_per_block >= height, compress_level, filter) for start in starts]
+    workers = min(workers or os.cpu_count() or 1, len(blocks))
+
+    with open(output_path, 'wb') as f:
+        f.write(_PNG_SIGNATURE)
+        _write_chunk(f, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, _COLOR_TYPES[channels], 0, 0, 0))
+
+        adler = 1
+        prefix = _zlib_header(compress_level)
+
+        def write_block(result, prefix, adler):
+            compressed, block_adler, length = result
+            adler = _adler32_combine(adler, block_adler, length)
+            _write_chunk(f, b'IDAT', prefix + compressed)
+            return adler
+
+        if workers == 1:
+            for block in blocks:
+                adler = write_block(_compress_block(*block), prefix, adler)
+                prefix = b''
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                pending = deque()
+                blocks_iter = iter(blocks)
+                for block in blocks_iter:
+                    pending.append(executor.submit(_compress_block, *block))
+                    if len(pending) >= workers * 2:  # Limita los bloques en memoria
+                        break
+                while pending:
+                    result = pending.popleft().result()
+                    block = next(blocks_iter, None)
+                    if block is not None:
+                        pending.append(executor.submit(_compress_block, *block))
+                    adler = write_block(result, prefix, adler)
+                    prefix = b''
+
+        _write_chunk(f, b'IDAT', struct.pack('>I', adler))
+        _write_chunk(f, b'IEND', b'')
+        return f.tell()
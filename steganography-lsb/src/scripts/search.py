@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Búsqueda Forense - Sistema de Esteganografía
+Localiza, dentro de una carpeta, la imagen que contiene un mensaje cifrado
+con una contraseña conocida
+"""
+
+import functools
+import os
+import threading
+import time
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import List, Optional
+
+import numpy as np
+from stego_system import CryptoEngine, KeyDerivationCache, LSBSteganography, PixelBufferPool
+
+
+class _CachedPositionsStego(LSBSteganography):
+    """
+    LSBSteganography que memoriza la permutación legacy por (capacidad, seed)
+
+    En una carpeta con imágenes del mismo tamaño y la misma contraseña la
+    permutación completa de RandomState se calcula una sola vez.
+    """
+
+    def __init__(self, crypto: CryptoEngine, key_cache: KeyDerivationCache, max_pools: int = 2):
+        super().__init__(crypto, key_cache, buffer_pool=PixelBufferPool())
+        self.max_pools = max_pools
+        self._pools = OrderedDict()
+        self._pools_lock = threading.Lock()
+
+    def _generate_position_pool_with_seed(self, total_positions: int, seed: int) -> np.ndarray:
+        key = (total_positions, seed)
+        with self._pools_lock:
+            if key in self._pools:
+                self._pools.move_to_end(key)
+                return self._pools[key]
+
+        pool = super()._generate_position_pool_with_seed(total_positions, seed)
+
+        with self._pools_lock:
+            self._pools[key] = pool
+            while len(self._pools) > self.max_pools:
+                self._pools.popitem(last=False)
+        return pool
+
+
+class _SearchWorker:
+    """Estado reutilizado entre imágenes: caché de claves y de permutaciones"""
+
+    def __init__(self, password: str):
+        self.password = password
+        self.key_cache = KeyDerivationCache(max_entries=64, ttl_seconds=None)
+        # El motor propio solo se usa como contenedor; decode siempre recibe password
+        self.stego = _CachedPositionsStego(CryptoEngine.from_key(b'', b'', 0), self.key_cache)
+
+    def try_image(self, path: str) -> Optional[bytes]:
+        """
+        Intenta descifrar una imagen
+
+        Orden de comprobaciones (de más barata a más cara):
+        1. Header de 32 bits leído de las primeras filas (peek_header), sin
+           decodificar la imagen completa: versión conocida y longitud plausible
+        2. PBKDF2 (con caché por salt)
+        3. Posiciones (con caché por seed y capacidad), extracción y AES-GCM
+
+        Returns:
+            Mensaje descifrado, o None si la imagen no contiene un payload válido
+        """
+        try:
+            header = self.stego.peek_header(path)
+            if not header['plausible']:
+                return None
+
+            crypto_with_salt = CryptoEngine(self.password, header['salt'], key_cache=self.key_cache)
+            pixels, buffer = self.stego._load_pixels(path, keep_alpha=True)
+            try:
+                return self.stego._extract_and_decrypt(pixels, header['format_version'], header['mode'],
+                                                       header['capacity_bits'], header['bits_needed'],
+                                                       header['salt'], crypto_with_salt)
+            finally:
+                self.stego._release_pixels(buffer)
+        except (OSError, ValueError):
+            return None
+
+
+# Estado por proceso del ProcessPoolExecutor (en modo hilos se pasa explícitamente)
+_worker: Optional[_SearchWorker] = None
+_stop_event = None
+
+
+def _worker_init(password: str, stop_event) -> None:
+    """Inicializa el estado del worker una vez por proceso"""
+    global _worker, _stop_event
+    _worker = _SearchWorker(password)
+    _stop_event = stop_event
+
+
+def _try_image(worker: _SearchWorker, stop_event, path: str) -> Optional[bytes]:
+    """Prueba una imagen salvo que otro worker ya haya encontrado el mensaje"""
+    if stop_event.is_set():
+        return None
+    message = worker.try_image(path)
+    if message is not None:
+        stop_event.set()
+    return message
+
+
+def _worker_try(path: str) -> Optional[bytes]:
+    """Punto de entrada en los procesos del pool"""
+    return _try_image(_worker, _stop_event, path)
+
+
+def list_candidate_images(folder: str, extensions: tuple = ('.png',)) -> List[str]:
+    """Lista las imágenes candidatas de una carpeta en orden alfabético"""
+    return [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+            if name.lower().endswith(extensions)]
+
+
+def find_hidden_message(folder: str, password: str, workers: int = None,
+                        use_processes: bool = True) -> Optional[dict]:
+    """
+    Busca en paralelo la imagen de una carpeta que contiene un mensaje
+
+    Reparte las imágenes entre workers (procesos o hilos). Cada worker valida
+    el header de longitud antes de cualquier trabajo AES/PBKDF2, reutiliza la
+    permutación de posiciones por (seed, tamaño) y la clave derivada por salt.
+    En cuanto una imagen se autentica se cancela el resto del trabajo.
+
+    Args:
+        folder: Carpeta con imágenes candidatas
+        password: Contraseña del mensaje
+        workers: Número de workers (por defecto os.cpu_count())
+        use_processes: True para ProcessPoolExecutor, False para hilos
+
+    Returns:
+        {'image', 'message', 'scanned', 'total', 'elapsed'} o None si no se encuentra
+    """
+    start_time = time.time()
+    paths = list_candidate_images(folder)
+    workers = workers or os.cpu_count() or 1
+
+    if use_processes:
+        stop_event = multiprocessing.get_context().Event()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_worker_init,
+                                       initargs=(password, stop_event))
+        task = _worker_try
+    else:
+        stop_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        task = functools.partial(_try_image, _SearchWorker(password), stop_event)
+
+    result = None
+    scanned = 0
+    try:
+        future_to_path = {executor.submit(task, path): path for path in paths}
+        pending = set(future_to_path)
+        while pending and result is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                scanned += 1
+                message = future.result()
+                if message is not None and result is None:
+                    result = {'image': future_to_path[future], 'message': message}
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    if result is None:
+        return None
+
+    result.update({'scanned': scanned, 'total': len(paths), 'elapsed': time.time() - start_time})
+    return result
+
+
+def main():
+    """Uso: python search.py <carpeta> <contraseña> [workers]"""
+    import sys
+
+    if len(sys.argv) < 3:
+        print(main.__doc__)
+        return
+
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    result = find_hidden_message(sys.argv[1], sys.argv[2], workers=workers)
+    if result is None:
+        print("[✗] No se encontró ningún mensaje")
+    else:
+        print(f"[✓] Mensaje encontrado en {result['image']} "
+              f"({result['scanned']}/{result['total']} imágenes, {result['elapsed']:.2f}s)")
+        print(result['message'].decode('utf-8', errors='replace'))
+
+
+if __name__ == '__main__':
+    main()
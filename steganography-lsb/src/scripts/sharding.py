@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Fragmentación - Sistema de Esteganografía
+Reparte un mensaje mayor que la capacidad de una imagen entre varias
+portadas ordenadas. El mensaje se cifra una sola vez con AES-GCM y el
+resultado se trocea en fragmentos de formato 4; cada fragmento lleva el id
+del conjunto, su índice, el total y un eslabón de una cadena SHA-256 que
+permite señalar el fragmento dañado o ajeno antes de descifrar. Ocultar y
+extraer se reparten entre procesos (una imagen por tarea).
+"""
+
+import hashlib
+import os
+import struct
+import time
+from typing import List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+from png_output import PNGOutputPolicy
+from stego_system import CryptoEngine, EmbeddingMode, LSBSteganography, SteganographyConfig
+
+
+def shard_capacity(width: int, height: int, mode: EmbeddingMode) -> int:
+    """Bytes de mensaje cifrado que caben en un fragmento de una imagen width x height"""
+    capacity_bits = LSBSteganography._mode_capacity(width, height, mode) - SteganographyConfig.MODE_HEADER_BITS
+    overhead = (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE +
+                SteganographyConfig.SHARD_HEADER_SIZE)
+    return max(0, capacity_bits // 8 - overhead)
+
+
+def split_sizes(total: int, capacities: Sequence[int]) -> List[int]:
+    """
+    Reparte total bytes en proporción a la capacidad de cada portada
+
+    Así todas las imágenes quedan con un porcentaje de uso parecido (y el
+    trabajo de cada proceso, equilibrado).
+
+    Raises:
+        ValueError: Si total supera la capacidad conjunta
+    """
+    available = sum(capacities)
+    if total > available:
+        raise ValueError(f"Mensaje demasiado grande. Necesario: {total} bytes, "
+                         f"Disponible: {available} bytes en {len(capacities)} imágenes")
+    if available == 0:
+        return [0] * len(capacities)
+    sizes = [total * c // available for c in capacities]
+    # El redondeo hacia abajo deja menos de un byte por portada sin asignar
+    remainder = total - sum(sizes)
+    for i, c in enumerate(capacities):
+        if remainder == 0:
+            break
+        if sizes[i] < c:
+            sizes[i] += 1
+            remainder -= 1
+    return sizes
+
+
+def _chain_link(previous: bytes, set_id: bytes, index: int, count: int, chunk: bytes) -> bytes:
+    """Eslabón i = SHA-256(eslabón i−1 || id || índice || total || trozo)"""
+    return hashlib.sha256(previous + set_id + struct.pack('>HH', index, count) + chunk).digest()
+
+
+def build_shards(sealed: bytes, sizes: Sequence[int], set_id: bytes) -> List[bytes]:
+    """
+    Trocea el mensaje cifrado en fragmentos de formato 4
+
+    Returns:
+        Fragmentos [id(16)] [índice(2)] [total(2)] [eslabón(32)] [trozo]
+    """
+    count = len(sizes)
+    shards = []
+    link = bytes(SteganographyConfig.SHARD_CHAIN_SIZE)
+    offset = 0
+    for index, size in enumerate(sizes):
+        chunk = sealed[offset:offset + size]
+        offset += size
+        link = _chain_link(link, set_id, index, count, chunk)
+        shards.append(set_id + struct.pack('>HH', index, count) + link + chunk)
+    return shards
+
+
+def parse_shard(shard: bytes) -> Tuple[bytes, int, int, bytes, bytes]:
+    """
+    Separa un fragmento en (set_id, índice, total, eslabón, trozo)
+
+    Raises:
+        ValueError: Si el fragmento es más corto que su cabecera o el índice
+            no es coherente con el total
+    """
+    if len(shard) < SteganographyConfig.SHARD_HEADER_SIZE:
+        raise ValueError(f"Fragmento corrupto: {len(shard)} bytes")
+    id_size = SteganographyConfig.SHARD_SET_ID_SIZE
+    set_id = shard[:id_size]
+    index, count = struct.unpack('>HH', shard[id_size:id_size + 4])
+    link = shard[id_size + 4:SteganographyConfig.SHARD_HEADER_SIZE]
+    if index >= count:
+        raise ValueError(f"Fragmento corrupto: índice {index} de {count}")
+    return set_id, index, count, link, shard[SteganographyConfig.SHARD_HEADER_SIZE:]
+
+
+def join_shards(shards: Sequence[bytes]) -> Tuple[bytes, bytes, int]:
+    """
+    Ordena los fragmentos, comprueba el conjunto y la cadena y los une
+
+    Los fragmentos pueden llegar en cualquier orden.
+
+    Returns:
+        (mensaje cifrado, set_id, total)
+
+    Raises:
+        ValueError: Si faltan o sobran fragmentos, mezclan conjuntos o un
+            eslabón no coincide (se indica el primer fragmento afectado)
+    """
+    parsed = sorted((parse_shard(shard) for shard in shards), key=lambda p: p[1])
+    if not parsed:
+        raise ValueError("No hay fragmentos")
+    set_id, _, count = parsed[0][:3]
+    if any(p[0] != set_id or p[2] != count for p in parsed):
+        raise ValueError("Los fragmentos pertenecen a conjuntos distintos")
+    indices = [p[1] for p in parsed]
+    if indices != list(range(count)):
+        missing = sorted(set(range(count)) - set(indices))
+        raise ValueError(f"Conjunto incompleto: {len(set(indices))} de {count} fragmentos"
+                         f"{f', faltan {missing}' if missing else ', hay repetidos'}")
+
+    link = bytes(SteganographyConfig.SHARD_CHAIN_SIZE)
+    for _, index, _, stored_link, chunk in parsed:
+        link = _chain_link(link, set_id, index, count, chunk)
+        if link != stored_link:
+            raise ValueError(f"Fragmento {index} corrupto o fuera de la cadena")
+    return b''.join(p[4] for p in parsed), set_id, count
+
+
+def _shard_aad(set_id: bytes, count: int) -> bytes:
+    """Datos asociados del cifrado único: id del conjunto y número de fragmentos"""
+    return set_id + struct.pack('>H', count)
+
+
+def _cover_info(image_path: str) -> Tuple[int, int, bool]:
+    """(ancho, alto, tiene alfa) leyendo solo la cabecera del fichero"""
+    with Image.open(image_path) as img:
+        return img.size[0], img.size[1], LSBSteganography._has_alpha(img)
+
+
+def plan_shards(covers: Sequence[str], message_length: int,
+                mode: Union[None, str, EmbeddingMode] = None) -> dict:
+    """
+    Elige el modo común y el tamaño del trozo de cada portada
+
+    Con mode='auto' se prueban los modos en el orden de plan_mode (k
+    creciente y, con k fijo, RGB antes que RGBA) y se elige el primero en
+    el que cabe el mensaje; el canal alfa solo se considera si todas las
+    portadas lo tienen.
+
+    Returns:
+        {'mode', 'sizes', 'capacities', 'sealed_bytes'}
+
+    Raises:
+        ValueError: Si el mensaje no cabe en el conjunto
+    """
+    info = [_cover_info(path) for path in covers]
+    sealed_bytes = SteganographyConfig.NONCE_SIZE + message_length + SteganographyConfig.TAG_SIZE
+
+    if isinstance(mode, str):
+        if mode != 'auto':
+            raise ValueError(f"Modo desconocido: {mode}")
+        all_alpha = all(has_alpha for _, _, has_alpha in info)
+        candidates = [EmbeddingMode(k, use_alpha)
+                      for k in range(1, SteganographyConfig.MAX_BITS_PER_CHANNEL + 1)
+                      for use_alpha in ((False, True) if all_alpha else (False,))]
+    else:
+        mode = EmbeddingMode(*(mode or ())).validate()
+        if mode.use_alpha and not all(has_alpha for _, _, has_alpha in info):
+            raise ValueError("El modo usa el canal alfa y alguna portada no lo tiene")
+        candidates = [mode]
+
+    for candidate in candidates:
+        capacities = [shard_capacity(width, height, candidate) for width, height, _ in info]
+        if sum(capacities) >= sealed_bytes or candidate is candidates[-1]:
+            return {
+                'mode': candidate,
+                'sizes': split_sizes(sealed_bytes, capacities),
+                'capacities': capacities,
+                'sealed_bytes': sealed_bytes,
+            }
+
+
+def encode_sharded(stego: LSBSteganography, covers: Sequence[str], message: bytes,
+                   output_paths: Sequence[str], mode: Union[None, str, EmbeddingMode] = None,
+                   png_policy: Union[None, str, PNGOutputPolicy] = None, workers: int = None) -> dict:
+    """
+    Oculta un mensaje repartido entre varias portadas
+
+    El mensaje se cifra una vez con la clave de stego.crypto (AES-GCM con
+    el id del conjunto y el número de fragmentos como datos asociados) y
+    cada trozo se escribe en su portada en formato 4, en paralelo.
+    Todas las imágenes comparten el salt, así que extraer el conjunto solo
+    deriva la clave una vez.
+
+    Args:
+        stego: Instancia con la clave del conjunto
+        covers: Portadas, en orden (el fragmento i va en covers[i])
+        message: Mensaje a ocultar
+        output_paths: Rutas de salida, una por portada
+        mode: Modo común (como en encode; 'auto' ver plan_shards)
+        png_policy: Política de salida PNG de todas las imágenes
+        workers: Número de procesos (por defecto os.cpu_count())
+
+    Returns:
+        Estadísticas del conjunto; 'shards' tiene las de encode de cada
+        imagen en orden de índice
+
+    Raises:
+        ValueError: Si el mensaje no cabe en el conjunto de portadas
+    """
+    if not covers or len(covers) != len(output_paths):
+        raise ValueError("Se necesita una ruta de salida por portada")
+    if len(covers) > 0xFFFF:
+        raise ValueError(f"Demasiadas portadas: {len(covers)} (máximo 65535)")
+    start_time = time.perf_counter()
+
+    plan = plan_shards(covers, len(message), mode)
+    set_id = os.urandom(SteganographyConfig.SHARD_SET_ID_SIZE)
+    nonce, ciphertext, tag = stego.crypto.encrypt(message, _shard_aad(set_id, len(covers)))
+    shards = build_shards(nonce + ciphertext + tag, plan['sizes'], set_id)
+
+    jobs = zip(covers, shards, output_paths)
+    stats = sorted(stego._encode_shard_batch(jobs, workers, png_policy, plan['mode']),
+                   key=lambda s: s['job_index'])
+    elapsed = time.perf_counter() - start_time
+
+    return {
+        'message_bytes': len(message),
+        'sealed_bytes': plan['sealed_bytes'],
+        'shard_count': len(shards),
+        'set_id': set_id.hex(),
+        'bits_per_channel': plan['mode'].bits_per_channel,
+        'use_alpha': plan['mode'].use_alpha,
+        'max_usage_percent': max(s['usage_percent'] for s in stats),
+        'elapsed': elapsed,
+        'throughput_mb_s': len(message) / elapsed / 1e6,
+        'shards': stats,
+    }
+
+
+def decode_sharded(image_paths: Sequence[str], password: str, workers: int = None,
+                   stego: Optional[LSBSteganography] = None) -> bytes:
+    """
+    Reconstruye un mensaje repartido con encode_sharded
+
+    Lee el salt de la primera imagen, deriva la clave una vez y extrae los
+    fragmentos en paralelo. Las imágenes pueden darse en
+    cualquier orden; la cadena de eslabones se comprueba antes del único
+    descifrado autenticado.
+
+    Args:
+        image_paths: Todas las imágenes del conjunto
+        password: Contraseña del conjunto
+        workers: Número de procesos (por defecto os.cpu_count())
+        stego: Instancia a reutilizar (por su caché de claves)
+
+    Returns:
+        Mensaje descifrado
+
+    Raises:
+        ValueError: Si alguna imagen no es un fragmento del conjunto, el
+            conjunto está incompleto o el descifrado falla
+    """
+    if not image_paths:
+        raise ValueError("No hay imágenes")
+    probe = stego or LSBSteganography(CryptoEngine.from_key(b'', b'', 0))
+    header = probe.peek_header(image_paths[0])
+    if header['format_version'] != SteganographyConfig.FORMAT_VERSION_SHARD:
+        raise ValueError(f"{image_paths[0]} no es un fragmento (formato {header['format_version']})")
+
+    crypto = CryptoEngine(password, header['salt'], key_cache=probe.key_cache)
+    stego = LSBSteganography(crypto, probe.key_cache)
+    shards = [result['message'] for result in stego._decode_shard_batch(image_paths, workers)]
+
+    try:
+        sealed, set_id, count = join_shards(shards)
+    except ValueError as e:
+        # Con otra contraseña las posiciones no coinciden y los fragmentos salen como ruido
+        raise ValueError(f"Contraseña incorrecta o conjunto corrupto: {e}") from None
+    nonce = sealed[:SteganographyConfig.NONCE_SIZE]
+    ciphertext = sealed[SteganographyConfig.NONCE_SIZE:-SteganographyConfig.TAG_SIZE]
+    tag = sealed[-SteganographyConfig.TAG_SIZE:]
+    try:
+        return crypto.decrypt(nonce, ciphertext, tag, _shard_aad(set_id, count))
+    except Exception as e:
+        raise ValueError(f"Descifrado fallido. Contraseña incorrecta o conjunto corrupto: {e}")
+
+
+def main():
+    """Uso: python sharding.py oculta <contraseña> <mensaje> <salida_dir> <portada>... |
+       python sharding.py extrae <contraseña> <imagen>..."""
+    import sys
+
+    if len(sys.argv) < 4 or sys.argv[1] not in ('oculta', 'extrae'):
+        print(main.__doc__)
+        return
+
+    password = sys.argv[2]
+    if sys.argv[1] == 'oculta':
+        with open(sys.argv[3], 'rb') as f:
+            message = f.read()
+        covers = sys.argv[5:]
+        outputs = [os.path.join(sys.argv[4], f"fragmento_{i:03d}.png") for i in range(len(covers))]
+        stats = encode_sharded(LSBSteganography(CryptoEngine(password)), covers, message, outputs, mode='auto')
+        print(f"[✓] {stats['message_bytes']} bytes en {stats['shard_count']} imágenes "
+              f"(k={stats['bits_per_channel']}, uso máximo {stats['max_usage_percent']:.1f}%, "
+              f"{stats['throughput_mb_s']:.2f} MB/s)")
+    else:
+        message = decode_sharded(sys.argv[3:], password)
+        sys.stdout.buffer.write(message)
+
+
+if __name__ == '__main__':
+    main()
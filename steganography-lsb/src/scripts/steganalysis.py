@@ -0,0 +1,544 @@
+#!/usr/bin/env python3
+"""
+Estegoanálisis - Sistema de Esteganografía
+Análisis RS (Fridrich) por franjas de filas con memoria acotada, aplicable
+a una imagen o a una carpeta completa en paralelo, y pipeline que ejecuta
+varios detectores sobre una única decodificación por imagen
+"""
+
+import csv
+import math
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from png_input import iter_png_strips, png_strip_reader_supported
+
+
+CHANNELS = ('Red', 'Green', 'Blue')
+
+# Memoria de trabajo por franja (bytes); la imagen decodificada va aparte
+DEFAULT_TILE_BYTES = 16 << 20
+
+# Bytes de trabajo por píxel de una franja: RGB uint8 + temporales int16
+# de un canal (bloques, diferencias, signos y rugosidades)
+_WORK_BYTES_PER_PIXEL = 16
+
+
+def _row_tiles(image: Union[str, Image.Image, np.ndarray], width: int, rows_per_tile: int) -> Iterator[np.ndarray]:
+    """
+    Recorre la imagen en franjas de filas RGB uint8 de ancho `width`
+
+    Con una ruta de PNG se decodifica solo la franja actual (iter_png_strips);
+    con una imagen PIL solo se copia a NumPy (y a RGB) la franja actual;
+    con un array se devuelven vistas sin copia.
+    """
+    if isinstance(image, str):
+        for strip in iter_png_strips(image, rows_per_tile):
+            yield np.asarray(strip.convert('RGB'))[:, :width]
+        return
+    if isinstance(image, np.ndarray):
+        for top in range(0, image.shape[0], rows_per_tile):
+            yield image[top:top + rows_per_tile, :width, :3]
+        return
+
+    height = image.size[1]
+    for top in range(0, height, rows_per_tile):
+        box = (0, top, width, min(top + rows_per_tile, height))
+        yield np.asarray(image.crop(box).convert('RGB'))
+
+
+def _rs_counts(channel: np.ndarray) -> np.ndarray:
+    """
+    Cuenta [Rm, Sm, R−m, S−m] de un canal con bloques de 4 píxeles y máscara [0, 1, 1, 0]
+
+    F1 (x ^ 1) suma s = 1 − 2·(x & 1) a cada píxel y F−1 le resta s, así
+    que la rugosidad con la máscara aplicada se obtiene de las diferencias
+    originales sin construir los bloques volteados.
+    """
+    blocks = channel.reshape(-1, 4)
+    p0, p1, p2, p3 = (blocks[:, k].astype(np.int16) for k in range(4))
+    d0, d1, d2 = p1 - p0, p2 - p1, p3 - p2
+    s1 = 1 - 2 * (p1 & 1)
+    s2 = 1 - 2 * (p2 & 1)
+    del p0, p1, p2, p3
+
+    f_orig = np.abs(d0) + np.abs(d1) + np.abs(d2)
+    f_M = np.abs(d0 + s1) + np.abs(d1 + s2 - s1) + np.abs(d2 - s2)
+    f_mM = np.abs(d0 - s1) + np.abs(d1 - s2 + s1) + np.abs(d2 + s2)
+
+    return np.array([np.count_nonzero(f_M > f_orig), np.count_nonzero(f_M < f_orig),
+                     np.count_nonzero(f_mM > f_orig), np.count_nonzero(f_mM < f_orig)], dtype=np.int64)
+
+
+def rs_analyze(image: Union[str, Image.Image, np.ndarray],
+               max_tile_bytes: int = DEFAULT_TILE_BYTES) -> Optional[dict]:
+    """
+    Análisis RS de una imagen por franjas de filas
+
+    Produce los mismos porcentajes que rs_steganalysis_detect del notebook
+    (ancho recortado a múltiplo de 4, bloques horizontales de 4 píxeles),
+    pero sin convertir la imagen completa a int16 ni copiar los bloques
+    volteados: la memoria de trabajo queda acotada por max_tile_bytes.
+
+    Con la ruta de un PNG de 8 bits no entrelazado la imagen se decodifica
+    franja a franja, así que también el pico de memoria queda acotado por
+    max_tile_bytes. Otros formatos (y una imagen PIL o un array ya
+    cargados) ocupan además la imagen decodificada completa.
+
+    Args:
+        image: Ruta, imagen PIL o array (alto, ancho, ≥3) uint8
+        max_tile_bytes: Memoria de trabajo máxima por franja
+
+    Returns:
+        {canal: {'Rm', 'Sm', 'R_m', 'S_m', 'Diff', 'blocks'}} con Rm..S_m y
+        Diff en porcentaje de bloques, o None si la imagen no se puede abrir
+    """
+    if isinstance(image, str):
+        try:
+            with Image.open(image) as img:
+                width, height = img.size
+            if not png_strip_reader_supported(image):
+                # Sin lectura por franjas: se decodifica entera
+                image = Image.open(image)
+                image.load()
+        except OSError:
+            return None
+    elif isinstance(image, np.ndarray):
+        height, width = image.shape[:2]
+    else:
+        width, height = image.size
+    width -= width % 4
+    if width == 0 or height == 0:
+        return None
+
+    rows_per_tile = max(1, max_tile_bytes // (width * _WORK_BYTES_PER_PIXEL))
+    counts = np.zeros((len(CHANNELS), 4), dtype=np.int64)
+    try:
+        for tile in _row_tiles(image, width, rows_per_tile):
+            for c in range(len(CHANNELS)):
+                counts[c] += _rs_counts(tile[:, :, c])
+    except (OSError, ValueError):
+        return None
+
+    total_blocks = height * width // 4
+    results = {}
+    for c, color in enumerate(CHANNELS):
+        Rm, Sm, R_m, S_m = (int(v) for v in counts[c])
+        results[color] = {
+            'Rm': Rm / total_blocks * 100,
+            'Sm': Sm / total_blocks * 100,
+            'R_m': R_m / total_blocks * 100,
+            'S_m': S_m / total_blocks * 100,
+            'Diff': abs(Rm - Sm) / total_blocks * 100,
+            'blocks': total_blocks,
+        }
+    return results
+
+
+def _rs_rows(path: str, max_tile_bytes: int) -> List[dict]:
+    """Filas de la tabla (una por canal) para una imagen; vacía si no se puede leer"""
+    result = rs_analyze(path, max_tile_bytes)
+    if result is None:
+        return []
+    return [{'image': path, 'channel': color, **values} for color, values in result.items()]
+
+
+def rs_analyze_directory(folder: str, workers: int = None, max_tile_bytes: int = DEFAULT_TILE_BYTES,
+                         sort_by: str = 'Diff', descending: bool = True,
+                         extensions: tuple = ('.png',)) -> List[dict]:
+    """
+    Análisis RS de todas las imágenes de una carpeta en paralelo
+
+    Args:
+        folder: Carpeta con las imágenes
+        workers: Procesos (por defecto os.cpu_count(); 1 = sin pool)
+        max_tile_bytes: Memoria de trabajo por franja en cada proceso
+        sort_by: Columna por la que ordenar ('Diff', 'Rm', 'Sm', 'R_m', 'S_m', 'image')
+        descending: Orden descendente (más sospechosas primero con 'Diff')
+        extensions: Extensiones de archivo consideradas
+
+    Returns:
+        Lista de filas {'image', 'channel', 'Rm', 'Sm', 'R_m', 'S_m', 'Diff', 'blocks'}
+    """
+    from search import list_candidate_images
+
+    paths = list_candidate_images(folder, extensions)
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(paths) <= 1:
+        per_image = [_rs_rows(path, max_tile_bytes) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            per_image = list(executor.map(_rs_rows, paths, [max_tile_bytes] * len(paths),
+                                          chunksize=max(1, len(paths) // (workers * 4))))
+
+    table = [row for rows in per_image for row in rows]
+    table.sort(key=lambda row: row[sort_by], reverse=descending)
+    return table
+
+
+def _detect_histogram(pixels: np.ndarray) -> dict:
+    """
+    Desequilibrio de pares del histograma por canal: Σ|h(2k) − h(2k+1)| / Σh
+
+    El LSB con tasa alta iguala las parejas de valores (2k, 2k+1), así que
+    valores cercanos a 0 son sospechosos.
+    """
+    result = {}
+    for c, color in enumerate(CHANNELS):
+        hist = np.bincount(pixels[:, :, c].ravel(), minlength=256)
+        result[f'hist_{color}_pair_imbalance'] = float(np.abs(hist[0::2] - hist[1::2]).sum() / hist.sum())
+    return result
+
+
+def _detect_chi_square(pixels: np.ndarray) -> dict:
+    """Estadístico del notebook: (Σ((x & 1) − 0.5))², calculado por conteo"""
+    ones = np.count_nonzero(pixels & 1)
+    return {'chi_square': float((ones - pixels.size / 2) ** 2)}
+
+
+def _detect_rs(pixels: np.ndarray) -> dict:
+    """Análisis RS por franjas sobre el buffer compartido"""
+    result = rs_analyze(pixels)
+    if result is None:
+        return {}
+    return {f'rs_{color}_{key}': values[key] for color, values in result.items()
+            for key in ('Rm', 'Sm', 'R_m', 'S_m', 'Diff')}
+
+
+def _chi2_sf(x: float, df: int) -> float:
+    """
+    P(χ²_df ≥ x): función gamma incompleta regularizada superior Q(df/2, x/2)
+
+    Serie para x < a + 1 y fracción continua (Lentz) en otro caso.
+    """
+    if df < 1 or math.isnan(x):
+        return math.nan
+    a, x = df / 2, x / 2
+    if x <= 0:
+        return 1.0
+    log_prefactor = -x + a * math.log(x) - math.lgamma(a)
+
+    if x < a + 1:
+        term = total = 1 / a
+        n = a
+        for _ in range(10_000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1 - total * math.exp(log_prefactor))
+
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    result = d
+    for i in range(1, 10_000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = d if abs(d) > tiny else tiny
+        c = b + an / c
+        c = c if abs(c) > tiny else tiny
+        d = 1 / d
+        delta = d * c
+        result *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefactor) * result
+
+
+def keyed_order(image_path: str, password: str, verify: bool = False) -> np.ndarray:
+    """
+    Orden de recorrido con clave de LSBSteganography para una imagen
+
+    Lee versión y salt del header y devuelve todas las posiciones
+    (índices de pixels.reshape(-1)) en el orden en que encode las usaría.
+    En los formatos 2 y 3 son las 168 posiciones de arranque seguidas de las
+    muestras del modo (cada una con bits_per_channel bits).
+
+    El header se valida como en peek_header (versión conocida, modo válido
+    y longitud dentro de la capacidad). La contraseña solo se comprueba con
+    verify=True, que descifra el mensaje completo (formatos 0-3); sin ello,
+    una contraseña incorrecta da un orden igual de válido pero sin relación
+    con el payload.
+
+    Args:
+        image_path: Ruta de la imagen
+        password: Contraseña con la que se habría codificado
+        verify: Descifrar el mensaje para confirmar que hay inserción con
+            esta contraseña
+
+    Raises:
+        ValueError: Si el header no corresponde a una inserción de
+            LSBSteganography, si verify y la contraseña no descifra el
+            mensaje, o si el modo usa el canal alfa (sus posiciones no son
+            índices de la imagen RGB)
+    """
+    from stego_system import CryptoEngine, LSBSteganography, SteganographyConfig
+
+    stego = LSBSteganography(CryptoEngine.from_key(b'', b'', 0))
+    header = stego.peek_header(image_path)
+    if not header['plausible']:
+        raise ValueError(f"No hay inserción en la imagen: header implausible (formato {header['format_version']}, "
+                         f"requiere {header['bits_needed']} bits, capacidad {header['capacity_bits']})")
+
+    crypto = CryptoEngine(password, header['salt'])
+    if verify and header['format_version'] != SteganographyConfig.FORMAT_VERSION_SHARD:
+        try:
+            LSBSteganography(crypto).decode(image_path, None)
+        except ValueError:
+            raise ValueError("No hay inserción con esta contraseña: el mensaje no se descifra") from None
+
+    capacity = header['capacity_bits']
+    mode = header['mode']
+    if header['format_version'] not in SteganographyConfig.MODE_FORMAT_VERSIONS:
+        return stego._select_positions(capacity, capacity, crypto.prng_seed, header['format_version'])
+
+    if mode.use_alpha:
+        raise ValueError("keyed_order no admite modos con canal alfa")
+    with Image.open(image_path) as img:
+        width, height = img.size
+    bootstrap = SteganographyConfig.BOOTSTRAP_PIXELS * SteganographyConfig.CHANNELS_USED
+    fields = stego._select_mode_positions(width, height, mode, width * height * mode.channels - bootstrap,
+                                          crypto)
+    return np.concatenate((np.arange(bootstrap, dtype=np.int64), fields))
+
+
+def chi_square_attack(image: Union[str, np.ndarray], order: Optional[np.ndarray] = None,
+                      windows: int = 100, mode: str = 'prefix', min_expected: float = 5.0,
+                      threshold: float = 0.5) -> dict:
+    """
+    Ataque chi-cuadrado de pares de valores (Westfeld–Pfitzmann)
+
+    El LSB iguala las frecuencias de cada pareja (2k, 2k+1); con
+    o_k = h(2k) y e_k = (h(2k) + h(2k+1)) / 2 el estadístico
+    Σ (o_k − e_k)² / e_k es pequeño y su p-valor cercano a 1 donde hay
+    payload. Los valores se recorren en orden de lectura (o en `order`) y
+    se cortan en `windows` segmentos; un np.bincount por segmento da todos
+    los histogramas en O(píxeles) y la suma acumulada los de cada prefijo.
+
+    Args:
+        image: Ruta o array RGB uint8
+        order: Índices de pixels.reshape(-1) a recorrer (p. ej. keyed_order)
+        windows: Número de puntos de la curva
+        mode: 'prefix' (prefijos crecientes) o 'window' (segmentos sueltos)
+        min_expected: e_k mínimo para que una pareja cuente como categoría
+        threshold: p-valor a partir del cual se considera que hay payload
+
+    Returns:
+        Diccionario con fraction (fin de cada punto sobre el total), chi2,
+        df, p_value (arrays) y estimated_rate: fracción inicial del recorrido
+        con p-valor ≥ threshold en modo prefijo (en modo ventana, fracción de
+        ventanas sobre el umbral)
+    """
+    if mode not in ('prefix', 'window'):
+        raise ValueError(f"Modo desconocido: {mode}")
+    if isinstance(image, str):
+        with Image.open(image) as img:
+            image = np.asarray(img.convert('RGB'))
+
+    flat = image.reshape(-1)
+    total = len(order) if order is not None else flat.size
+    windows = max(1, min(windows, total))
+    bounds = np.linspace(0, total, windows + 1).astype(np.int64)
+
+    hist = np.empty((windows, 256), dtype=np.int64)
+    for w in range(windows):
+        start, end = bounds[w], bounds[w + 1]
+        values = flat[order[start:end]] if order is not None else flat[start:end]
+        hist[w] = np.bincount(values, minlength=256)
+    if mode == 'prefix':
+        hist = np.cumsum(hist, axis=0)
+
+    observed = hist[:, 0::2].astype(np.float64)
+    expected = (hist[:, 0::2] + hist[:, 1::2]) / 2
+    valid = expected >= min_expected
+    safe_expected = np.where(valid, expected, 1.0)
+    chi2 = np.where(valid, (observed - expected) ** 2 / safe_expected, 0.0).sum(axis=1)
+    df = valid.sum(axis=1) - 1
+    p_value = np.array([_chi2_sf(x, k) for x, k in zip(chi2, df)])
+
+    above = p_value >= threshold
+    if mode == 'prefix':
+        run = windows if above.all() else int(np.argmin(above))
+        estimated_rate = float(bounds[run] / total)
+    else:
+        estimated_rate = float(above.mean())
+
+    return {
+        'fraction': bounds[1:] / total,
+        'chi2': chi2,
+        'df': df,
+        'p_value': p_value,
+        'estimated_rate': estimated_rate,
+    }
+
+
+def _detect_chi_square_pairs(pixels: np.ndarray) -> dict:
+    """Ataque de pares de valores en orden de lectura: p-valor global y tasa estimada"""
+    result = chi_square_attack(pixels)
+    return {'chi_pairs_p_value': float(result['p_value'][-1]),
+            'chi_pairs_estimated_rate': result['estimated_rate']}
+
+
+# Detectores del pipeline: nombre → (función sobre pixels RGB uint8, columnas)
+DETECTORS = {
+    'histogram': (_detect_histogram, [f'hist_{c}_pair_imbalance' for c in CHANNELS]),
+    'chi_square': (_detect_chi_square, ['chi_square']),
+    'chi_square_pairs': (_detect_chi_square_pairs, ['chi_pairs_p_value', 'chi_pairs_estimated_rate']),
+    'rs': (_detect_rs, [f'rs_{c}_{k}' for c in CHANNELS for k in ('Rm', 'Sm', 'R_m', 'S_m', 'Diff')]),
+}
+
+
+def _analyze_one(index: int, path: str, detectors: Tuple[str, ...]) -> dict:
+    """Decodifica una imagen una sola vez y ejecuta los detectores sobre el mismo buffer"""
+    row = {'index': index, 'image': path}
+    start = time.perf_counter()
+    try:
+        with Image.open(path) as img:
+            pixels = np.asarray(img.convert('RGB'))
+    except OSError as e:
+        row['error'] = str(e)
+        return row
+    row['width'], row['height'] = pixels.shape[1], pixels.shape[0]
+    row['decode_s'] = time.perf_counter() - start
+
+    for name in detectors:
+        start = time.perf_counter()
+        row.update(DETECTORS[name][0](pixels))
+        row[f'{name}_s'] = time.perf_counter() - start
+    return row
+
+
+def analyze_fields(detectors: Iterable[str] = tuple(DETECTORS)) -> List[str]:
+    """Columnas de las filas de analyze() para los detectores dados (cabecera CSV)"""
+    fields = ['index', 'image', 'width', 'height', 'decode_s']
+    for name in detectors:
+        fields.append(f'{name}_s')
+        fields.extend(DETECTORS[name][1])
+    return fields + ['error']
+
+
+def analyze(paths: Iterable[str], detectors: Iterable[str] = tuple(DETECTORS),
+            workers: int = None) -> Iterator[dict]:
+    """
+    Pipeline de estegoanálisis: una decodificación por imagen para todos los detectores
+
+    Las imágenes se reparten entre procesos con un número acotado en vuelo,
+    de modo que la memoria no crece con el número de rutas. Las filas se
+    devuelven a medida que terminan, no en orden de entrada ('index').
+
+    Args:
+        paths: Iterable de rutas (puede ser perezoso)
+        detectors: Subconjunto de DETECTORS ('histogram', 'chi_square', 'chi_square_pairs', 'rs')
+        workers: Procesos (por defecto os.cpu_count(); 1 = en este proceso)
+
+    Yields:
+        Fila por imagen: index, image, width, height, decode_s, '<detector>_s'
+        y las columnas de cada detector, o 'error' si no se pudo decodificar
+    """
+    detectors = tuple(detectors)
+    unknown = [name for name in detectors if name not in DETECTORS]
+    if unknown:
+        raise ValueError(f"Detectores desconocidos: {', '.join(unknown)}")
+
+    workers = workers or os.cpu_count() or 1
+    jobs = enumerate(paths)
+    if workers == 1:
+        for index, path in jobs:
+            yield _analyze_one(index, path, detectors)
+        return
+
+    max_pending = workers * 2  # Limita las imágenes decodificadas en vuelo
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        exhausted = False
+        try:
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        index, path = next(jobs)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.add(executor.submit(_analyze_one, index, path, detectors))
+
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def analyze_to_csv(paths: Iterable[str], csv_path: str, detectors: Iterable[str] = tuple(DETECTORS),
+                   workers: int = None) -> dict:
+    """
+    Ejecuta analyze() escribiendo cada fila en un CSV según llega
+
+    Returns:
+        Resumen: images, errors, elapsed y tiempo total por etapa
+        (decode_s y '<detector>_s') sumado sobre todas las imágenes
+    """
+    detectors = tuple(detectors)
+    totals = {'decode_s': 0.0, **{f'{name}_s': 0.0 for name in detectors}}
+    images = errors = 0
+    start = time.perf_counter()
+
+    with open(csv_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=analyze_fields(detectors))
+        writer.writeheader()
+        for row in analyze(paths, detectors, workers):
+            writer.writerow(row)
+            images += 1
+            if 'error' in row:
+                errors += 1
+                continue
+            for stage in totals:
+                totals[stage] += row[stage]
+
+    return {'images': images, 'errors': errors, 'elapsed': time.perf_counter() - start, **totals}
+
+
+def main():
+    """Uso: python steganalysis.py <carpeta> [workers] [salida.csv]"""
+    import sys
+
+    if len(sys.argv) < 2:
+        print(main.__doc__)
+        return
+
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    if len(sys.argv) > 3:
+        from search import list_candidate_images
+
+        summary = analyze_to_csv(list_candidate_images(sys.argv[1]), sys.argv[3], workers=workers)
+        print(f"{summary['images']} imágenes ({summary['errors']} errores) en {summary['elapsed']:.2f}s")
+        for stage, seconds in summary.items():
+            if stage.endswith('_s'):
+                print(f"  {stage[:-2]:<12} {seconds:>8.3f}s")
+        return
+
+    start = time.perf_counter()
+    table = rs_analyze_directory(sys.argv[1], workers=workers)
+    elapsed = time.perf_counter() - start
+
+    print(f"{'imagen':<32} {'canal':<6} {'Rm':>7} {'Sm':>7} {'R-m':>7} {'S-m':>7} {'Diff':>7}")
+    for row in table:
+        print(f"{os.path.basename(row['image'])[:32]:<32} {row['channel']:<6} {row['Rm']:>7.2f} "
+              f"{row['Sm']:>7.2f} {row['R_m']:>7.2f} {row['S_m']:>7.2f} {row['Diff']:>7.3f}")
+    print(f"\n{len(table) // len(CHANNELS)} imágenes en {elapsed:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
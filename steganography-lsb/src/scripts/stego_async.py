@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Servicio asíncrono - Sistema de Esteganografía
+Fachada asyncio de LSBSteganography para servicios web: encode, decode y
+peek_header se ejecutan en un pool de hilos o de procesos sin bloquear el
+bucle de eventos. Una cola acotada aplica contrapresión (o rechaza con
+asyncio.QueueFull), cada petición admite timeout y cancelación y el
+servicio expone profundidad de cola, peticiones en curso e histogramas de
+latencia.
+"""
+
+import asyncio
+import bisect
+import functools
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple, Union
+
+from png_output import PNGOutputPolicy
+from stego_system import (CryptoEngine, EmbeddingMode, KeyDerivationCache, LSBSteganography,
+                          PixelBufferPool, SteganographyConfig)
+
+
+# Límites superiores (segundos) de los cubos de los histogramas de latencia
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LatencyHistogram:
+    """
+    Histograma de latencias con cubos fijos (acumulables, estilo Prometheus)
+
+    Los cuantiles se estiman interpolando dentro del cubo, así que su error
+    está acotado por la anchura del cubo.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Último cubo: > buckets[-1]
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Cuantil q (0-1) estimado; None si no hay observaciones"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max
+
+    def as_dict(self) -> dict:
+        """Resumen: recuento, media, máximo, p50/p95/p99 y cubos acumulados"""
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            running += n
+            cumulative[f"le_{bound:g}"] = running
+        return {
+            'count': self.count,
+            'mean': self.total / self.count if self.count else None,
+            'max': self.max,
+            'p50': self.quantile(0.50),
+            'p95': self.quantile(0.95),
+            'p99': self.quantile(0.99),
+            'buckets': cumulative,
+        }
+
+
+class _Job:
+    """Petición encolada: operación, argumentos y futuro de la respuesta"""
+
+    __slots__ = ('operation', 'args', 'kwargs', 'future', 'enqueued')
+
+    def __init__(self, operation: str, args: tuple, kwargs: dict, future: asyncio.Future):
+        self.operation = operation
+        self.args = args
+        self.kwargs = kwargs
+        self.future = future
+        self.enqueued = time.perf_counter()
+
+
+# Estado por proceso del pool de procesos (se inicializa una vez por worker)
+_service_stego: Optional[LSBSteganography] = None
+
+
+def _service_worker_init(aes_key: bytes, salt: bytes, prng_seed: int) -> None:
+    """Crea el LSBSteganography del worker con la clave ya derivada, caché de claves y pool de buffers"""
+    global _service_stego
+    _service_stego = LSBSteganography(CryptoEngine.from_key(aes_key, salt, prng_seed),
+                                      key_cache=KeyDerivationCache(), buffer_pool=PixelBufferPool())
+
+
+def _service_worker_call(operation: str, args: tuple, kwargs: dict):
+    """Ejecuta una operación de LSBSteganography dentro del worker"""
+    return getattr(_service_stego, operation)(*args, **kwargs)
+
+
+class AsyncStegoService:
+    """
+    Fachada asyncio de LSBSteganography con trabajo acotado fuera del bucle
+
+    Las peticiones entran en una cola de max_queue huecos y `workers`
+    despachadores las pasan al executor de una en una, así que nunca hay
+    más de `workers` operaciones en curso ni más de max_queue esperando.
+    Con la cola llena, la petición espera hueco (contrapresión) o, con
+    reject_when_full, falla en el acto con asyncio.QueueFull.
+
+    Un timeout o una cancelación retiran la petición de la cola si aún no
+    ha empezado; si ya se está ejecutando, su resultado se descarta pero
+    el hueco del executor sigue ocupado hasta que termina (el trabajo de
+    CPU no se puede interrumpir).
+
+    Uso:
+        async with AsyncStegoService(stego, workers=4) as service:
+            stats = await service.encode_async(cover, b'...', 'out.png')
+            message = await service.decode_async('out.png', 'contraseña')
+    """
+
+    OPERATIONS = ('encode', 'decode', 'peek_header')
+
+    def __init__(self, stego: LSBSteganography, workers: int = None, executor: str = 'thread',
+                 max_queue: int = 64, timeout: Optional[float] = None, reject_when_full: bool = False):
+        """
+        Args:
+            stego: Instancia con la clave usada para codificar
+            workers: Operaciones simultáneas (por defecto os.cpu_count())
+            executor: 'thread' (comparte stego, su caché y su pool de
+                buffers; PBKDF2, zlib y numpy liberan el GIL) o 'process'
+                (cada proceso recibe la clave ya derivada)
+            max_queue: Peticiones en espera como máximo
+            timeout: Timeout por defecto de cada petición en segundos
+                (cola + ejecución); None = sin límite
+            reject_when_full: Rechazar en lugar de esperar con la cola llena
+        """
+        if executor not in ('thread', 'process'):
+            raise ValueError(f"Executor desconocido: {executor}")
+        if max_queue < 1:
+            raise ValueError("max_queue debe ser >= 1")
+        self.stego = stego
+        self.workers = workers or os.cpu_count() or 1
+        self.executor_kind = executor
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.reject_when_full = reject_when_full
+
+        self._executor: Optional[Executor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers = []
+        self.in_flight = 0
+        self.counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'rejected': 0,
+                         'timeouts': 0, 'cancelled': 0, 'skipped': 0}
+        self.histograms: Dict[str, LatencyHistogram] = {
+            f"{operation}_{stage}": LatencyHistogram()
+            for operation in self.OPERATIONS for stage in ('queue', 'run', 'total')
+        }
+
+    async def __aenter__(self) -> 'AsyncStegoService':
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        """Crea executor, cola y despachadores (requiere un bucle en marcha)"""
+        if self._queue is not None:
+            return
+        if self.executor_kind == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='stego')
+        else:
+            key_state = (self.stego.crypto.aes_key, self.stego.crypto.salt, self.stego.crypto.prng_seed)
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_service_worker_init,
+                                                 initargs=key_state)
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        """Cancela las peticiones en espera y en curso y cierra el executor"""
+        if self._queue is None:
+            return
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            if not job.future.done():
+                job.future.cancel()
+        executor = self._executor
+        self._queue = None
+        self._executor = None
+        self._dispatchers = []
+        # Esperar a las operaciones en curso fuera del bucle para no bloquearlo
+        await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    def _call(self, operation: str, args: tuple, kwargs: dict):
+        """Callable que ejecuta la operación en el executor"""
+        if self.executor_kind == 'thread':
+            return functools.partial(getattr(self.stego, operation), *args, **kwargs)
+        return functools.partial(_service_worker_call, operation, args, kwargs)
+
+    async def _dispatch(self) -> None:
+        """Despachador: saca peticiones de la cola y las ejecuta de una en una"""
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.done():
+                    # Cancelada o caducada mientras esperaba: no se ejecuta
+                    self.counters['skipped'] += 1
+                    continue
+                started = time.perf_counter()
+                self.histograms[f"{job.operation}_queue"].observe(started - job.enqueued)
+                self.in_flight += 1
+                try:
+                    result = await loop.run_in_executor(self._executor,
+                                                        self._call(job.operation, job.args, job.kwargs))
+                except asyncio.CancelledError:
+                    # close() cancela el despachador con la operación en curso: la petición
+                    # se cancela también (submit la cuenta en 'cancelled') en vez de quedar colgada
+                    if not job.future.done():
+                        job.future.cancel()
+                    raise
+                except Exception as e:
+                    self.counters['failed'] += 1
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    self.counters['completed'] += 1
+                    if not job.future.done():
+                        job.future.set_result(result)
+                finally:
+                    self.in_flight -= 1
+                    finished = time.perf_counter()
+                    self.histograms[f"{job.operation}_run"].observe(finished - started)
+                    self.histograms[f"{job.operation}_total"].observe(finished - job.enqueued)
+            finally:
+                self._queue.task_done()
+
+    async def submit(self, operation: str, *args, timeout: Optional[float] = None, **kwargs):
+        """
+        Encola una operación de LSBSteganography y espera su resultado
+
+        Args:
+            operation: 'encode', 'decode' o 'peek_header'
+            timeout: Segundos para cola + ejecución (por defecto self.timeout)
+
+        Raises:
+            asyncio.QueueFull: Con reject_when_full y la cola llena
+            asyncio.TimeoutError: Si vence el timeout
+            Las excepciones de la operación (p. ej. ValueError)
+        """
+        if operation not in self.OPERATIONS:
+            raise ValueError(f"Operación desconocida: {operation}")
+        self.start()
+        timeout = self.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        job = _Job(operation, args, kwargs, asyncio.get_running_loop().create_future())
+
+        try:
+            if self.reject_when_full:
+                self._queue.put_nowait(job)
+            else:
+                # Contrapresión: esperar hueco en la cola, dentro del mismo plazo
+                await asyncio.wait_for(self._queue.put(job), timeout)
+        except asyncio.QueueFull:
+            self.counters['rejected'] += 1
+            raise
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            raise
+        except asyncio.CancelledError:
+            self.counters['cancelled'] += 1
+            raise
+        self.counters['submitted'] += 1
+
+        remaining = None if deadline is None else max(0.0, deadline - time.perf_counter())
+        try:
+            # wait_for cancela job.future al vencer; el despachador la salta si no empezó
+            return await asyncio.wait_for(job.future, remaining)
+        except asyncio.TimeoutError:
+            self.counters['timeouts'] += 1
+            raise
+        except asyncio.CancelledError:
+            self.counters['cancelled'] += 1
+            raise
+
+    async def encode_async(self, image_path: str, message: bytes, output_path: str,
+                           format_version: int = SteganographyConfig.FORMAT_VERSION,
+                           png_policy: Union[None, str, PNGOutputPolicy] = None,
+                           mode: Union[None, str, EmbeddingMode] = None,
+                           timeout: Optional[float] = None) -> dict:
+        """LSBSteganography.encode fuera del bucle de eventos"""
+        return await self.submit('encode', image_path, message, output_path, format_version, png_policy, mode,
+                                 timeout=timeout)
+
+    async def decode_async(self, image_path: str, password: Optional[str], peek: bool = False,
+                           timeout: Optional[float] = None) -> bytes:
+        """LSBSteganography.decode fuera del bucle de eventos"""
+        return await self.submit('decode', image_path, password, peek, timeout=timeout)
+
+    async def peek_header_async(self, image_path: str, timeout: Optional[float] = None) -> dict:
+        """LSBSteganography.peek_header fuera del bucle de eventos"""
+        return await self.submit('peek_header', image_path, timeout=timeout)
+
+    def stats(self) -> dict:
+        """Profundidad de cola, peticiones en curso, contadores e histogramas de latencia"""
+        return {
+            'executor': self.executor_kind,
+            'workers': self.workers,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            **self.counters,
+            'latency': {name: h.as_dict() for name, h in self.histograms.items() if h.count},
+        }
+
+
+async def _self_test(workers: int, requests: int, executor: str) -> dict:
+    """Carga local sin servicios externos: encode + decode concurrentes sobre portadas sintéticas"""
+    import tempfile
+
+    import numpy as np
+    from PIL import Image
+
+    stego = LSBSteganography(CryptoEngine("contraseña de prueba"), key_cache=KeyDerivationCache(),
+                             buffer_pool=PixelBufferPool())
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as folder:
+        cover = os.path.join(folder, 'portada.png')
+        Image.fromarray(rng.integers(0, 256, (512, 512, 3), dtype=np.uint8)).save(cover)
+
+        async with AsyncStegoService(stego, workers=workers, executor=executor, max_queue=workers * 2) as service:
+            async def roundtrip(i: int) -> bool:
+                output = os.path.join(folder, f"salida_{i}.png")
+                message = f"mensaje {i}".encode() * 50
+                await service.encode_async(cover, message, output, png_policy='fast')
+                return await service.decode_async(output, None) == message
+
+            # Latido del bucle: si el trabajo de CPU lo bloqueara, el retardo máximo se dispararía
+            ticks = []
+
+            async def heartbeat():
+                while True:
+                    before = time.perf_counter()
+                    await asyncio.sleep(0.01)
+                    ticks.append(time.perf_counter() - before - 0.01)
+
+            beat = asyncio.create_task(heartbeat())
+            start = time.perf_counter()
+            results = await asyncio.gather(*(roundtrip(i) for i in range(requests)))
+            elapsed = time.perf_counter() - start
+            beat.cancel()
+
+            stats = service.stats()
+    stats.update({'ok': sum(results), 'requests': requests, 'elapsed': elapsed,
+                  'max_loop_lag': max(ticks, default=0.0)})
+    return stats
+
+
+def main():
+    """Uso: python stego_async.py [peticiones] [workers] [thread|process]"""
+    import sys
+
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    executor = sys.argv[3] if len(sys.argv) > 3 else 'thread'
+
+    stats = asyncio.run(_self_test(workers, requests, executor))
+    print(f"[✓] {stats['ok']}/{stats['requests']} ida y vuelta en {stats['elapsed']:.2f}s "
+          f"({executor}, {workers} workers) | retardo máximo del bucle {stats['max_loop_lag'] * 1000:.1f} ms")
+    print(f"    completadas {stats['completed']}, fallidas {stats['failed']}, rechazadas {stats['rejected']}, "
+          f"timeouts {stats['timeouts']}")
+    for name, h in stats['latency'].items():
+        print(f"    {name:<18} n={h['count']:<4} p50={h['p50'] * 1000:7.1f} ms  p95={h['p95'] * 1000:7.1f} ms  "
+              f"max={h['max'] * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
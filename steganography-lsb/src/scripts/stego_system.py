@@ -1,9 +1,18 @@
+import abc
+import io
 import os
 import hashlib
 import struct
-from typing import Tuple
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Tuple, Union
 from PIL import Image
 import numpy as np
+from png_input import iter_png_strips, png_strip_reader_supported, read_png_rows
+from png_output import PNGOutputPolicy, write_png
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
@@ -26,6 +35,412 @@ class SteganographyConfig:
     KDF_ITERATIONS = 100000   # PBKDF2 (protección contra fuerza bruta)
     KDF_SALT_SIZE = 16        # Salt de 128 bits
 
+    # Versión de formato en los 4 bits altos del header de longitud.
+    # Los payloads legacy nunca alcanzan 2^28 bytes, así que su nibble alto es 0.
+    FORMAT_VERSION_LEGACY = 0   # Permutación completa con RandomState.shuffle
+    FORMAT_VERSION_FEISTEL = 1  # Permutación Feistel perezosa (solo prefijo)
+    FORMAT_VERSION = FORMAT_VERSION_FEISTEL  # Versión por defecto al codificar
+    FORMAT_VERSION_SHIFT = 28
+    PAYLOAD_LENGTH_MASK = (1 << FORMAT_VERSION_SHIFT) - 1
+    FEISTEL_ROUNDS = 6
+
+    # Formato 2: header, salt y un byte de modo a 1 LSB en RGB (168 posiciones
+    # secuenciales = 56 píxeles); el resto del payload va en campos de 1-4
+    # LSB sobre RGB o RGBA con posiciones Feistel
+    FORMAT_VERSION_MODES = 2
+    MAX_BITS_PER_CHANNEL = 4
+    MODE_HEADER_BITS = 8
+    BOOTSTRAP_PIXELS = 56
+
+    # Formato 3: disposición del formato 2 con el payload en segmentos AEAD
+    # [prefijo de nonce(7)] [tamaño de segmento(4)] [segmento_0 || tag] ...
+    # Nonce del segmento i = prefijo || i (32 bits) || marca de último segmento
+    FORMAT_VERSION_STREAM = 3
+    STREAM_SEGMENT_SIZE = 64 * 1024
+    STREAM_NONCE_PREFIX_SIZE = 7
+
+    # Formato 4: disposición del formato 2 con un fragmento de sharding.py
+    # sin cifrar por imagen (el mensaje se cifra una vez para todo el conjunto)
+    # [id de conjunto(16)] [índice(2)] [total(2)] [cadena(32)] [trozo]
+    FORMAT_VERSION_SHARD = 4
+    SHARD_SET_ID_SIZE = 16
+    SHARD_CHAIN_SIZE = 32  # SHA-256
+    SHARD_HEADER_SIZE = SHARD_SET_ID_SIZE + 4 + SHARD_CHAIN_SIZE
+
+    # Versiones con byte de modo y posiciones de campos multi-bit
+    MODE_FORMAT_VERSIONS = (FORMAT_VERSION_MODES, FORMAT_VERSION_STREAM, FORMAT_VERSION_SHARD)
+
+    # Generación de posiciones por tramos en paralelo (hilos; numpy libera el GIL)
+    POSITION_WORKERS = 1
+    POSITION_CHUNK = 1 << 18  # Posiciones por tramo (los buffers de las rondas caben en caché)
+
+    # Decodificación de la cover por franjas directamente en el buffer de píxeles
+    DECODE_STRIP_BYTES = 1 << 20
+
+
+# Los fragmentos de formato 4 no llevan cifrado propio: solo los escribe y lee sharding.py
+SHARD_ENCODE_ERROR = "El formato 4 solo se escribe con sharding.encode_sharded"
+SHARD_DECODE_ERROR = "La imagen es un fragmento de un conjunto (formato 4): use sharding.decode_sharded"
+
+
+class EmbeddingMode(NamedTuple):
+    """
+    Modo de ocultación de los formatos 2-4 (se guarda en el byte de modo)
+
+    Atributos:
+        bits_per_channel: LSB usados por canal (1-4)
+        use_alpha: Usar también el canal alfa (solo imágenes con alfa)
+        generator: Id del generador de posiciones (ver POSITION_GENERATORS)
+    """
+    bits_per_channel: int = 1
+    use_alpha: bool = False
+    generator: int = 0
+
+    @property
+    def channels(self) -> int:
+        """Canales por píxel del espacio de posiciones"""
+        return 4 if self.use_alpha else SteganographyConfig.CHANNELS_USED
+
+    def validate(self) -> 'EmbeddingMode':
+        """Devuelve el modo si es válido"""
+        if not 1 <= self.bits_per_channel <= SteganographyConfig.MAX_BITS_PER_CHANNEL:
+            raise ValueError(f"bits_per_channel debe estar entre 1 y {SteganographyConfig.MAX_BITS_PER_CHANNEL}: "
+                             f"{self.bits_per_channel}")
+        if self.generator not in POSITION_GENERATORS:
+            raise ValueError(f"Generador de posiciones desconocido: {self.generator}")
+        return self
+
+    def to_byte(self) -> int:
+        """Byte de modo: bits 0-1 = bits_per_channel − 1, bit 2 = alfa, bits 3-5 = generador, resto a 0"""
+        return (self.bits_per_channel - 1) | (int(self.use_alpha) << 2) | (self.generator << 3)
+
+    @classmethod
+    def from_byte(cls, value: int) -> 'EmbeddingMode':
+        """
+        Raises:
+            ValueError: Si los bits reservados no son 0 o el generador no existe
+        """
+        if value >> 6:
+            raise ValueError(f"Byte de modo inválido: {value:#04x}")
+        return cls((value & 0b11) + 1, bool(value & 0b100), (value >> 3) & 0b111).validate()
+
+
+class PositionGenerator(abc.ABC):
+    """
+    Generador de posiciones con clave: permutación de [0, domain)
+
+    permute(domain, offset, count) devuelve los elementos offset ..
+    offset + count − 1 de una permutación pseudoaleatoria de [0, domain)
+    que depende solo de la clave y de domain. Es el contrato que comparten
+    todas las versiones: un mismo (id, clave, domain) debe producir el
+    mismo flujo en cualquier implementación. Los generadores con
+    jumpable = True calculan cada elemento de forma independiente (coste
+    O(count), salto a cualquier offset en O(1)) y pueden repartirse por
+    tramos entre hilos; la especificación de cada flujo está en el README
+    (sección 3.4).
+
+    Atributos:
+        generator_id: Id guardado en el byte de modo (0-7)
+        name: Nombre legible
+        jumpable: Si admite offsets sin generar el prefijo
+    """
+    generator_id = None
+    name = None
+    jumpable = True
+
+    def __init__(self, aes_key: bytes, prng_seed: int):
+        self.aes_key = aes_key
+        self.prng_seed = prng_seed
+
+    def permute(self, domain: int, offset: int, count: int, workers: Optional[int] = None) -> np.ndarray:
+        """
+        Elementos offset .. offset + count − 1 de la permutación de [0, domain)
+
+        Los generadores con salto se evalúan siempre por tramos de
+        POSITION_CHUNK sobre el array de salida, así que la memoria de
+        trabajo no depende de count.
+
+        Args:
+            workers: Hilos entre los que repartir los tramos (por defecto
+                SteganographyConfig.POSITION_WORKERS)
+
+        Returns:
+            Array int64 de count valores únicos en [0, domain)
+        """
+        if count < 0 or offset < 0 or offset + count > domain:
+            raise ValueError(f"Se piden {count} posiciones desde {offset}, dominio de {domain}")
+        workers = workers or SteganographyConfig.POSITION_WORKERS
+        chunk = SteganographyConfig.POSITION_CHUNK
+        if not self.jumpable or count <= chunk:
+            return self._permute(domain, offset, count)
+
+        out = np.empty(count, dtype=np.int64)
+
+        def fill(start: int) -> None:
+            end = min(start + chunk, count)
+            out[start:end] = self._permute(domain, offset + start, end - start)
+
+        if workers == 1:
+            for start in range(0, count, chunk):
+                fill(start)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(fill, range(0, count, chunk)))
+        return out
+
+    @abc.abstractmethod
+    def _permute(self, domain: int, offset: int, count: int) -> np.ndarray:
+        """Tramo offset .. offset + count − 1 de la permutación (sin validar argumentos)"""
+
+
+class FeistelPositionGenerator(PositionGenerator):
+    """
+    Id 0: red Feistel con cycle-walking y claves de ronda del seed de 32 bits
+
+    Es el flujo de los formatos 1-4 anteriores al id de generador. El seed
+    solo tiene 32 bits de entropía aunque la clave AES tenga 256.
+    """
+    generator_id = 0
+    name = 'feistel32'
+
+    def __init__(self, aes_key: bytes, prng_seed: int):
+        super().__init__(aes_key, prng_seed)
+        self._round_keys: Optional[np.ndarray] = None
+
+    def round_keys(self) -> np.ndarray:
+        """Clave de ronda i = SHA-256('feistel' || seed (32 bits) || i)[0:8]"""
+        keys = []
+        for i in range(SteganographyConfig.FEISTEL_ROUNDS):
+            digest = hashlib.sha256(b'feistel' + struct.pack('>IB', self.prng_seed & 0xFFFFFFFF, i)).digest()
+            keys.append(int.from_bytes(digest[:8], 'big'))
+        return np.array(keys, dtype=np.uint64)
+
+    @staticmethod
+    def feistel_permute(values: np.ndarray, half_bits: int, round_keys: np.ndarray,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Aplica una red Feistel balanceada sobre el dominio [0, 2^(2*half_bits))
+
+        La función de ronda es el finalizador de MurmurHash3 (fmix64) sobre la
+        mitad derecha mezclada con la clave de ronda. Las rondas reutilizan
+        cuatro buffers del tamaño de values en lugar de crear temporales.
+
+        Args:
+            values: Array uint64 de entradas
+            half_bits: Bits de cada mitad
+            round_keys: Claves de ronda uint64
+            out: Array uint64 de salida (puede ser values)
+
+        Returns:
+            Array uint64 permutado (out si se indica)
+        """
+        half_mask = np.uint64((1 << half_bits) - 1)
+        shift = np.uint64(half_bits)
+        fmix_shift = np.uint64(33)
+        left = np.right_shift(values, shift)
+        right = np.bitwise_and(values, half_mask)
+        f = np.empty_like(right)
+        tmp = np.empty_like(right)
+        if half_bits <= 33:
+            # right < 2^33, así que (right ^ key) >> 33 == key >> 33: el primer
+            # paso de fmix64 se pliega en la clave (mismo resultado, dos pasadas menos)
+            round_keys = round_keys ^ (round_keys >> fmix_shift)
+        for key in round_keys:
+            np.bitwise_xor(right, key, out=f)
+            if half_bits > 33:
+                f ^= np.right_shift(f, fmix_shift, out=tmp)
+            f *= np.uint64(0xFF51AFD7ED558CCD)
+            f ^= np.right_shift(f, fmix_shift, out=tmp)
+            f *= np.uint64(0xC4CEB9FE1A85EC53)
+            f ^= np.right_shift(f, fmix_shift, out=tmp)
+            f &= half_mask
+            f ^= left
+            # Nueva izquierda = derecha; nueva derecha = izquierda ^ F; el buffer libre pasa a f
+            left, right, f = right, f, left
+        out = np.left_shift(left, shift, out=out)
+        out |= right
+        return out
+
+    def _permute(self, domain: int, offset: int, count: int) -> np.ndarray:
+        half_bits = max(1, (max(domain - 1, 1).bit_length() + 1) // 2)
+        if self._round_keys is None:
+            # Una sola derivación por instancia aunque se pidan muchos tramos
+            self._round_keys = self.round_keys()
+        round_keys = self._round_keys
+        values = np.arange(offset, offset + count, dtype=np.uint64)
+        self.feistel_permute(values, half_bits, round_keys, out=values)
+
+        # Cycle-walking: re-permutar hasta caer dentro del dominio (dominio >= 1/4 del espacio);
+        # solo las posiciones fuera del dominio vuelven a pasar por la red
+        pending = np.flatnonzero(values >= domain)
+        while pending.size:
+            walked = self.feistel_permute(values[pending], half_bits, round_keys)
+            values[pending] = walked
+            pending = pending[walked >= domain]
+        return values.view(np.int64)
+
+
+class FeistelKeyPositionGenerator(FeistelPositionGenerator):
+    """
+    Id 1: la misma red Feistel con claves de ronda derivadas de la clave AES
+    completa (256 bits), de modo que el orden de posiciones no se puede
+    recorrer probando los 2^32 seeds posibles
+    """
+    generator_id = 1
+    name = 'feistel256'
+
+    def round_keys(self) -> np.ndarray:
+        """Clave de ronda i = SHA-256('posiciones' || clave AES || i)[0:8]"""
+        keys = []
+        for i in range(SteganographyConfig.FEISTEL_ROUNDS):
+            digest = hashlib.sha256(b'posiciones' + self.aes_key + bytes([i])).digest()
+            keys.append(int.from_bytes(digest[:8], 'big'))
+        return np.array(keys, dtype=np.uint64)
+
+
+class RandomStatePositionGenerator(PositionGenerator):
+    """
+    Id 2: np.random.RandomState(seed).permutation(domain), opción de
+    compatibilidad con el PRNG del formato 0
+
+    No admite saltos: la primera llamada genera la permutación completa,
+    O(domain), y la guarda para las siguientes con el mismo domain (el
+    formato 3 pide un tramo por segmento a la misma instancia).
+    """
+    generator_id = 2
+    name = 'randomstate'
+    jumpable = False
+
+    def __init__(self, aes_key: bytes, prng_seed: int):
+        super().__init__(aes_key, prng_seed)
+        self._permutation: Optional[np.ndarray] = None
+
+    def _permute(self, domain: int, offset: int, count: int) -> np.ndarray:
+        if self._permutation is None or len(self._permutation) != domain:
+            self._permutation = np.random.RandomState(self.prng_seed).permutation(domain).astype(np.int64)
+        return self._permutation[offset:offset + count].copy()
+
+
+# Generadores disponibles por id (el id va en los bits 3-5 del byte de modo)
+POSITION_GENERATORS = {cls.generator_id: cls for cls in (FeistelPositionGenerator, FeistelKeyPositionGenerator,
+                                                          RandomStatePositionGenerator)}
+
+
+def position_generator(generator_id: int, crypto: 'CryptoEngine') -> PositionGenerator:
+    """
+    Instancia el generador generator_id con la clave de crypto
+
+    Raises:
+        ValueError: Si el id no está registrado
+    """
+    if generator_id not in POSITION_GENERATORS:
+        raise ValueError(f"Generador de posiciones desconocido: {generator_id}")
+    return POSITION_GENERATORS[generator_id](crypto.aes_key, crypto.prng_seed)
+
+
+class KeyDerivationCache:
+    """
+    Caché de claves derivadas (PBKDF2) con expulsión LRU y TTL
+
+    Evita repetir las 100.000 iteraciones de PBKDF2 cuando se usa la misma
+    contraseña y salt muchas veces (p. ej. escanear miles de imágenes con una
+    sola contraseña). Es local al proceso y opcional: solo se usa si se pasa
+    explícitamente a CryptoEngine / LSBSteganography.
+
+    Las entradas se indexan por (SHA-256(password), salt) para no guardar la
+    contraseña en claro. Las claves se almacenan en bytearray y se sobrescriben
+    con ceros al expulsarse; las copias bytes entregadas a CryptoEngine son
+    inmutables y no pueden borrarse.
+
+    Atributos:
+        max_entries: Número máximo de entradas antes de expulsar por LRU
+        ttl_seconds: Vida máxima de una entrada (None = sin caducidad)
+        hits, misses, evictions, expirations: Contadores de uso
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: Optional[float] = 300.0):
+        if max_entries < 1:
+            raise ValueError("max_entries debe ser >= 1")
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()  # clave -> (bytearray aes_key, prng_seed, timestamp)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _cache_key(password: str, salt: bytes) -> bytes:
+        return hashlib.sha256(password.encode('utf-8')).digest() + bytes(salt)
+
+    @staticmethod
+    def _zeroize(buffer: bytearray) -> None:
+        for i in range(len(buffer)):
+            buffer[i] = 0
+
+    def _drop(self, key: bytes) -> None:
+        aes_key, _, _ = self._entries.pop(key)
+        self._zeroize(aes_key)
+
+    def get_or_derive(self, password: str, salt: bytes) -> Tuple[bytes, int]:
+        """
+        Devuelve (aes_key, prng_seed) desde la caché o derivándolos con PBKDF2
+
+        Args:
+            password: Contraseña maestra
+            salt: Salt para KDF
+
+        Returns:
+            (aes_key, prng_seed)
+        """
+        key = self._cache_key(password, salt)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if self.ttl_seconds is not None and now - entry[2] > self.ttl_seconds:
+                    self._drop(key)
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return bytes(entry[0]), entry[1]
+            self.misses += 1
+
+        # Derivar fuera del lock: PBKDF2 es lento y no debe bloquear otros hilos
+        aes_key, prng_seed = CryptoEngine.derive_key(password, salt)
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (bytearray(aes_key), prng_seed, now)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+        return aes_key, prng_seed
+
+    def clear(self) -> None:
+        """Vacía la caché sobrescribiendo todas las claves"""
+        with self._lock:
+            for key in list(self._entries):
+                self._drop(key)
+
+    def stats(self) -> dict:
+        """Contadores de uso de la caché"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
 
 class CryptoEngine:
     """
@@ -40,37 +455,76 @@ class CryptoEngine:
         prng_seed: Seed para generador de posiciones aleatorias
     """
 
-    def __init__(self, password: str, salt: bytes = None):
+    def __init__(self, password: str, salt: bytes = None, key_cache: KeyDerivationCache = None):
         """
         Inicializa motor criptográfico
 
         Args:
             password: Contraseña maestra
             salt: Salt para KDF (genera uno nuevo si None)
+            key_cache: Caché opcional de claves derivadas
         """
         if salt is None:
             self.salt = os.urandom(SteganographyConfig.KDF_SALT_SIZE)
         else:
             self.salt = salt
 
+        if key_cache is not None:
+            self.aes_key, self.prng_seed = key_cache.get_or_derive(password, self.salt)
+        else:
+            self.aes_key, self.prng_seed = self.derive_key(password, self.salt)
+
+    @staticmethod
+    def derive_key(password: str, salt: bytes) -> Tuple[bytes, int]:
+        """
+        Deriva la clave AES y el seed PRNG desde la contraseña
+
+        Returns:
+            (aes_key, prng_seed)
+        """
         # Derivar clave AES desde password con PBKDF2
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=SteganographyConfig.AES_KEY_SIZE,
-            salt=self.salt,
+            salt=salt,
             iterations=SteganographyConfig.KDF_ITERATIONS,
             backend=default_backend()
         )
-        self.aes_key = kdf.derive(password.encode('utf-8'))
+        aes_key = kdf.derive(password.encode('utf-8'))
 
         # Derivar seed PRNG desde clave AES (limitado a 32 bits para NumPy)
-        seed_bytes = hashlib.sha256(self.aes_key).digest()[:4]  # 4 bytes = 32 bits
-        self.prng_seed = int.from_bytes(seed_bytes, 'big') & 0xFFFFFFFF
+        seed_bytes = hashlib.sha256(aes_key).digest()[:4]  # 4 bytes = 32 bits
+        prng_seed = int.from_bytes(seed_bytes, 'big') & 0xFFFFFFFF
+
+        return aes_key, prng_seed
+
+    @classmethod
+    def from_key(cls, aes_key: bytes, salt: bytes, prng_seed: int) -> 'CryptoEngine':
+        """
+        Crea un motor a partir de una clave ya derivada (sin ejecutar PBKDF2)
+
+        Permite derivar una vez con derive_key y reutilizar la clave en
+        muchas llamadas a encode/decode.
+
+        Args:
+            aes_key: Clave AES-256 derivada
+            salt: Salt con el que se derivó la clave
+            prng_seed: Seed PRNG asociado a la clave
+        """
+        engine = cls.__new__(cls)
+        engine.salt = salt
+        engine.aes_key = bytes(aes_key)
+        engine.prng_seed = prng_seed
+        return engine
 
-    def encrypt(self, plaintext: bytes) -> Tuple[bytes, bytes, bytes]:
+    def encrypt(self, plaintext: bytes, aad: Optional[bytes] = None) -> Tuple[bytes, bytes, bytes]:
         """
         Cifra con AES-GCM
 
+        Args:
+            plaintext: Datos a cifrar
+            aad: Datos asociados autenticados (opcional)
+
         Returns:
             (nonce, ciphertext, tag)
         """
@@ -78,7 +532,7 @@ class CryptoEngine:
         nonce = os.urandom(SteganographyConfig.NONCE_SIZE)
 
         # AES-GCM devuelve ciphertext || tag
-        ciphertext_and_tag = aesgcm.encrypt(nonce, plaintext, None)
+        ciphertext_and_tag = aesgcm.encrypt(nonce, plaintext, aad)
 
         # Separar ciphertext y tag
         ciphertext = ciphertext_and_tag[:-SteganographyConfig.TAG_SIZE]
@@ -86,7 +540,7 @@ class CryptoEngine:
 
         return nonce, ciphertext, tag
 
-    def decrypt(self, nonce: bytes, ciphertext: bytes, tag: bytes) -> bytes:
+    def decrypt(self, nonce: bytes, ciphertext: bytes, tag: bytes, aad: Optional[bytes] = None) -> bytes:
         """
         Descifra y verifica con AES-GCM
 
@@ -98,9 +552,172 @@ class CryptoEngine:
         # AES-GCM espera ciphertext || tag
         ciphertext_and_tag = ciphertext + tag
 
-        plaintext = aesgcm.decrypt(nonce, ciphertext_and_tag, None)
+        plaintext = aesgcm.decrypt(nonce, ciphertext_and_tag, aad)
         return plaintext
 
+    @staticmethod
+    def _stream_nonce(nonce_prefix: bytes, index: int, last: bool) -> bytes:
+        """Nonce del segmento index: prefijo || índice (32 bits) || marca de último"""
+        return nonce_prefix + struct.pack('>IB', index, last)
+
+    def encrypt_stream(self, segments: Iterable[Tuple[bytes, bool]], nonce_prefix: bytes,
+                       aad: bytes = b'') -> Iterator[bytes]:
+        """
+        Cifra una secuencia de segmentos con AES-GCM (construcción STREAM)
+
+        Cada segmento lleva su propio nonce derivado y su tag; la marca de
+        último segmento en el nonce impide truncar o extender el flujo.
+
+        Args:
+            segments: Iterable de (plaintext, es_el_último)
+            nonce_prefix: Prefijo aleatorio de STREAM_NONCE_PREFIX_SIZE bytes
+            aad: Datos asociados autenticados en cada segmento
+
+        Yields:
+            ciphertext || tag de cada segmento
+        """
+        aesgcm = AESGCM(self.aes_key)
+        for index, (plaintext, last) in enumerate(segments):
+            yield aesgcm.encrypt(self._stream_nonce(nonce_prefix, index, last), plaintext, aad)
+
+    def decrypt_stream(self, segments: Iterable[Tuple[bytes, bool]], nonce_prefix: bytes,
+                       aad: bytes = b'') -> Iterator[bytes]:
+        """
+        Descifra y verifica segmentos de encrypt_stream uno a uno
+
+        Args:
+            segments: Iterable de (ciphertext || tag, es_el_último)
+
+        Yields:
+            Plaintext de cada segmento, ya autenticado
+
+        Raises:
+            ValueError: Al llegar al primer segmento que no se autentica
+        """
+        aesgcm = AESGCM(self.aes_key)
+        for index, (sealed, last) in enumerate(segments):
+            try:
+                yield aesgcm.decrypt(self._stream_nonce(nonce_prefix, index, last), sealed, aad)
+            except InvalidTag:
+                raise ValueError(f"Segmento {index} corrupto o contraseña incorrecta") from None
+
+
+class PixelBufferPool:
+    """
+    Buffers de píxeles reutilizables indexados por tamaño de imagen
+
+    Cada buffer es un array (H, W, 4) uint8 (RGBX o RGBA, 4 bytes por
+    píxel como la memoria interna de Pillow): el PNG se decodifica por
+    franjas dentro de él y se guarda desde él con Image.frombuffer.
+    En un servicio de larga duración evita asignar decenas de MB por llamada.
+
+    Atributos:
+        max_per_size: Buffers libres conservados por cada (width, height)
+        hits, misses: Buffers reutilizados / asignados de nuevo
+    """
+
+    def __init__(self, max_per_size: int = 2):
+        if max_per_size < 1:
+            raise ValueError("max_per_size debe ser >= 1")
+        self.max_per_size = max_per_size
+        self.hits = 0
+        self.misses = 0
+        self._free = {}  # (width, height) -> [buffers libres]
+        self._lock = threading.Lock()
+
+    def acquire(self, width: int, height: int) -> np.ndarray:
+        """Devuelve un buffer (height, width, 4) libre o uno nuevo (contenido indefinido)"""
+        with self._lock:
+            free = self._free.get((width, height))
+            if free:
+                self.hits += 1
+                return free.pop()
+            self.misses += 1
+        return np.empty((height, width, 4), dtype=np.uint8)
+
+    def release(self, buffer: np.ndarray) -> None:
+        """Devuelve un buffer al pool; se descarta si ya hay max_per_size libres"""
+        height, width = buffer.shape[:2]
+        with self._lock:
+            free = self._free.setdefault((width, height), [])
+            if len(free) < self.max_per_size and not any(b is buffer for b in free):
+                free.append(buffer)
+
+    def clear(self) -> None:
+        """Libera todos los buffers del pool"""
+        with self._lock:
+            self._free.clear()
+
+    def stats(self) -> dict:
+        """Contadores de uso del pool"""
+        with self._lock:
+            return {
+                'sizes': len(self._free),
+                'pooled_buffers': sum(len(f) for f in self._free.values()),
+                'pooled_bytes': sum(b.nbytes for f in self._free.values() for b in f),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+class _FieldStreamWriter:
+    """
+    Escritor incremental del flujo de campos de los formatos 2 y 3
+
+    Recibe el payload posterior al arranque en trozos de cualquier tamaño y
+    escribe cada uno en sus posiciones Feistel sin acumular el resto: los
+    bits que no completan un campo de bits_per_channel se arrastran al
+    siguiente trozo.
+    """
+
+    def __init__(self, stego: 'LSBSteganography', samples: np.ndarray, mode: EmbeddingMode,
+                 crypto: 'CryptoEngine'):
+        self.stego = stego
+        self.samples = samples
+        self.mode = mode
+        self.crypto = crypto
+        self.generator = position_generator(mode.generator, crypto)
+        height, width = samples.shape[:2]
+        self.max_fields = (width * height - SteganographyConfig.BOOTSTRAP_PIXELS) * mode.channels
+        self.fields_written = 0
+        self.bytes_written = 0
+        self.carry = np.zeros(0, dtype=np.uint8)
+
+    def write(self, data: bytes) -> None:
+        """
+        Escribe data a continuación de lo ya escrito
+
+        Raises:
+            ValueError: Si el flujo no cabe en las muestras del modo
+        """
+        k = self.mode.bits_per_channel
+        bits = np.concatenate((self.carry, self.stego._bytes_to_bits(data)))
+        count = len(bits) // k
+        self.bytes_written += len(data)
+        if self.fields_written + count > self.max_fields:
+            raise ValueError(
+                f"Mensaje demasiado grande. Necesario: más de {(self.fields_written + count) * k} bits "
+                f"de payload, Disponible: {self.max_fields * k} bits"
+            )
+        self._embed(bits[:count * k], count)
+        self.carry = bits[count * k:]
+
+    def close(self) -> None:
+        """Escribe el último campo incompleto (rellenado con ceros)"""
+        if len(self.carry):
+            if self.fields_written + 1 > self.max_fields:
+                raise ValueError(f"Mensaje demasiado grande. Disponible: {self.max_fields * self.mode.bits_per_channel} "
+                                 f"bits de payload")
+            self._embed(self.carry, 1)
+            self.carry = self.carry[:0]
+
+    def _embed(self, bits: np.ndarray, count: int) -> None:
+        height, width = self.samples.shape[:2]
+        positions = self.stego._select_mode_positions(width, height, self.mode, count, self.crypto,
+                                                      self.fields_written, self.generator)
+        self.stego._embed_bits(self.samples, positions, bits, self.mode.bits_per_channel)
+        self.fields_written += count
+
 
 class LSBSteganography:
     """
@@ -115,15 +732,129 @@ class LSBSteganography:
     garantizando reproducibilidad para decodificación.
     """
 
-    def __init__(self, crypto: CryptoEngine):
+    def __init__(self, crypto: CryptoEngine, key_cache: KeyDerivationCache = None,
+                 buffer_pool: PixelBufferPool = None):
+        """
+        Args:
+            crypto: Motor criptográfico usado para codificar
+            key_cache: Caché opcional de claves derivadas usada en decode
+            buffer_pool: Pool opcional de buffers de píxeles para encode/decode
+        """
         self.crypto = crypto
+        self.key_cache = key_cache
+        self.buffer_pool = buffer_pool
 
-    def _calculate_capacity(self, image: Image.Image) -> int:
-        """Calcula capacidad total en bits"""
+    def _calculate_capacity(self, image: Image.Image, mode: Optional[EmbeddingMode] = None) -> int:
+        """Calcula capacidad total en bits (formato 0/1, o formato 2 con el modo dado)"""
         width, height = image.size
+        if mode is None:
+            return self._capacity_for_size(width, height)
+        return self._mode_capacity(width, height, mode)
+
+    @staticmethod
+    def _capacity_for_size(width: int, height: int) -> int:
+        """Calcula capacidad total en bits a partir de las dimensiones"""
         total_pixels = width * height
         return total_pixels * SteganographyConfig.CHANNELS_USED * SteganographyConfig.BITS_PER_CHANNEL
 
+    @staticmethod
+    def _mode_capacity(width: int, height: int, mode: EmbeddingMode) -> int:
+        """
+        Capacidad en bits del formato 2 para un modo
+
+        Los BOOTSTRAP_PIXELS primeros píxeles llevan header, salt y modo a
+        1 bit por canal RGB; cada muestra restante de los canales del modo
+        lleva bits_per_channel bits.
+        """
+        bootstrap_bits = SteganographyConfig.BOOTSTRAP_PIXELS * SteganographyConfig.CHANNELS_USED
+        fields = max(0, width * height - SteganographyConfig.BOOTSTRAP_PIXELS) * mode.channels
+        return bootstrap_bits + fields * mode.bits_per_channel
+
+    @staticmethod
+    def _has_alpha(img: Image.Image) -> bool:
+        """True si la imagen tiene canal alfa (o transparencia de paleta)"""
+        return img.mode in ('RGBA', 'LA', 'PA') or 'transparency' in img.info
+
+    def _load_pixels(self, image_path: str, keep_alpha: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Decodifica una imagen en un buffer RGBX (H, W, 4) propio o del pool
+
+        Un PNG de 8 bits no entrelazado se decodifica por franjas de
+        DECODE_STRIP_BYTES (png_input.iter_png_strips) y cada franja se copia
+        al buffer, así que no hay una segunda imagen completa en memoria.
+        Otros formatos se decodifican enteros con Pillow y se copian una vez.
+        Solo se usa la API pública de Pillow.
+
+        Args:
+            image_path: Ruta de la imagen
+            keep_alpha: Conservar el canal alfa si la imagen lo tiene
+
+        Returns:
+            (pixels: vista (H, W, 3) del buffer, o el buffer (H, W, 4) RGBA
+            si keep_alpha y la imagen tiene alfa; buffer para _save_pixels y
+            _release_pixels)
+        """
+        with Image.open(image_path) as img:
+            width, height = img.size
+            mode = 'RGBA' if keep_alpha and self._has_alpha(img) else 'RGB'
+            strips = img.format == 'PNG' and png_strip_reader_supported(image_path)
+            buffer = (self.buffer_pool.acquire(width, height) if self.buffer_pool is not None
+                      else np.empty((height, width, 4), dtype=np.uint8))
+            # Filas completas de 4 bytes por píxel: cada copia al buffer es contigua
+            layout = 'RGBA' if mode == 'RGBA' else 'RGBX'
+            try:
+                if strips:
+                    rows_per_strip = max(1, SteganographyConfig.DECODE_STRIP_BYTES // (width * 4))
+                    top = 0
+                    for strip in iter_png_strips(image_path, rows_per_strip):
+                        rows = strip.size[1]
+                        buffer[top:top + rows] = np.asarray(strip.convert(layout))
+                        top += rows
+                else:
+                    buffer[:] = np.asarray(img.convert(mode).convert(layout))
+            except Exception:
+                self._release_pixels(buffer)
+                raise
+        return (buffer if mode == 'RGBA' else buffer[:, :, :3]), buffer
+
+    @staticmethod
+    def _image_over_buffer(buffer: np.ndarray, mode: str = 'RGB') -> Image.Image:
+        """
+        Imagen PIL de solo lectura para guardar el buffer (H, W, 4)
+
+        En RGBA es una vista del buffer (Image.frombuffer, sin copia). Pillow
+        no admite guardar RGBX como PNG, así que en RGB se hace una única
+        conversión RGBX -> RGB.
+        """
+        height, width = buffer.shape[:2]
+        if mode == 'RGBA':
+            return Image.frombuffer('RGBA', (width, height), buffer, 'raw', 'RGBA', 0, 1)
+        return Image.frombuffer('RGBX', (width, height), buffer, 'raw', 'RGBX', 0, 1).convert('RGB')
+
+    def _save_pixels(self, pixels: np.ndarray, buffer: Optional[np.ndarray], output_path: str,
+                     png_policy: Union[None, str, PNGOutputPolicy] = None) -> None:
+        """
+        Guarda pixels (RGB o RGBA) como PNG sin pérdida según la política de salida
+
+        Con la política por defecto se guarda con Pillow desde el buffer
+        (ver _image_over_buffer) si lo hay; en otro caso con el escritor paralelo.
+        """
+        policy = PNGOutputPolicy.resolve(png_policy)
+        if not policy.uses_pillow:
+            write_png(pixels, output_path, policy.compress_level, policy.filter,
+                      policy.workers, policy.chunk_bytes)
+            return
+        if buffer is not None:
+            img = self._image_over_buffer(buffer, 'RGBA' if pixels.shape[2] == 4 else 'RGB')
+        else:
+            img = Image.fromarray(pixels)
+        img.save(output_path, 'PNG', compress_level=policy.compress_level)
+
+    def _release_pixels(self, buffer: Optional[np.ndarray]) -> None:
+        """Devuelve el buffer al pool (si hay pool)"""
+        if self.buffer_pool is not None and buffer is not None:
+            self.buffer_pool.release(buffer)
+
     def _generate_position_pool(self, total_positions: int) -> np.ndarray:
         """
         Genera un pool completo de posiciones permutadas
@@ -153,25 +884,360 @@ class LSBSteganography:
         rng.shuffle(positions)
         return positions
 
-    def _position_to_pixel_channel(self, position: int, width: int) -> Tuple[int, int, int]:
+    @staticmethod
+    def _feistel_round_keys(seed: int) -> np.ndarray:
+        """Deriva las claves de ronda (64 bits) de la permutación Feistel"""
+        return FeistelPositionGenerator(b'', seed).round_keys()
+
+    @staticmethod
+    def _feistel_permute(values: np.ndarray, half_bits: int, round_keys: np.ndarray) -> np.ndarray:
+        """Red Feistel de FeistelPositionGenerator.feistel_permute"""
+        return FeistelPositionGenerator.feistel_permute(values, half_bits, round_keys)
+
+    def _generate_positions_feistel(self, total_positions: int, start: int, count: int,
+                                    seed: int, offset: int = 0) -> np.ndarray:
+        """
+        Genera solo las posiciones pedidas de una permutación de [start, total_positions)
+
+        Permutación con clave (Feistel + cycle-walking) evaluada en los índices
+        offset .. offset + count - 1. Coste O(count) en tiempo y memoria,
+        independiente de la capacidad de la imagen.
+
+        Args:
+            total_positions: Número total de posiciones disponibles
+            start: Primera posición permutable (las anteriores quedan fuera)
+            count: Número de posiciones a generar
+            seed: Seed de la permutación
+            offset: Índice de la primera posición dentro de la permutación
+
+        Returns:
+            Array int64 de count posiciones únicas en [start, total_positions)
+        """
+        generator = FeistelPositionGenerator(b'', seed)
+        positions = generator.permute(total_positions - start, offset, count)
+        positions += start
+        return positions
+
+    def _position_to_pixel_channel(self, position: int, width: int,
+                                   channels: int = SteganographyConfig.CHANNELS_USED) -> Tuple[int, int, int]:
         """
         Convierte posición global a (x, y, canal)
 
         Args:
             position: Índice global
             width: Ancho de imagen
+            channels: Canales del espacio de posiciones (EmbeddingMode.channels)
 
         Returns:
             (x, y, channel)
         """
-        pixel_idx = position // SteganographyConfig.CHANNELS_USED
-        channel = position % SteganographyConfig.CHANNELS_USED
+        pixel_idx = position // channels
+        channel = position % channels
 
         y = pixel_idx // width
         x = pixel_idx % width
 
         return x, y, channel
 
+    @staticmethod
+    def _bytes_to_bits(data: bytes) -> np.ndarray:
+        """
+        Convierte bytes a un array de bits (MSB primero)
+
+        Equivale a ''.join(format(byte, '08b') ...) pero sin pasar por str.
+
+        Returns:
+            Array uint8 de 0/1 con len(data) * 8 elementos
+        """
+        return np.unpackbits(np.frombuffer(data, dtype=np.uint8))
+
+    @staticmethod
+    def _bits_to_bytes(bits: np.ndarray) -> bytes:
+        """
+        Convierte un array de bits (MSB primero) a bytes
+
+        Returns:
+            Bytes reconstruidos con np.packbits
+        """
+        return np.packbits(bits.astype(np.uint8, copy=False)).tobytes()
+
+    @staticmethod
+    def _bits_to_fields(bits: np.ndarray, bits_per_channel: int) -> np.ndarray:
+        """Agrupa bits (MSB primero) en campos de bits_per_channel bits; el último se rellena con ceros"""
+        if bits_per_channel == 1:
+            return bits
+        padded = np.zeros(-(-len(bits) // bits_per_channel) * bits_per_channel, dtype=np.uint8)
+        padded[:len(bits)] = bits
+        weights = (1 << np.arange(bits_per_channel - 1, -1, -1)).astype(np.uint8)
+        return (padded.reshape(-1, bits_per_channel) * weights).sum(axis=1, dtype=np.uint8)
+
+    @staticmethod
+    def _fields_to_bits(fields: np.ndarray, bits_per_channel: int) -> np.ndarray:
+        """Inversa de _bits_to_fields (incluye el relleno del último campo)"""
+        if bits_per_channel == 1:
+            return fields
+        shifts = np.arange(bits_per_channel - 1, -1, -1, dtype=np.uint8)
+        return ((fields[:, None] >> shifts) & 1).reshape(-1)
+
+    @staticmethod
+    def _embed_bits(pixels: np.ndarray, positions: np.ndarray, bits: np.ndarray,
+                    bits_per_channel: int = 1) -> None:
+        """
+        Escribe bits en los LSB de las posiciones indicadas (in-place)
+
+        La posición global coincide con el índice en pixels.reshape(-1):
+        (y * width + x) * channels + channel. Por eso no hace falta pasar
+        por _position_to_pixel_channel. Con bits_per_channel > 1 cada
+        posición recibe un campo de varios bits en la misma escritura.
+
+        Args:
+            pixels: Array (H, W, 3|4) uint8 contiguo o vista RGB de un buffer RGBX
+            positions: Índices globales de posición
+            bits: Array de 0/1 de longitud hasta len(positions) * bits_per_channel
+            bits_per_channel: LSB escritos por posición
+        """
+        flat, index = LSBSteganography._flat_index(pixels, positions)
+        keep = np.uint8(0xFF ^ ((1 << bits_per_channel) - 1))
+        flat[index] = (flat[index] & keep) | LSBSteganography._bits_to_fields(bits, bits_per_channel)
+
+    @staticmethod
+    def _extract_bits(pixels: np.ndarray, positions: np.ndarray, bits_per_channel: int = 1) -> np.ndarray:
+        """
+        Lee los LSB de las posiciones indicadas
+
+        Returns:
+            Array uint8 de 0/1 (len(positions) * bits_per_channel) en el orden de positions
+        """
+        flat, index = LSBSteganography._flat_index(pixels, positions)
+        fields = flat[index] & np.uint8((1 << bits_per_channel) - 1)
+        return LSBSteganography._fields_to_bits(fields, bits_per_channel)
+
+    @staticmethod
+    def _flat_index(pixels: np.ndarray, positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vista plana de pixels e índices equivalentes a pixels.reshape(-1)[positions]
+
+        Un array contiguo se aplana sin copia. En la vista (H, W, 3) de un
+        buffer RGBX cada píxel ocupa 4 bytes, así que la posición p está en
+        el byte p + p // 3 del buffer.
+        """
+        if pixels.flags.c_contiguous:
+            return pixels.reshape(-1), positions
+        height, width = pixels.shape[:2]
+        if pixels.strides != (width * 4, 4, 1):
+            raise ValueError("Disposición de pixels no soportada")
+        flat = np.lib.stride_tricks.as_strided(pixels, shape=(height * width * 4,), strides=(1,))
+        return flat, positions + positions // SteganographyConfig.CHANNELS_USED
+
+    def _select_positions(self, capacity_bits: int, total_bits_needed: int, seed: int,
+                          format_version: int = SteganographyConfig.FORMAT_VERSION_LEGACY) -> np.ndarray:
+        """
+        Calcula las posiciones de la estrategia híbrida
+
+        - Primeros 20 bytes (header 4 + salt 16): posiciones secuenciales
+        - Resto: posiciones aleatorias, saltando las anteriores. En formato
+          legacy salen del pool permutado completo; en formato Feistel solo
+          se generan las necesarias
+
+        Args:
+            capacity_bits: Capacidad total de la imagen
+            total_bits_needed: Bits a escribir/leer (header incluido)
+            seed: Seed del PRNG de posiciones
+            format_version: Versión de formato leída/escrita en el header
+
+        Returns:
+            Array de total_bits_needed posiciones globales
+        """
+        header_salt_bits = (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE) * 8
+        sequential_positions = np.arange(min(header_salt_bits, total_bits_needed), dtype=np.int64)
+
+        remaining_bits = total_bits_needed - header_salt_bits
+        if remaining_bits <= 0:
+            return sequential_positions
+
+        if format_version == SteganographyConfig.FORMAT_VERSION_FEISTEL:
+            random_positions = self._generate_positions_feistel(capacity_bits, header_salt_bits, remaining_bits, seed)
+            return np.concatenate((sequential_positions, random_positions))
+
+        position_pool = self._generate_position_pool_with_seed(capacity_bits, seed)
+        # Filtrar posiciones ya usadas y tomar las necesarias
+        random_positions = position_pool[position_pool >= header_salt_bits][:remaining_bits]
+        return np.concatenate((sequential_positions, random_positions))
+
+    def _select_mode_positions(self, width: int, height: int, mode: EmbeddingMode,
+                               count: int, crypto: CryptoEngine, offset: int = 0,
+                               generator: Optional[PositionGenerator] = None) -> np.ndarray:
+        """
+        Posiciones aleatorias de los formatos 2-4: count muestras de los
+        canales del modo, fuera de los BOOTSTRAP_PIXELS primeros píxeles,
+        en el orden del generador del modo
+
+        Args:
+            crypto: Motor con la clave de las posiciones
+            offset: Índice del primer campo dentro del recorrido (para
+                escribir o leer el flujo de campos por tramos)
+            generator: Generador del modo ya creado con crypto, para
+                reutilizarlo entre tramos (por defecto se crea uno)
+
+        Returns:
+            Índices en pixels.reshape(-1) de un array (H, W, mode.channels)
+        """
+        channels = mode.channels
+        start = SteganographyConfig.BOOTSTRAP_PIXELS * channels
+        generator = generator or position_generator(mode.generator, crypto)
+        positions = generator.permute(width * height * channels - start, offset, count)
+        positions += start
+        return positions
+
+    def _read_fields(self, samples: np.ndarray, mode: EmbeddingMode, crypto: CryptoEngine,
+                     byte_offset: int, length: int, generator: Optional[PositionGenerator] = None) -> bytes:
+        """
+        Lee length bytes del flujo de campos del modo a partir de byte_offset
+
+        El flujo son los bits del payload posteriores al arranque, repartidos
+        en campos de bits_per_channel bits; solo se generan las posiciones
+        de los campos que cubren el tramo pedido (generator como en
+        _select_mode_positions).
+        """
+        k = mode.bits_per_channel
+        first_bit, end_bit = byte_offset * 8, (byte_offset + length) * 8
+        first_field, end_field = first_bit // k, -(-end_bit // k)
+        positions = self._select_mode_positions(samples.shape[1], samples.shape[0], mode,
+                                                end_field - first_field, crypto, first_field, generator)
+        bits = self._extract_bits(samples, positions, k)
+        skip = first_bit - first_field * k
+        return self._bits_to_bytes(bits[skip:skip + end_bit - first_bit])
+
+    @staticmethod
+    def _mode_views(pixels: np.ndarray, mode: EmbeddingMode) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (vista RGB del arranque, muestras donde escribe el modo)
+
+        Raises:
+            ValueError: Si el modo usa alfa y pixels no tiene cuarto canal
+        """
+        rgb = pixels[:, :, :SteganographyConfig.CHANNELS_USED]
+        if not mode.use_alpha:
+            return rgb, rgb
+        if pixels.shape[2] != 4:
+            raise ValueError("El modo usa el canal alfa y la imagen no lo tiene")
+        return rgb, pixels
+
+    def _embed_mode_payload(self, pixels: np.ndarray, mode: EmbeddingMode, full_payload: bytes,
+                            crypto: CryptoEngine) -> int:
+        """
+        Escribe header + payload en formato 2
+
+        Header, salt y byte de modo van a 1 LSB en las posiciones
+        secuenciales; el resto del payload en campos de bits_per_channel
+        bits en las posiciones del generador del modo.
+
+        Returns:
+            Número de posiciones escritas
+        """
+        rgb, samples = self._mode_views(pixels, mode)
+        split = SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE
+        bootstrap = full_payload[:split] + bytes([mode.to_byte()])
+        self._embed_bits(rgb, np.arange(len(bootstrap) * 8, dtype=np.int64), self._bytes_to_bits(bootstrap))
+
+        bits = self._bytes_to_bits(full_payload[split:])
+        count = -(-len(bits) // mode.bits_per_channel)
+        positions = self._select_mode_positions(pixels.shape[1], pixels.shape[0], mode, count, crypto)
+        self._embed_bits(samples, positions, bits, mode.bits_per_channel)
+        return len(bootstrap) * 8 + count
+
+    def _extract_mode_payload(self, pixels: np.ndarray, mode: EmbeddingMode, total_bits_needed: int,
+                              crypto: CryptoEngine) -> bytes:
+        """
+        Lee header + payload del formato 2 (sin el byte de modo)
+
+        Args:
+            total_bits_needed: Bits totales según _check_payload_length
+        """
+        rgb, samples = self._mode_views(pixels, mode)
+        split_bits = (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE) * 8
+        head = self._bits_to_bytes(self._extract_bits(rgb, np.arange(split_bits, dtype=np.int64)))
+
+        rest_bytes = (total_bits_needed - split_bits - SteganographyConfig.MODE_HEADER_BITS) // 8
+        return head + self._read_fields(samples, mode, crypto, 0, rest_bytes)
+
+    @staticmethod
+    def _iter_segments(source, segment_size: int) -> Iterator[Tuple[bytes, bool]]:
+        """
+        Trocea el mensaje en segmentos de segment_size bytes marcando el último
+
+        Args:
+            source: bytes, fichero binario (con read) o iterable de bytes de
+                cualquier tamaño
+
+        Yields:
+            (segmento, es_el_último); un mensaje vacío produce un único
+            segmento vacío
+        """
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        chunks = iter(lambda: source.read(segment_size), b'') if hasattr(source, 'read') else iter(source)
+
+        pending = bytearray()
+        for chunk in chunks:
+            pending += chunk
+            # Solo se sabe que un segmento no es el último cuando llega el byte siguiente
+            while len(pending) > segment_size:
+                yield bytes(pending[:segment_size]), False
+                del pending[:segment_size]
+        yield bytes(pending), True
+
+    @staticmethod
+    def _stream_segment_sizes(stream_bytes: int, segment_size: int) -> Iterator[Tuple[int, bool]]:
+        """
+        Tamaños cifrados (con tag) de los segmentos de un flujo de stream_bytes
+
+        Raises:
+            ValueError: Si el último segmento no llega a contener su tag
+        """
+        sealed = segment_size + SteganographyConfig.TAG_SIZE
+        count = max(1, -(-stream_bytes // sealed))
+        last_size = stream_bytes - (count - 1) * sealed
+        if last_size < SteganographyConfig.TAG_SIZE:
+            raise ValueError("Payload corrupto: segmento final incompleto")
+        for index in range(count - 1):
+            yield sealed, False
+        yield last_size, True
+
+    def _decrypt_stream_payload(self, pixels: np.ndarray, mode: EmbeddingMode, total_bits_needed: int,
+                                crypto_with_salt: CryptoEngine) -> Iterator[bytes]:
+        """
+        Extrae y descifra el payload del formato 3 segmento a segmento
+
+        Cada segmento se lee de la imagen justo antes de descifrarlo, así que
+        la memoria no depende del tamaño del mensaje y un segmento corrupto
+        se detecta al llegar a él.
+
+        Yields:
+            Plaintext de cada segmento, ya autenticado
+        """
+        _, samples = self._mode_views(pixels, mode)
+        stream_header_size = SteganographyConfig.STREAM_NONCE_PREFIX_SIZE + 4
+        stream_bytes = ((total_bits_needed - SteganographyConfig.MODE_HEADER_BITS) // 8 -
+                        SteganographyConfig.HEADER_SIZE_BYTES - SteganographyConfig.KDF_SALT_SIZE -
+                        stream_header_size)
+
+        # Un solo generador para todos los segmentos (el id 2 genera su permutación una vez)
+        generator = position_generator(mode.generator, crypto_with_salt)
+        stream_header = self._read_fields(samples, mode, crypto_with_salt, 0, stream_header_size, generator)
+        nonce_prefix = stream_header[:SteganographyConfig.STREAM_NONCE_PREFIX_SIZE]
+        segment_size = struct.unpack('>I', stream_header[SteganographyConfig.STREAM_NONCE_PREFIX_SIZE:])[0]
+        if segment_size == 0:
+            raise ValueError("Descifrado fallido. Contraseña incorrecta o imagen corrupta: tamaño de segmento 0")
+
+        def sealed_segments():
+            offset = stream_header_size
+            for size, last in self._stream_segment_sizes(stream_bytes, segment_size):
+                yield self._read_fields(samples, mode, crypto_with_salt, offset, size, generator), last
+                offset += size
+
+        yield from crypto_with_salt.decrypt_stream(sealed_segments(), nonce_prefix, stream_header)
+
     def _build_payload(self, message: bytes) -> bytes:
         """
         Construye payload completo
@@ -226,7 +1292,314 @@ class LSBSteganography:
 
         return salt, nonce, tag, ciphertext
 
-    def encode(self, image_path: str, message: bytes, output_path: str) -> dict:
+    def _read_header(self, pixels: np.ndarray) -> Tuple[int, int, bytes]:
+        """
+        Lee header de longitud + salt de las 160 posiciones secuenciales
+
+        Basta con las primeras filas de la imagen (54 píxeles). pixels debe
+        ser la vista RGB.
+
+        Returns:
+            (format_version, total_payload_length, salt)
+        """
+        header_salt_bits = (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE) * 8
+
+        # Extraer bits de header+salt y convertir a bytes
+        sequential_positions = np.arange(header_salt_bits, dtype=np.int64)
+        header_salt_bytes_data = self._bits_to_bytes(self._extract_bits(pixels, sequential_positions))
+
+        # Extraer header y salt
+        header_bytes = header_salt_bytes_data[:SteganographyConfig.HEADER_SIZE_BYTES]
+        salt = header_salt_bytes_data[SteganographyConfig.HEADER_SIZE_BYTES:]
+
+        length_field = struct.unpack('>I', header_bytes)[0]
+        format_version = length_field >> SteganographyConfig.FORMAT_VERSION_SHIFT
+        total_payload_length = length_field & SteganographyConfig.PAYLOAD_LENGTH_MASK
+
+        return format_version, total_payload_length, salt
+
+    def _read_mode(self, pixels: np.ndarray, format_version: int) -> EmbeddingMode:
+        """
+        Lee el byte de modo de los formatos 2 y 3 (posiciones secuenciales 160-167)
+
+        En los formatos 0 y 1 el modo es siempre 1 LSB en RGB.
+
+        Raises:
+            ValueError: Si el byte de modo no es válido
+        """
+        if format_version not in SteganographyConfig.MODE_FORMAT_VERSIONS:
+            return EmbeddingMode()
+        start = (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE) * 8
+        positions = np.arange(start, start + SteganographyConfig.MODE_HEADER_BITS, dtype=np.int64)
+        return EmbeddingMode.from_byte(self._bits_to_bytes(self._extract_bits(pixels, positions))[0])
+
+    @staticmethod
+    def _check_payload_length(format_version: int, total_payload_length: int, capacity_bits: int) -> int:
+        """
+        Comprueba que el header leído es plausible
+
+        En los formatos 2 y 3 capacity_bits es la capacidad del modo leído.
+
+        Returns:
+            Bits totales a extraer (header y byte de modo incluidos)
+
+        Raises:
+            ValueError: Si la versión es desconocida, el payload no cabe o es
+                menor que su estructura mínima
+        """
+        if format_version not in (SteganographyConfig.FORMAT_VERSION_LEGACY,
+                                  SteganographyConfig.FORMAT_VERSION_FEISTEL,
+                                  SteganographyConfig.FORMAT_VERSION_MODES,
+                                  SteganographyConfig.FORMAT_VERSION_STREAM,
+                                  SteganographyConfig.FORMAT_VERSION_SHARD):
+            raise ValueError(f"Versión de formato desconocida: {format_version}")
+
+        if format_version == SteganographyConfig.FORMAT_VERSION_SHARD:
+            min_payload = SteganographyConfig.KDF_SALT_SIZE + SteganographyConfig.SHARD_HEADER_SIZE
+        elif format_version == SteganographyConfig.FORMAT_VERSION_STREAM:
+            # Salt, cabecera del flujo y al menos un segmento (solo tag)
+            min_payload = (SteganographyConfig.KDF_SALT_SIZE + SteganographyConfig.STREAM_NONCE_PREFIX_SIZE + 4 +
+                           SteganographyConfig.TAG_SIZE)
+        else:
+            min_payload = (SteganographyConfig.KDF_SALT_SIZE + 4 +
+                           SteganographyConfig.NONCE_SIZE + SteganographyConfig.TAG_SIZE)
+        total_bits_needed = (SteganographyConfig.HEADER_SIZE_BYTES + total_payload_length) * 8
+        if format_version in SteganographyConfig.MODE_FORMAT_VERSIONS:
+            total_bits_needed += SteganographyConfig.MODE_HEADER_BITS
+
+        if total_payload_length < min_payload or total_bits_needed > capacity_bits:
+            raise ValueError(f"Payload corrupto: requiere {total_bits_needed} bits, capacidad {capacity_bits}")
+
+        return total_bits_needed
+
+    def _decrypt_extracted(self, pixels: np.ndarray, positions: np.ndarray, salt: bytes,
+                           crypto_with_salt: CryptoEngine) -> bytes:
+        """
+        Extrae los bits de las posiciones dadas, parsea el payload y lo descifra
+
+        Raises:
+            ValueError: Si el salt no coincide o falla la autenticación GCM
+        """
+        extracted_bytes = self._bits_to_bytes(self._extract_bits(pixels, positions))
+        return self._decrypt_payload(extracted_bytes, salt, crypto_with_salt)
+
+    def _decrypt_payload(self, extracted_bytes: bytes, salt: bytes, crypto_with_salt: CryptoEngine) -> bytes:
+        """
+        Parsea header + payload extraídos y los descifra
+
+        Raises:
+            ValueError: Si el salt no coincide o falla la autenticación GCM
+        """
+        # Saltar header y parsear payload
+        payload = extracted_bytes[SteganographyConfig.HEADER_SIZE_BYTES:]
+        salt_check, nonce, tag, ciphertext = self._parse_payload(payload)
+
+        # Verificar que el salt extraído coincide
+        if salt != salt_check:
+            raise ValueError("Salt no coincide. Imagen corrupta o contraseña incorrecta.")
+
+        # Descifrar y verificar
+        try:
+            plaintext = crypto_with_salt.decrypt(nonce, ciphertext, tag)
+            return plaintext
+        except Exception as e:
+            raise ValueError(f"Descifrado fallido. Contraseña incorrecta o imagen corrupta: {e}")
+
+    def _extract_and_decrypt(self, pixels: np.ndarray, format_version: int, mode: EmbeddingMode,
+                             capacity_bits: int, total_bits_needed: int, salt: bytes,
+                             crypto_with_salt: CryptoEngine) -> bytes:
+        """
+        Genera las posiciones de la versión de formato, extrae y descifra
+
+        Args:
+            pixels: Array (H, W, 3), o (H, W, 4) si la imagen tiene alfa
+            format_version, mode: Leídos con _read_header / _read_mode
+            capacity_bits, total_bits_needed: Validados con _check_payload_length
+            salt: Salt leído del header
+            crypto_with_salt: Motor con la clave derivada de ese salt
+
+        Returns:
+            Mensaje descifrado
+
+        Raises:
+            ValueError: Si la imagen es un fragmento de formato 4 (no lleva
+                cifrado propio; se lee con sharding.decode_sharded)
+        """
+        if format_version == SteganographyConfig.FORMAT_VERSION_STREAM:
+            return b''.join(self._decrypt_stream_payload(pixels, mode, total_bits_needed, crypto_with_salt))
+        if format_version == SteganographyConfig.FORMAT_VERSION_SHARD:
+            raise ValueError(SHARD_DECODE_ERROR)
+        if format_version == SteganographyConfig.FORMAT_VERSION_MODES:
+            extracted = self._extract_mode_payload(pixels, mode, total_bits_needed, crypto_with_salt)
+            return self._decrypt_payload(extracted, salt, crypto_with_salt)
+        positions = self._select_positions(capacity_bits, total_bits_needed, crypto_with_salt.prng_seed,
+                                           format_version)
+        return self._decrypt_extracted(pixels[:, :, :SteganographyConfig.CHANNELS_USED], positions,
+                                       salt, crypto_with_salt)
+
+    def peek_header(self, image_path: str) -> dict:
+        """
+        Lee solo el header (longitud + salt) sin decodificar la imagen completa
+
+        Pensado para triaje: descomprime únicamente las filas que contienen
+        las posiciones secuenciales (header, salt y byte de modo) y valida la
+        longitud contra la capacidad, sin PBKDF2 ni AES.
+
+        Args:
+            image_path: Ruta imagen a inspeccionar
+
+        Returns:
+            Diccionario con format_version, payload_length, salt, mode
+            (EmbeddingMode, None si el byte de modo es inválido),
+            capacity_bits (del modo en formatos 2 y 3), bits_needed y plausible
+        """
+        header_salt_bits = ((SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE) * 8 +
+                            SteganographyConfig.MODE_HEADER_BITS)
+        with Image.open(image_path) as img:
+            width = img.size[0]
+            has_alpha = self._has_alpha(img)
+        header_pixels = -(-header_salt_bits // SteganographyConfig.CHANNELS_USED)
+        rows = -(-header_pixels // width)
+
+        pixels, (width, height) = read_png_rows(image_path, rows)
+        capacity_bits = self._capacity_for_size(width, height)
+        format_version, total_payload_length, salt = self._read_header(pixels)
+        mode = None
+
+        try:
+            mode = self._read_mode(pixels, format_version)
+            if format_version in SteganographyConfig.MODE_FORMAT_VERSIONS:
+                capacity_bits = self._mode_capacity(width, height, mode)
+                if mode.use_alpha and not has_alpha:
+                    raise ValueError("El modo usa el canal alfa y la imagen no lo tiene")
+            bits_needed = self._check_payload_length(format_version, total_payload_length, capacity_bits)
+            plausible = True
+        except ValueError:
+            bits_needed = (SteganographyConfig.HEADER_SIZE_BYTES + total_payload_length) * 8
+            plausible = False
+
+        return {
+            'format_version': format_version,
+            'payload_length': total_payload_length,
+            'salt': salt,
+            'mode': mode,
+            'capacity_bits': capacity_bits,
+            'bits_needed': bits_needed,
+            'plausible': plausible
+        }
+
+    @staticmethod
+    def _full_payload_size(message_length: int) -> int:
+        """Bytes de header + payload cifrado para un mensaje de message_length bytes"""
+        return (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE + 4 +
+                SteganographyConfig.NONCE_SIZE + SteganographyConfig.TAG_SIZE + message_length)
+
+    @staticmethod
+    def _stream_payload_size(message_length: int, segment_size: int) -> int:
+        """Bytes de header + payload del formato 3 para un mensaje de message_length bytes"""
+        segments = max(1, -(-message_length // segment_size))
+        return (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE +
+                SteganographyConfig.STREAM_NONCE_PREFIX_SIZE + 4 +
+                segments * SteganographyConfig.TAG_SIZE + message_length)
+
+    @staticmethod
+    def _plan_for_size(width: int, height: int, has_alpha: bool, message_length: int,
+                       max_bits_per_channel: int = SteganographyConfig.MAX_BITS_PER_CHANNEL,
+                       segment_size: Optional[int] = None, generator: int = 0) -> dict:
+        """Planificador de plan_mode a partir de dimensiones y presencia de alfa"""
+        if segment_size is None:
+            payload_bits = LSBSteganography._full_payload_size(message_length) * 8
+        else:
+            payload_bits = LSBSteganography._stream_payload_size(message_length, segment_size) * 8
+        largest = 0
+        for bits_per_channel in range(1, max_bits_per_channel + 1):
+            for use_alpha in ((False, True) if has_alpha else (False,)):
+                mode = EmbeddingMode(bits_per_channel, use_alpha, generator)
+                if segment_size is not None:
+                    format_version = SteganographyConfig.FORMAT_VERSION_STREAM
+                    capacity_bits = LSBSteganography._mode_capacity(width, height, mode)
+                    bits_needed = payload_bits + SteganographyConfig.MODE_HEADER_BITS
+                elif mode == EmbeddingMode():
+                    format_version = SteganographyConfig.FORMAT_VERSION_FEISTEL
+                    capacity_bits = LSBSteganography._capacity_for_size(width, height)
+                    bits_needed = payload_bits
+                else:
+                    format_version = SteganographyConfig.FORMAT_VERSION_MODES
+                    capacity_bits = LSBSteganography._mode_capacity(width, height, mode)
+                    bits_needed = payload_bits + SteganographyConfig.MODE_HEADER_BITS
+                largest = max(largest, capacity_bits)
+                if bits_needed <= capacity_bits:
+                    return {
+                        'mode': mode,
+                        'format_version': format_version,
+                        'capacity_bits': capacity_bits,
+                        'bits_needed': bits_needed,
+                        'usage_percent': bits_needed / capacity_bits * 100,
+                    }
+        raise ValueError(
+            f"Mensaje demasiado grande. Necesario: {payload_bits} bits, "
+            f"Disponible: {largest} bits en el modo de mayor capacidad"
+        )
+
+    def plan_mode(self, image_path: str, message_length: int,
+                  max_bits_per_channel: int = SteganographyConfig.MAX_BITS_PER_CHANNEL,
+                  allow_alpha: bool = True, segment_size: Optional[int] = None,
+                  generator: int = 0) -> dict:
+        """
+        Elige el modo más barato en el que cabe un mensaje
+
+        Los modos se prueban de menor a mayor distorsión. Reemplazar k LSB
+        tiene un error cuadrático esperado de (4^k − 1) / 6 por muestra
+        modificada, así que antes de pasar a k + 1 bits se prueba k bits con
+        el canal alfa (si la imagen lo tiene), que reparte el payload en más
+        muestras. El modo de 1 bit en RGB se planifica en formato 1, legible
+        por versiones anteriores.
+
+        Args:
+            image_path: Ruta imagen original
+            message_length: Longitud del mensaje en bytes
+            max_bits_per_channel: Máximo de LSB por canal a considerar
+            allow_alpha: Permitir el canal alfa
+            segment_size: Si se indica, planifica el formato 3 (encode_stream)
+                con segmentos de ese tamaño en lugar de los formatos 1/2
+            generator: Id del generador de posiciones (POSITION_GENERATORS);
+                con un id distinto de 0 el modo de 1 bit en RGB usa formato 2
+
+        Returns:
+            Diccionario con mode, format_version, capacity_bits, bits_needed
+            y usage_percent
+
+        Raises:
+            ValueError: Si el mensaje no cabe en ningún modo
+        """
+        with Image.open(image_path) as img:
+            width, height = img.size
+            has_alpha = self._has_alpha(img)
+        EmbeddingMode(generator=generator).validate()
+        return self._plan_for_size(width, height, has_alpha and allow_alpha, message_length, max_bits_per_channel,
+                                   segment_size, generator)
+
+    @staticmethod
+    def _resolve_mode(mode: Optional[EmbeddingMode], format_version: int) -> Tuple[EmbeddingMode, int]:
+        """
+        Modo y versión de formato efectivos de encode
+
+        Raises:
+            ValueError: Si el modo no es válido o se pide formato legacy con
+                un modo distinto de 1 LSB en RGB
+        """
+        mode = EmbeddingMode(*(mode or ())).validate()
+        if mode != EmbeddingMode() and format_version not in SteganographyConfig.MODE_FORMAT_VERSIONS:
+            if format_version == SteganographyConfig.FORMAT_VERSION_LEGACY:
+                raise ValueError("Los modos multi-bit, con canal alfa o con otro generador de posiciones "
+                                 "requieren el formato 2")
+            format_version = SteganographyConfig.FORMAT_VERSION_MODES
+        return mode, format_version
+
+    def encode(self, image_path: str, message: bytes, output_path: str,
+               format_version: int = SteganographyConfig.FORMAT_VERSION,
+               png_policy: Union[None, str, PNGOutputPolicy] = None,
+               mode: Union[None, str, EmbeddingMode] = None) -> dict:
         """
         Oculta mensaje en imagen
 
@@ -234,28 +1607,96 @@ class LSBSteganography:
             image_path: Ruta imagen original
             message: Mensaje a ocultar
             output_path: Ruta imagen de salida
+            format_version: Versión de formato (FORMAT_VERSION_LEGACY para
+                compatibilidad con decodificadores antiguos)
+            png_policy: Compresión del PNG de salida: nombre de un preset de
+                PNG_PRESETS ('default', 'small', 'parallel', 'fast', 'store')
+                o un PNGOutputPolicy. No afecta a los píxeles
+            mode: None (1 LSB en RGB), 'auto' (el modo más barato en el que
+                cabe el mensaje, ver plan_mode) o un EmbeddingMode. Los modos
+                distintos de 1 LSB en RGB se escriben en formato 2 y guardan
+                el PNG en RGBA si usan el canal alfa. Con FORMAT_VERSION_STREAM
+                el mensaje se cifra por segmentos (ver encode_stream)
 
         Returns:
             Estadísticas del proceso
+
+        Raises:
+            ValueError: Si se pide el formato 4 (los fragmentos solo se
+                escriben con sharding.encode_sharded)
         """
-        # Cargar imagen
-        img = Image.open(image_path).convert('RGB')
-        width, height = img.size
-        pixels = np.array(img)
+        if format_version == SteganographyConfig.FORMAT_VERSION_SHARD:
+            raise ValueError(SHARD_ENCODE_ERROR)
+        if isinstance(mode, str):
+            if mode != 'auto':
+                raise ValueError(f"Modo desconocido: {mode}")
+            segment_size = (SteganographyConfig.STREAM_SEGMENT_SIZE
+                            if format_version == SteganographyConfig.FORMAT_VERSION_STREAM else None)
+            plan = self.plan_mode(image_path, len(message), segment_size=segment_size)
+            mode = plan['mode']
+            if format_version != SteganographyConfig.FORMAT_VERSION_LEGACY:
+                format_version = plan['format_version']
+        mode, format_version = self._resolve_mode(mode, format_version)
+
+        # Cargar imagen directamente en un buffer reutilizable
+        pixels, buffer = self._load_pixels(image_path, keep_alpha=mode.use_alpha)
+        try:
+            return self._encode_pixels(pixels, buffer, message, output_path, format_version, png_policy, mode)
+        finally:
+            self._release_pixels(buffer)
+
+    def _encode_shard(self, image_path: str, shard: bytes, output_path: str,
+                      png_policy: Union[None, str, PNGOutputPolicy], mode: EmbeddingMode) -> dict:
+        """
+        Escribe un fragmento de sharding.build_shards en formato 4
+
+        El fragmento va sin cifrado por imagen (el conjunto se cifra una vez
+        en sharding.encode_sharded), por eso no es accesible desde encode.
+        """
+        mode, _ = self._resolve_mode(mode, SteganographyConfig.FORMAT_VERSION_SHARD)
+        pixels, buffer = self._load_pixels(image_path, keep_alpha=mode.use_alpha)
+        try:
+            return self._encode_pixels(pixels, buffer, shard, output_path,
+                                       SteganographyConfig.FORMAT_VERSION_SHARD, png_policy, mode)
+        finally:
+            self._release_pixels(buffer)
+
+    def _encode_pixels(self, pixels: np.ndarray, buffer: Optional[np.ndarray], message: bytes,
+                       output_path: str, format_version: int,
+                       png_policy: Union[None, str, PNGOutputPolicy] = None,
+                       mode: EmbeddingMode = EmbeddingMode()) -> dict:
+        """Embebe el mensaje en pixels y guarda la imagen"""
+        if format_version == SteganographyConfig.FORMAT_VERSION_STREAM:
+            return self._encode_stream_pixels(pixels, buffer, message, output_path, png_policy, mode)
+        if format_version not in (SteganographyConfig.FORMAT_VERSION_LEGACY,
+                                  SteganographyConfig.FORMAT_VERSION_FEISTEL,
+                                  SteganographyConfig.FORMAT_VERSION_MODES,
+                                  SteganographyConfig.FORMAT_VERSION_SHARD):
+            raise ValueError(f"Versión de formato desconocida: {format_version}")
 
         # Verificar capacidad
-        capacity_bits = self._calculate_capacity(img)
+        height, width = pixels.shape[:2]
+        if format_version in SteganographyConfig.MODE_FORMAT_VERSIONS:
+            capacity_bits = self._mode_capacity(width, height, mode)
+            mode_bits = SteganographyConfig.MODE_HEADER_BITS
+        else:
+            capacity_bits = self._capacity_for_size(width, height)
+            mode_bits = 0
 
-        # Construir payload
-        payload = self._build_payload(message)
-        payload_bits_needed = len(payload) * 8
+        # Construir payload (en formato 4 message ya es un fragmento cifrado)
+        if format_version == SteganographyConfig.FORMAT_VERSION_SHARD:
+            payload = self.crypto.salt + message
+        else:
+            payload = self._build_payload(message)
 
         # Añadir header de longitud total (para saber cuántos bytes leer)
         total_length = len(payload)
-        header = struct.pack('>I', total_length)
+        if total_length > SteganographyConfig.PAYLOAD_LENGTH_MASK:
+            raise ValueError(f"Payload demasiado grande para el header: {total_length} bytes")
+        header = struct.pack('>I', (format_version << SteganographyConfig.FORMAT_VERSION_SHIFT) | total_length)
         full_payload = header + payload
 
-        total_bits_needed = len(full_payload) * 8
+        total_bits_needed = len(full_payload) * 8 + mode_bits
 
         if total_bits_needed > capacity_bits:
             raise ValueError(
@@ -263,142 +1704,419 @@ class LSBSteganography:
                 f"Disponible: {capacity_bits} bits"
             )
 
-        # Convertir a binario
-        payload_binary = ''.join(format(byte, '08b') for byte in full_payload)
-
-        # Estrategia híbrida:
-        # - Primeros 20 bytes (header 4 + salt 16) usan posiciones secuenciales
-        # - Resto usa posiciones aleatorias
+        if format_version in SteganographyConfig.MODE_FORMAT_VERSIONS:
+            # Arranque a 1 LSB secuencial y campos multi-bit en posiciones Feistel
+            positions_count = self._embed_mode_payload(pixels, mode, full_payload, self.crypto)
+            output_pixels = pixels if mode.use_alpha else pixels[:, :, :SteganographyConfig.CHANNELS_USED]
+        else:
+            # Estrategia híbrida: header+salt secuencial, resto aleatorio
+            positions = self._select_positions(capacity_bits, total_bits_needed, self.crypto.prng_seed,
+                                               format_version)
 
-        header_salt_bytes = SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE
-        header_salt_bits = header_salt_bytes * 8
+            # Insertar bits en LSB (una sola escritura vectorizada)
+            self._embed_bits(pixels, positions, self._bytes_to_bits(full_payload))
+            positions_count = len(positions)
+            output_pixels = pixels
 
-        # Posiciones secuenciales para header+salt
-        sequential_positions = list(range(header_salt_bits))
+        # Guardar imagen
+        self._save_pixels(output_pixels, buffer, output_path, png_policy)
 
-        # Posiciones aleatorias para el resto (empezando después de header+salt)
-        remaining_bits = total_bits_needed - header_salt_bits
-        if remaining_bits > 0:
-            position_pool = self._generate_position_pool(capacity_bits)
-            # Filtrar posiciones ya usadas y tomar las necesarias
-            random_positions = [p for p in position_pool if p >= header_salt_bits][:remaining_bits]
-            positions = sequential_positions + random_positions
-        else:
-            positions = sequential_positions[:total_bits_needed]
+        return {
+            'message_bytes': len(message),
+            'payload_bytes': len(full_payload),
+            'bits_used': total_bits_needed,
+            'capacity_bits': capacity_bits,
+            'usage_percent': (total_bits_needed / capacity_bits) * 100,
+            'positions_count': positions_count,
+            'output_bytes': os.path.getsize(output_path),
+            'format_version': format_version,
+            'bits_per_channel': mode.bits_per_channel,
+            'use_alpha': mode.use_alpha
+        }
 
-        # Insertar bits en LSB
-        for i, pos in enumerate(positions):
-            x, y, channel = self._position_to_pixel_channel(pos, width)
+    def encode_stream(self, image_path: str, source, output_path: str,
+                      mode: Union[None, str, EmbeddingMode] = None,
+                      png_policy: Union[None, str, PNGOutputPolicy] = None,
+                      segment_size: int = SteganographyConfig.STREAM_SEGMENT_SIZE,
+                      message_length: Optional[int] = None) -> dict:
+        """
+        Oculta un mensaje de cualquier tamaño en formato 3 (AEAD por segmentos)
 
-            # Obtener bit a insertar
-            bit = int(payload_binary[i])
+        El mensaje se lee, cifra y escribe en la imagen segmento a segmento,
+        así que además de la imagen solo se mantiene en memoria un segmento.
+        Cada segmento se autentica por separado (construcción STREAM) y el
+        decodificador detecta una corrupción al llegar al segmento afectado.
 
-            # Modificar LSB
-            pixel_value = pixels[y, x, channel]
-            # Limpiar LSB y establecer nuevo bit
-            new_value = (pixel_value & 0xFE) | bit
-            pixels[y, x, channel] = new_value
+        Args:
+            image_path: Ruta imagen original
+            source: Mensaje como bytes, fichero binario abierto o iterable
+                de bytes
+            output_path: Ruta imagen de salida
+            mode: None (1 LSB en RGB), 'auto' o un EmbeddingMode
+            png_policy: Compresión del PNG de salida (como en encode)
+            segment_size: Bytes de plaintext por segmento
+            message_length: Longitud del mensaje; obligatoria con 'auto' si
+                source no es bytes
 
-        # Guardar imagen
-        stego_img = Image.fromarray(pixels, 'RGB')
-        stego_img.save(output_path, 'PNG')  # PNG para evitar compresión con pérdida
+        Returns:
+            Estadísticas del proceso (las de encode más segments y segment_size)
 
+        Raises:
+            ValueError: Si el mensaje no cabe o faltan datos para planificar
+        """
+        if not 0 < segment_size <= 0xFFFFFFFF:
+            raise ValueError(f"Tamaño de segmento no válido: {segment_size}")
+        if isinstance(mode, str):
+            if mode != 'auto':
+                raise ValueError(f"Modo desconocido: {mode}")
+            if message_length is None:
+                if not isinstance(source, (bytes, bytearray)):
+                    raise ValueError("El modo 'auto' requiere message_length si el mensaje no son bytes")
+                message_length = len(source)
+            mode = self.plan_mode(image_path, message_length, segment_size=segment_size)['mode']
+        mode, _ = self._resolve_mode(mode, SteganographyConfig.FORMAT_VERSION_STREAM)
+
+        pixels, buffer = self._load_pixels(image_path, keep_alpha=mode.use_alpha)
+        try:
+            return self._encode_stream_pixels(pixels, buffer, source, output_path, png_policy, mode, segment_size)
+        finally:
+            self._release_pixels(buffer)
+
+    def _encode_stream_pixels(self, pixels: np.ndarray, buffer: Optional[np.ndarray], source,
+                              output_path: str, png_policy: Union[None, str, PNGOutputPolicy],
+                              mode: EmbeddingMode,
+                              segment_size: int = SteganographyConfig.STREAM_SEGMENT_SIZE) -> dict:
+        """Embebe el mensaje en formato 3 y guarda la imagen"""
+        height, width = pixels.shape[:2]
+        capacity_bits = self._mode_capacity(width, height, mode)
+        rgb, samples = self._mode_views(pixels, mode)
+
+        # El flujo de campos empieza tras el arranque: cabecera del flujo y segmentos
+        writer = _FieldStreamWriter(self, samples, mode, self.crypto)
+        nonce_prefix = os.urandom(SteganographyConfig.STREAM_NONCE_PREFIX_SIZE)
+        stream_header = nonce_prefix + struct.pack('>I', segment_size)
+        writer.write(stream_header)
+
+        message_bytes = 0
+        segments = 0
+
+        def counted(chunks):
+            nonlocal message_bytes
+            for chunk, last in chunks:
+                message_bytes += len(chunk)
+                yield chunk, last
+
+        for sealed in self.crypto.encrypt_stream(counted(self._iter_segments(source, segment_size)),
+                                                 nonce_prefix, stream_header):
+            writer.write(sealed)
+            segments += 1
+        writer.close()
+
+        # El arranque (header con la longitud total, salt y modo) se escribe al final
+        total_length = SteganographyConfig.KDF_SALT_SIZE + writer.bytes_written
+        if total_length > SteganographyConfig.PAYLOAD_LENGTH_MASK:
+            raise ValueError(f"Payload demasiado grande para el header: {total_length} bytes")
+        header = struct.pack('>I', (SteganographyConfig.FORMAT_VERSION_STREAM <<
+                                    SteganographyConfig.FORMAT_VERSION_SHIFT) | total_length)
+        bootstrap = header + self.crypto.salt + bytes([mode.to_byte()])
+        self._embed_bits(rgb, np.arange(len(bootstrap) * 8, dtype=np.int64), self._bytes_to_bits(bootstrap))
+
+        output_pixels = pixels if mode.use_alpha else rgb
+        self._save_pixels(output_pixels, buffer, output_path, png_policy)
+
+        total_bits_needed = (SteganographyConfig.HEADER_SIZE_BYTES + total_length) * 8 + \
+            SteganographyConfig.MODE_HEADER_BITS
         return {
-            'message_bytes': len(message),
-            'payload_bytes': len(full_payload),
+            'message_bytes': message_bytes,
+            'payload_bytes': SteganographyConfig.HEADER_SIZE_BYTES + total_length,
             'bits_used': total_bits_needed,
             'capacity_bits': capacity_bits,
             'usage_percent': (total_bits_needed / capacity_bits) * 100,
-            'positions_count': len(positions)
+            'positions_count': len(bootstrap) * 8 + writer.fields_written,
+            'output_bytes': os.path.getsize(output_path),
+            'format_version': SteganographyConfig.FORMAT_VERSION_STREAM,
+            'bits_per_channel': mode.bits_per_channel,
+            'use_alpha': mode.use_alpha,
+            'segments': segments,
+            'segment_size': segment_size
         }
 
-    def decode(self, image_path: str, password: str) -> bytes:
+    def encode_batch(self, jobs: Iterable[Tuple[str, bytes, str]], workers: int = None,
+                     format_version: int = SteganographyConfig.FORMAT_VERSION,
+                     png_policy: Union[None, str, PNGOutputPolicy] = None,
+                     mode: Union[None, str, EmbeddingMode] = None) -> Iterator[dict]:
+        """
+        Oculta N mensajes en N imágenes en paralelo con un pool de procesos
+
+        Cada proceso recibe una sola vez la clave ya derivada de self.crypto
+        (sin repetir PBKDF2) y mantiene su propio LSBSteganography. Los
+        resultados se devuelven a medida que terminan, no en orden de entrada.
+
+        Args:
+            jobs: Iterable de (image_path, message, output_path)
+            workers: Número de procesos (por defecto os.cpu_count())
+            format_version: Versión de formato de todas las imágenes
+            png_policy: Política de salida PNG de todas las imágenes (con
+                varios procesos suele bastar un preset de un solo hilo)
+            mode: Modo de ocultación de cada imagen (como en encode; con
+                'auto' se planifica por imagen)
+
+        Yields:
+            Estadísticas de encode() más 'job_index' y 'output_path'
+
+        Raises:
+            ValueError: Si se pide el formato 4 (ver sharding.encode_sharded)
+        """
+        if format_version == SteganographyConfig.FORMAT_VERSION_SHARD:
+            raise ValueError(SHARD_ENCODE_ERROR)
+        calls = ((index, image_path, message, output_path, format_version, png_policy, mode)
+                 for index, (image_path, message, output_path) in enumerate(jobs))
+        return self._run_batch(_batch_worker_encode, calls, workers)
+
+    def _encode_shard_batch(self, jobs: Iterable[Tuple[str, bytes, str]], workers: int,
+                            png_policy: Union[None, str, PNGOutputPolicy],
+                            mode: EmbeddingMode) -> Iterator[dict]:
+        """encode_batch de fragmentos de formato 4 (solo para sharding.encode_sharded)"""
+        calls = ((index, image_path, shard, output_path, png_policy, mode)
+                 for index, (image_path, shard, output_path) in enumerate(jobs))
+        return self._run_batch(_batch_worker_encode_shard, calls, workers)
+
+    def _run_batch(self, func: Callable[..., dict], calls: Iterable[tuple], workers: Optional[int]) -> Iterator[dict]:
+        """
+        Ejecuta func(*args) para cada args de calls en un pool de procesos
+
+        Cada proceso recibe una vez la clave ya derivada de self.crypto. Como
+        mucho hay workers * 2 llamadas en vuelo (limita los mensajes en
+        memoria) y los resultados se devuelven a medida que terminan.
+        """
+        workers = workers or os.cpu_count() or 1
+        max_pending = workers * 2
+        key_state = (self.crypto.aes_key, self.crypto.salt, self.crypto.prng_seed)
+        calls_iter = iter(calls)
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_batch_worker_init,
+                                 initargs=key_state) as executor:
+            pending = set()
+            exhausted = False
+            try:
+                while pending or not exhausted:
+                    while not exhausted and len(pending) < max_pending:
+                        try:
+                            args = next(calls_iter)
+                        except StopIteration:
+                            exhausted = True
+                            break
+                        pending.add(executor.submit(func, *args))
+
+                    if not pending:
+                        break
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield future.result()
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def decode_batch(self, image_paths: Iterable[str], workers: int = None) -> Iterator[dict]:
+        """
+        Extrae los mensajes de N imágenes en paralelo con un pool de procesos
+
+        Todas las imágenes deben usar el salt de self.crypto: cada proceso
+        recibe la clave ya derivada y no repite PBKDF2. Los resultados se
+        devuelven a medida que terminan, no en orden de entrada.
+
+        Args:
+            image_paths: Rutas de las imágenes
+            workers: Número de procesos (por defecto os.cpu_count())
+
+        Yields:
+            {'job_index', 'image_path', 'message'}
+
+        Raises:
+            ValueError: La primera imagen que no se puede decodificar
+        """
+        return self._run_batch(_batch_worker_decode, enumerate(image_paths), workers)
+
+    def _decode_shard_batch(self, image_paths: Iterable[str], workers: int = None) -> Iterator[dict]:
+        """decode_batch de fragmentos de formato 4: 'message' es el fragmento sin autenticar"""
+        return self._run_batch(_batch_worker_decode_shard, enumerate(image_paths), workers)
+
+    def decode(self, image_path: str, password: Optional[str], peek: bool = False) -> bytes:
         """
         Extrae mensaje de imagen
 
         Args:
             image_path: Ruta imagen esteganografiada
-            password: Contraseña para descifrar
+            password: Contraseña para descifrar. Si es None se reutiliza la
+                clave ya derivada de self.crypto (la imagen debe usar su salt)
+            peek: Si True, valida primero el header con peek_header y rechaza
+                las imágenes implausibles sin decodificarlas enteras
 
         Returns:
             Mensaje descifrado
+
+        Raises:
+            ValueError: Si la imagen no se puede descifrar o es un fragmento
+                de formato 4 (ver sharding.decode_sharded)
         """
-        # Cargar imagen
-        img = Image.open(image_path).convert('RGB')
-        width, height = img.size
-        pixels = np.array(img)
+        if peek:
+            header = self.peek_header(image_path)
+            if not header['plausible']:
+                raise ValueError(f"Payload corrupto: requiere {header['bits_needed']} bits, "
+                                 f"capacidad {header['capacity_bits']}")
+
+        # Cargar imagen directamente en un buffer reutilizable (con alfa si lo tiene)
+        pixels, buffer = self._load_pixels(image_path, keep_alpha=True)
+        try:
+            return self._decode_pixels(pixels, password)
+        finally:
+            self._release_pixels(buffer)
 
-        capacity_bits = self._calculate_capacity(img)
+    def _decode_shard(self, image_path: str) -> bytes:
+        """
+        Extrae el fragmento de formato 4 con la clave de self.crypto
 
-        # PASO 1: Extraer header + salt usando posiciones secuenciales
-        # (mismo método que en encode)
-        header_salt_bytes = SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE
-        header_salt_bits = header_salt_bytes * 8
+        Returns:
+            Fragmento tal cual, sin autenticar (lo autentica
+            sharding.decode_sharded al reunir el conjunto)
 
-        # Posiciones secuenciales
-        sequential_positions = list(range(header_salt_bits))
+        Raises:
+            ValueError: Si la imagen no es un fragmento o no usa el salt de self.crypto
+        """
+        pixels, buffer = self._load_pixels(image_path, keep_alpha=True)
+        try:
+            _, mode, _, total_bits_needed, _, crypto_with_salt = self._open_payload(pixels, None, shard=True)
+            extracted = self._extract_mode_payload(pixels, mode, total_bits_needed, crypto_with_salt)
+            return extracted[SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE:]
+        finally:
+            self._release_pixels(buffer)
 
-        # Extraer bits de header+salt
-        header_salt_bits_list = []
-        for pos in sequential_positions:
-            x, y, channel = self._position_to_pixel_channel(pos, width)
-            pixel_value = pixels[y, x, channel]
-            header_salt_bits_list.append(pixel_value & 1)
+    def decode_stream(self, image_path: str, password: Optional[str]) -> Iterator[bytes]:
+        """
+        Extrae el mensaje por trozos sin reconstruirlo entero en memoria
 
-        # Convertir a bytes
-        header_salt_binary = ''.join(str(bit) for bit in header_salt_bits_list)
-        header_salt_bytes_data = bytes(int(header_salt_binary[i:i+8], 2) for i in range(0, len(header_salt_binary), 8))
+        En formato 3 cada segmento se lee, autentica y entrega por separado;
+        en los formatos anteriores se entrega el mensaje completo de una vez.
+        La imagen decodificada se mantiene hasta agotar o cerrar el generador.
 
-        # Extraer header y salt
-        header_bytes = header_salt_bytes_data[:SteganographyConfig.HEADER_SIZE_BYTES]
-        salt = header_salt_bytes_data[SteganographyConfig.HEADER_SIZE_BYTES:]
+        Args:
+            image_path: Ruta imagen esteganografiada
+            password: Contraseña (None para reutilizar la clave de self.crypto)
 
-        total_payload_length = struct.unpack('>I', header_bytes)[0]
+        Yields:
+            Trozos consecutivos del mensaje, ya autenticados
 
-        # PASO 2: Recrear crypto con el salt extraído
-        crypto_with_salt = CryptoEngine(password, salt)
+        Raises:
+            ValueError: Al llegar a un segmento corrupto; los trozos ya
+                entregados son auténticos, pero el mensaje está incompleto.
+                También si la imagen es un fragmento de formato 4
+        """
+        pixels, buffer = self._load_pixels(image_path, keep_alpha=True)
+        try:
+            format_version, mode, capacity_bits, total_bits_needed, salt, crypto_with_salt = \
+                self._open_payload(pixels, password)
+            if format_version == SteganographyConfig.FORMAT_VERSION_STREAM:
+                yield from self._decrypt_stream_payload(pixels, mode, total_bits_needed, crypto_with_salt)
+            else:
+                yield self._extract_and_decrypt(pixels, format_version, mode, capacity_bits, total_bits_needed,
+                                                salt, crypto_with_salt)
+        finally:
+            self._release_pixels(buffer)
+
+    def _decode_pixels(self, pixels: np.ndarray, password: Optional[str]) -> bytes:
+        """Extrae y descifra el mensaje de pixels (RGB o RGBA)"""
+        # PASO 4: Generar posiciones, extraer y descifrar
+        return self._extract_and_decrypt(pixels, *self._open_payload(pixels, password))
+
+    def _open_payload(self, pixels: np.ndarray, password: Optional[str],
+                      shard: bool = False) -> Tuple[int, EmbeddingMode, int, int, bytes, CryptoEngine]:
+        """
+        Lee y valida header, salt y modo, y prepara el motor de descifrado
 
-        # PASO 3: Calcular bits totales necesarios
-        total_bits_needed = (SteganographyConfig.HEADER_SIZE_BYTES + total_payload_length) * 8
+        Args:
+            pixels: Array (H, W, 3) o (H, W, 4)
+            password: Contraseña (None para reutilizar la clave de self.crypto)
+            shard: True para exigir un fragmento de formato 4, False para
+                rechazarlo (antes de derivar la clave)
 
-        if total_bits_needed > capacity_bits:
-            raise ValueError(f"Payload corrupto: requiere {total_bits_needed} bits, capacidad {capacity_bits}")
+        Returns:
+            (format_version, mode, capacity_bits, total_bits_needed, salt,
+            crypto_with_salt), en el orden de _extract_and_decrypt
+        """
+        height, width = pixels.shape[:2]
+        rgb = pixels[:, :, :SteganographyConfig.CHANNELS_USED]
+
+        # PASO 1: Extraer header + salt (y modo en formatos 2-4) usando
+        # posiciones secuenciales (mismo método que en encode)
+        format_version, total_payload_length, salt = self._read_header(rgb)
+        if (format_version == SteganographyConfig.FORMAT_VERSION_SHARD) != shard:
+            raise ValueError(SHARD_DECODE_ERROR if not shard else
+                             f"La imagen no es un fragmento (formato {format_version})")
+        mode = self._read_mode(rgb, format_version)
+        if format_version in SteganographyConfig.MODE_FORMAT_VERSIONS:
+            capacity_bits = self._mode_capacity(width, height, mode)
+        else:
+            capacity_bits = self._capacity_for_size(width, height)
 
-        # PASO 4: Generar posiciones para el resto del payload
-        remaining_bits = total_bits_needed - header_salt_bits
+        # PASO 2: Validar la longitud antes de cualquier trabajo criptográfico
+        total_bits_needed = self._check_payload_length(format_version, total_payload_length, capacity_bits)
 
-        if remaining_bits > 0:
-            position_pool = self._generate_position_pool_with_seed(capacity_bits, crypto_with_salt.prng_seed)
-            # Filtrar posiciones ya usadas y tomar las necesarias
-            random_positions = [p for p in position_pool if p >= header_salt_bits][:remaining_bits]
-            all_positions = sequential_positions + random_positions
+        # PASO 3: Recrear crypto con el salt extraído
+        if password is None:
+            # Reutilizar la clave ya derivada del motor propio
+            if salt != self.crypto.salt:
+                raise ValueError("Salt no coincide con la clave derivada. Se requiere contraseña.")
+            crypto_with_salt = self.crypto
         else:
-            all_positions = sequential_positions[:total_bits_needed]
+            crypto_with_salt = CryptoEngine(password, salt, key_cache=self.key_cache)
 
-        # Extraer todos los bits
-        extracted_bits = []
-        for pos in all_positions:
-            x, y, channel = self._position_to_pixel_channel(pos, width)
-            pixel_value = pixels[y, x, channel]
-            extracted_bits.append(pixel_value & 1)
+        return format_version, mode, capacity_bits, total_bits_needed, salt, crypto_with_salt
 
-        # Convertir a bytes
-        binary_string = ''.join(str(bit) for bit in extracted_bits)
-        extracted_bytes = bytes(int(binary_string[i:i+8], 2) for i in range(0, len(binary_string), 8))
 
-        # Saltar header y parsear payload
-        payload = extracted_bytes[SteganographyConfig.HEADER_SIZE_BYTES:]
-        salt_check, nonce, tag, ciphertext = self._parse_payload(payload)
+# Estado por proceso del pool de encode_batch y decode_batch (se inicializa una vez por worker)
+_batch_stego: Optional[LSBSteganography] = None
 
-        # Verificar que el salt extraído coincide
-        if salt != salt_check:
-            raise ValueError("Salt no coincide. Imagen corrupta o contraseña incorrecta.")
 
-        # Descifrar y verificar
-        try:
-            plaintext = crypto_with_salt.decrypt(nonce, ciphertext, tag)
-            return plaintext
-        except Exception as e:
-            raise ValueError(f"Descifrado fallido. Contraseña incorrecta o imagen corrupta: {e}")
+def _batch_worker_init(aes_key: bytes, salt: bytes, prng_seed: int) -> None:
+    """Inicializa el LSBSteganography del worker con la clave ya derivada"""
+    global _batch_stego
+    _batch_stego = LSBSteganography(CryptoEngine.from_key(aes_key, salt, prng_seed),
+                                    buffer_pool=PixelBufferPool())
+
+
+def _batch_worker_encode(index: int, image_path: str, message: bytes,
+                         output_path: str, format_version: int,
+                         png_policy: Union[None, str, PNGOutputPolicy],
+                         mode: Union[None, str, EmbeddingMode]) -> dict:
+    """Ejecuta un encode dentro del worker"""
+    stats = _batch_stego.encode(image_path, message, output_path, format_version, png_policy, mode)
+    stats['job_index'] = index
+    stats['output_path'] = output_path
+    return stats
+
+
+def _batch_worker_decode(index: int, image_path: str) -> dict:
+    """Ejecuta un decode dentro del worker con la clave ya derivada"""
+    return {
+        'job_index': index,
+        'image_path': image_path,
+        'message': _batch_stego.decode(image_path, None)
+    }
+
+
+def _batch_worker_encode_shard(index: int, image_path: str, shard: bytes, output_path: str,
+                               png_policy: Union[None, str, PNGOutputPolicy], mode: EmbeddingMode) -> dict:
+    """Escribe un fragmento de formato 4 dentro del worker"""
+    stats = _batch_stego._encode_shard(image_path, shard, output_path, png_policy, mode)
+    stats['job_index'] = index
+    stats['output_path'] = output_path
+    return stats
 
 
+def _batch_worker_decode_shard(index: int, image_path: str) -> dict:
+    """Extrae un fragmento de formato 4 dentro del worker con la clave ya derivada"""
+    return {
+        'job_index': index,
+        'image_path': image_path,
+        'message': _batch_stego._decode_shard(image_path)
+    }
@@ -0,0 +1,49 @@
+"""
+Fixtures comunes de las pruebas del sistema de esteganografía
+
+Los scripts se importan como módulos planos (igual que entre ellos), así
+que se añade src/scripts al path.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src', 'scripts')
+sys.path.insert(0, SCRIPTS_DIR)
+
+from stego_system import CryptoEngine, LSBSteganography  # noqa: E402
+
+PASSWORD = "contraseña de prueba"
+
+
+def make_cover(path: str, width: int = 96, height: int = 80, alpha: bool = False, seed: int = 0) -> str:
+    """Guarda una portada de ruido aleatorio y devuelve su ruta"""
+    rng = np.random.default_rng(seed)
+    channels = 4 if alpha else 3
+    Image.fromarray(rng.integers(0, 256, (height, width, channels), dtype=np.uint8)).save(path)
+    return path
+
+
+@pytest.fixture(scope='session')
+def crypto():
+    """Motor con la clave derivada una sola vez para toda la sesión"""
+    return CryptoEngine(PASSWORD)
+
+
+@pytest.fixture
+def stego(crypto):
+    return LSBSteganography(crypto)
+
+
+@pytest.fixture
+def cover(tmp_path):
+    return make_cover(str(tmp_path / 'cover.png'))
+
+
+@pytest.fixture
+def rgba_cover(tmp_path):
+    return make_cover(str(tmp_path / 'cover_rgba.png'), alpha=True)
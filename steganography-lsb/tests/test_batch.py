@@ -0,0 +1,47 @@
+"""Pruebas de encode_batch / decode_batch (pool de procesos)"""
+
+import pytest
+
+from conftest import PASSWORD, make_cover
+from stego_system import SteganographyConfig
+
+
+def _jobs(tmp_path, count: int) -> list:
+    return [(make_cover(str(tmp_path / f'cover_{i}.png'), seed=i), f"mensaje {i}".encode(),
+             str(tmp_path / f'stego_{i}.png')) for i in range(count)]
+
+
+def test_encode_batch_then_decode_batch(stego, tmp_path):
+    jobs = _jobs(tmp_path, 5)
+    results = list(stego.encode_batch(jobs, workers=2))
+    assert sorted(r['job_index'] for r in results) == list(range(5))
+    assert all(r['output_path'] == jobs[r['job_index']][2] for r in results)
+
+    decoded = {r['job_index']: r for r in stego.decode_batch([job[2] for job in jobs], workers=2)}
+    assert {i: r['message'] for i, r in decoded.items()} == {i: job[1] for i, job in enumerate(jobs)}
+    assert all(decoded[i]['image_path'] == jobs[i][2] for i in decoded)
+    # Las imágenes del lote se leen también fuera del pool, con la contraseña
+    assert stego.decode(jobs[3][2], PASSWORD) == b"mensaje 3"
+
+
+def test_encode_batch_accepts_a_generator_and_options(stego, tmp_path):
+    jobs = _jobs(tmp_path, 3)
+    results = list(stego.encode_batch(iter(jobs), workers=1, png_policy='fast', mode='auto',
+                                      format_version=SteganographyConfig.FORMAT_VERSION_LEGACY))
+    assert len(results) == 3
+    for _, message, output in jobs:
+        assert stego.decode(output, None) == message
+
+
+def test_batch_errors_propagate(stego, tmp_path):
+    jobs = _jobs(tmp_path, 2)
+    jobs[1] = (jobs[1][0], b"x" * 10_000, jobs[1][2])
+    with pytest.raises(ValueError, match="demasiado grande"):
+        list(stego.encode_batch(jobs, workers=2))
+    with pytest.raises(ValueError):
+        list(stego.decode_batch([jobs[0][0]], workers=1))
+
+
+def test_encode_batch_refuses_shard_format(stego, tmp_path):
+    with pytest.raises(ValueError):
+        stego.encode_batch(_jobs(tmp_path, 1), format_version=SteganographyConfig.FORMAT_VERSION_SHARD)
@@ -0,0 +1,81 @@
+"""Pruebas de la suite de benchmarks y de la comparación con la línea base (bench_suite.py)"""
+
+import json
+
+import pytest
+
+from bench_suite import BENCH_DETECTORS, DEFAULT_BASELINE, PROFILES, TIME_MIN_DELTA_S, compare, run_suite
+
+
+def _results(calibration_s: float, rows: list) -> dict:
+    return {
+        'meta': {'calibration_s': calibration_s},
+        'results': [{'stage': stage, 'megapixels': mp, 'fill_ratio': fill, 'time_s': time_s, 'peak_mb': peak_mb}
+                    for stage, mp, fill, time_s, peak_mb in rows],
+    }
+
+
+BASELINE = _results(0.02, [
+    ('kdf', None, None, 0.5, 0.0),
+    ('embed', 1.0, 0.5, 0.2, 40.0),
+    ('png_load', 1.0, None, 0.001, 10.0),
+])
+
+
+def test_no_regression_within_tolerance():
+    current = _results(0.02, [
+        ('kdf', None, None, 0.6, 0.0),         # +20 %
+        ('embed', 1.0, 0.5, 0.19, 43.0),       # memoria +7.5 %
+        ('png_load', 1.0, None, 0.015, 10.5),  # 15x, pero por debajo del margen absoluto
+    ])
+    assert compare(current, BASELINE) == []
+
+
+def test_time_and_memory_regressions():
+    current = _results(0.02, [
+        ('kdf', None, None, 0.7, 0.0),
+        ('embed', 1.0, 0.5, 0.2, 50.0),
+        ('png_load', 1.0, None, 0.001 + TIME_MIN_DELTA_S * 2, 10.0),
+        ('extract', 1.0, 0.5, 9.0, 99.0),  # Sin línea base: no se compara
+    ])
+    found = {(r['stage'], r['metric']): r for r in compare(current, BASELINE)}
+    assert set(found) == {('kdf', 'time_s'), ('embed', 'peak_mb'), ('png_load', 'time_s')}
+    assert found[('kdf', 'time_s')]['ratio'] == pytest.approx(1.4)
+    assert found[('embed', 'peak_mb')]['expected'] == 40.0 and found[('embed', 'peak_mb')]['current'] == 50.0
+    # Tolerancia configurable
+    assert compare(current, BASELINE, time_tolerance=0.5, memory_tolerance=0.3)[0]['stage'] == 'png_load'
+
+
+def test_times_scale_with_calibration():
+    # Máquina el doble de lenta: 0.9 s frente a 0.5 s no es una regresión
+    slower = _results(0.04, [('kdf', None, None, 0.9, 0.0)])
+    assert compare(slower, BASELINE) == []
+    # Máquina el doble de rápida: 0.5 s sí lo es
+    faster = _results(0.01, [('kdf', None, None, 0.5, 0.0)])
+    assert [r['expected'] for r in compare(faster, BASELINE)] == [pytest.approx(0.25)]
+
+
+def test_run_suite_measures_every_stage():
+    results = run_suite(sizes_mp=(0.01,), fill_ratios=(0.5,), repeat=1, verbose=False)
+    stages = {row['stage'] for row in results['results']}
+    assert stages == ({'kdf', 'png_load', 'png_save', 'positions_legacy', 'positions_feistel', 'embed', 'extract'} |
+                      {f'detect_{name}' for name in BENCH_DETECTORS})
+    assert results['meta']['calibration_s'] > 0
+    for row in results['results']:
+        assert row['time_s'] >= 0 and row['peak_mb'] >= 0
+
+    only = {('embed', 0.01, 0.5)}
+    retry = run_suite(sizes_mp=(0.01,), fill_ratios=(0.5,), repeat=1, verbose=False, only=only)
+    assert [(r['stage'], r['megapixels'], r['fill_ratio']) for r in retry['results']] == list(only)
+
+
+def test_stored_baseline_covers_the_quick_profile():
+    with open(DEFAULT_BASELINE, encoding='utf-8') as f:
+        baseline = json.load(f)
+    keys = {(row['stage'], row['megapixels'], row['fill_ratio']) for row in baseline['results']}
+    profile = PROFILES['quick']
+    for mp in profile['sizes_mp']:
+        assert ('png_load', mp, None) in keys
+        for fill in profile['fill_ratios']:
+            assert ('embed', mp, fill) in keys
+    assert compare(baseline, baseline) == []
@@ -0,0 +1,91 @@
+"""Pruebas de la caché de claves derivadas (KeyDerivationCache)"""
+
+import pytest
+
+import stego_system
+from conftest import PASSWORD
+from stego_system import CryptoEngine, KeyDerivationCache, LSBSteganography
+
+SALT_A, SALT_B, SALT_C = b'a' * 16, b'b' * 16, b'c' * 16
+
+
+@pytest.fixture
+def derivations(monkeypatch):
+    """Sustituye PBKDF2 por una derivación instantánea y cuenta las llamadas"""
+    calls = []
+
+    def fake_derive(password, salt):
+        calls.append((password, salt))
+        return bytes([len(calls)]) * 32, len(calls)
+
+    monkeypatch.setattr(CryptoEngine, 'derive_key', staticmethod(fake_derive))
+    return calls
+
+
+def test_hits_return_the_derived_key(derivations):
+    cache = KeyDerivationCache()
+    first = cache.get_or_derive('clave', SALT_A)
+    assert cache.get_or_derive('clave', SALT_A) == first
+    assert cache.get_or_derive('otra', SALT_A) != first
+    assert cache.get_or_derive('clave', SALT_B) != first
+    assert len(derivations) == 3
+    assert cache.stats() == {'size': 3, 'hits': 1, 'misses': 3, 'evictions': 0, 'expirations': 0,
+                             'hit_rate': 0.25}
+
+
+def test_lru_eviction(derivations):
+    cache = KeyDerivationCache(max_entries=2)
+    cache.get_or_derive('clave', SALT_A)
+    cache.get_or_derive('clave', SALT_B)
+    cache.get_or_derive('clave', SALT_A)  # A pasa a ser la más reciente
+    cache.get_or_derive('clave', SALT_C)  # expulsa B
+    assert cache.stats()['evictions'] == 1
+    cache.get_or_derive('clave', SALT_A)
+    assert len(derivations) == 3
+    cache.get_or_derive('clave', SALT_B)
+    assert len(derivations) == 4
+
+
+def test_ttl_expiration(derivations, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(stego_system.time, 'monotonic', lambda: now[0])
+    cache = KeyDerivationCache(ttl_seconds=10)
+    cache.get_or_derive('clave', SALT_A)
+    now[0] += 5
+    cache.get_or_derive('clave', SALT_A)
+    now[0] += 20
+    cache.get_or_derive('clave', SALT_A)
+    assert len(derivations) == 2
+    assert cache.stats()['expirations'] == 1
+
+
+def test_clear_zeroizes_keys(derivations):
+    cache = KeyDerivationCache()
+    cache.get_or_derive('clave', SALT_A)
+    stored = [entry[0] for entry in cache._entries.values()]
+    cache.clear()
+    assert cache.stats()['size'] == 0
+    assert all(not any(key) for key in stored)
+
+
+def test_passwords_are_not_stored_in_clear(derivations):
+    cache = KeyDerivationCache()
+    cache.get_or_derive(PASSWORD, SALT_A)
+    assert all(PASSWORD.encode() not in key for key in cache._entries)
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        KeyDerivationCache(max_entries=0)
+
+
+def test_decode_reuses_cached_key(crypto, cover, tmp_path):
+    cache = KeyDerivationCache()
+    stego = LSBSteganography(crypto, key_cache=cache)
+    output = str(tmp_path / 'stego.png')
+    stego.encode(cover, b"clave en cache", output)
+    for _ in range(3):
+        assert stego.decode(output, PASSWORD) == b"clave en cache"
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['hits'] == 2
+    assert CryptoEngine(PASSWORD, crypto.salt, key_cache=cache).aes_key == crypto.aes_key
@@ -0,0 +1,88 @@
+"""Pruebas de los modos de ocultación multi-bit y con alfa (formato 2) y de plan_mode"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import make_cover
+from stego_system import EmbeddingMode, SteganographyConfig
+
+
+@pytest.mark.parametrize('bits_per_channel', [1, 2, 3, 4])
+def test_multibit_roundtrip(stego, cover, tmp_path, bits_per_channel):
+    output = str(tmp_path / 'stego.png')
+    message = bytes(range(256)) * 6
+    stats = stego.encode(cover, message, output, mode=EmbeddingMode(bits_per_channel=bits_per_channel))
+    # 1 LSB en RGB sigue en formato 1, legible por versiones anteriores
+    assert stats['format_version'] == (SteganographyConfig.FORMAT_VERSION_FEISTEL if bits_per_channel == 1
+                                       else SteganographyConfig.FORMAT_VERSION_MODES)
+    assert stego.decode(output, None) == message
+
+    with Image.open(output) as a, Image.open(cover) as b:
+        stego_pixels, cover_pixels = np.asarray(a), np.asarray(b)
+    # Solo cambian los k bits bajos de cada canal
+    assert np.array_equal(stego_pixels >> bits_per_channel, cover_pixels >> bits_per_channel)
+
+
+def test_alpha_mode_roundtrip(stego, rgba_cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    stego.encode(rgba_cover, b"canal alfa", output, mode=EmbeddingMode(bits_per_channel=2, use_alpha=True))
+    with Image.open(output) as img:
+        assert img.mode == 'RGBA'
+    assert stego.decode(output, None) == b"canal alfa"
+    assert stego.peek_header(output)['mode'] == EmbeddingMode(2, True)
+
+
+def test_alpha_mode_needs_alpha(stego, cover, tmp_path):
+    with pytest.raises(ValueError, match="alfa"):
+        stego.encode(cover, b"x", str(tmp_path / 'out.png'), mode=EmbeddingMode(use_alpha=True))
+
+
+def test_mode_byte_roundtrip():
+    for bits_per_channel in range(1, SteganographyConfig.MAX_BITS_PER_CHANNEL + 1):
+        for use_alpha in (False, True):
+            mode = EmbeddingMode(bits_per_channel, use_alpha)
+            assert EmbeddingMode.from_byte(mode.to_byte()) == mode
+    assert EmbeddingMode(4, True).to_byte() == 0b111
+    with pytest.raises(ValueError, match="Byte de modo"):
+        EmbeddingMode.from_byte(0x40)
+    with pytest.raises(ValueError, match="bits_per_channel"):
+        EmbeddingMode(bits_per_channel=5).validate()
+
+
+def test_plan_picks_the_cheapest_fitting_mode(stego, tmp_path):
+    rgb = make_cover(str(tmp_path / 'rgb.png'), width=64, height=64)
+    rgba = make_cover(str(tmp_path / 'rgba.png'), width=64, height=64, alpha=True)
+    one_bit_bytes = 64 * 64 * 3 // 8
+
+    small = stego.plan_mode(rgb, 100)
+    assert small['mode'] == EmbeddingMode() and small['format_version'] == SteganographyConfig.FORMAT_VERSION_FEISTEL
+
+    # No cabe con 1 bit en RGB: en RGBA basta con el alfa, en RGB hacen falta 2 bits
+    assert stego.plan_mode(rgba, one_bit_bytes)['mode'] == EmbeddingMode(1, True)
+    plan = stego.plan_mode(rgb, one_bit_bytes)
+    assert plan['mode'] == EmbeddingMode(2, False)
+    assert plan['bits_needed'] <= plan['capacity_bits']
+    assert stego.plan_mode(rgba, one_bit_bytes, allow_alpha=False)['mode'] == EmbeddingMode(2, False)
+
+    with pytest.raises(ValueError, match="Mensaje demasiado grande"):
+        stego.plan_mode(rgb, 64 * 64 * 3 * 4 // 8)
+
+
+def test_auto_mode_encodes_what_one_bit_cannot(stego, tmp_path):
+    cover = make_cover(str(tmp_path / 'small.png'), width=40, height=40)
+    output = str(tmp_path / 'stego.png')
+    message = b"m" * (40 * 40 * 3 // 8)
+    with pytest.raises(ValueError):
+        stego.encode(cover, message, output)
+    stats = stego.encode(cover, message, output, mode='auto')
+    assert stats['format_version'] == SteganographyConfig.FORMAT_VERSION_MODES
+    assert stego.decode(output, None) == message
+    with pytest.raises(ValueError, match="Modo desconocido"):
+        stego.encode(cover, message, output, mode='2bit')
+
+
+def test_legacy_format_rejects_modes(stego, cover, tmp_path):
+    with pytest.raises(ValueError, match="requieren el formato 2"):
+        stego.encode(cover, b"x", str(tmp_path / 'out.png'), format_version=SteganographyConfig.FORMAT_VERSION_LEGACY,
+                     mode=EmbeddingMode(bits_per_channel=2))
@@ -0,0 +1,47 @@
+"""Pruebas de la lectura solo del header (peek_header y decode con peek)"""
+
+import pytest
+
+from conftest import PASSWORD
+from stego_system import EmbeddingMode, LSBSteganography, SteganographyConfig
+
+
+@pytest.mark.parametrize('format_version, mode', [
+    (SteganographyConfig.FORMAT_VERSION_LEGACY, None),
+    (SteganographyConfig.FORMAT_VERSION_FEISTEL, None),
+    (SteganographyConfig.FORMAT_VERSION_MODES, EmbeddingMode(bits_per_channel=3)),
+    (SteganographyConfig.FORMAT_VERSION_STREAM, None),
+])
+def test_peek_header_fields(stego, cover, tmp_path, format_version, mode):
+    output = str(tmp_path / 'stego.png')
+    stego.encode(cover, b"cabecera", output, format_version=format_version, mode=mode)
+    header = stego.peek_header(output)
+    assert header['plausible']
+    assert header['format_version'] == format_version
+    assert header['salt'] == stego.crypto.salt
+    assert header['bits_needed'] <= header['capacity_bits']
+    if format_version in SteganographyConfig.MODE_FORMAT_VERSIONS:
+        assert header['mode'] == (mode or EmbeddingMode())
+        assert header['capacity_bits'] == stego._mode_capacity(96, 80, header['mode'])
+    else:
+        assert header['capacity_bits'] == 96 * 80 * 3
+
+
+def test_clean_cover_is_implausible(stego, cover):
+    header = stego.peek_header(cover)
+    assert not header['plausible']
+
+
+def test_decode_with_peek_skips_full_decode(stego, cover, monkeypatch):
+    def no_full_decode(*args, **kwargs):
+        raise AssertionError("decode no debería cargar la imagen completa")
+
+    monkeypatch.setattr(LSBSteganography, '_load_pixels', no_full_decode)
+    with pytest.raises(ValueError, match="Payload corrupto"):
+        stego.decode(cover, PASSWORD, peek=True)
+
+
+def test_decode_with_peek_accepts_valid_images(stego, cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    stego.encode(cover, b"con peek", output)
+    assert stego.decode(output, PASSWORD, peek=True) == b"con peek"
@@ -0,0 +1,88 @@
+"""Pruebas de la E/S de píxeles: buffers del pool, carga por franjas y peek_header"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import make_cover
+from stego_system import LSBSteganography, PixelBufferPool, SteganographyConfig
+
+
+def _covers(tmp_path) -> dict:
+    rng = np.random.default_rng(5)
+    rgb = rng.integers(0, 256, (70, 53, 3), dtype=np.uint8)
+    images = {
+        'rgb.png': Image.fromarray(rgb),
+        'rgba.png': Image.fromarray(np.dstack([rgb, rgb[:, :, 1]])),
+        'l.png': Image.fromarray(rgb[:, :, 0]),
+        'la.png': Image.fromarray(rgb[:, :, :2].copy(), 'LA'),
+        'p.png': Image.fromarray(rgb).convert('P', palette=Image.ADAPTIVE),
+        'cover.bmp': Image.fromarray(rgb),
+    }
+    paths = {}
+    for name, image in images.items():
+        paths[name] = str(tmp_path / name)
+        image.save(paths[name])
+    paths['interlaced.png'] = str(tmp_path / 'interlaced.png')
+    images['rgb.png'].save(paths['interlaced.png'], interlace=1)
+    return paths
+
+
+@pytest.mark.parametrize('keep_alpha', [False, True])
+def test_load_pixels_matches_pillow(crypto, tmp_path, monkeypatch, keep_alpha):
+    # Franjas pequeñas: varias franjas por imagen
+    monkeypatch.setattr(SteganographyConfig, 'DECODE_STRIP_BYTES', 53 * 4 * 7)
+    stego = LSBSteganography(crypto)
+    for name, path in _covers(tmp_path).items():
+        with Image.open(path) as img:
+            mode = 'RGBA' if keep_alpha and stego._has_alpha(img) else 'RGB'
+            expected = np.array(img.convert(mode))
+        pixels, buffer = stego._load_pixels(path, keep_alpha)
+        assert buffer.shape == (70, 53, 4)
+        assert np.shares_memory(pixels, buffer)
+        assert np.array_equal(pixels, expected), name
+
+
+def test_buffer_pool_is_reused(crypto, cover):
+    pool = PixelBufferPool()
+    stego = LSBSteganography(crypto, buffer_pool=pool)
+    _, first = stego._load_pixels(cover)
+    stego._release_pixels(first)
+    pixels, second = stego._load_pixels(cover)
+    assert second is first
+    assert pool.stats()['hits'] == 1 and pool.stats()['misses'] == 1
+    assert np.array_equal(pixels, np.array(Image.open(cover).convert('RGB')))
+
+
+@pytest.mark.parametrize('alpha', [False, True])
+def test_save_pixels_matches_pillow_output(stego, tmp_path, alpha):
+    cover = make_cover(str(tmp_path / 'cover.png'), alpha=alpha)
+    pixels, buffer = stego._load_pixels(cover, keep_alpha=alpha)
+    pixels[0, 0] ^= 1
+    stego._save_pixels(pixels, buffer, str(tmp_path / 'buffer.png'))
+    Image.fromarray(np.ascontiguousarray(pixels)).save(str(tmp_path / 'array.png'), 'PNG', compress_level=6)
+    assert (tmp_path / 'buffer.png').read_bytes() == (tmp_path / 'array.png').read_bytes()
+
+
+def test_rgba_save_is_a_view_of_the_buffer():
+    buffer = np.zeros((3, 4, 4), dtype=np.uint8)
+    image = LSBSteganography._image_over_buffer(buffer, 'RGBA')
+    buffer[1, 2] = (9, 8, 7, 6)
+    assert image.getpixel((2, 1)) == (9, 8, 7, 6)
+
+
+def test_peek_header_decodes_only_leading_rows(stego, tmp_path):
+    cover = make_cover(str(tmp_path / 'cover.png'), width=400, height=400)
+    output = str(tmp_path / 'stego.png')
+    stego.encode(cover, b"solo la cabecera", output, png_policy='store')
+    expected = stego.peek_header(output)
+    assert expected['plausible']
+
+    # Sin el final del IDAT la imagen no se puede decodificar entera, pero el header sí
+    data = open(output, 'rb').read()
+    truncated = tmp_path / 'truncated.png'
+    truncated.write_bytes(data[:len(data) // 4])
+    with pytest.raises((OSError, ValueError)):
+        stego._load_pixels(str(truncated))
+    header = stego.peek_header(str(truncated))
+    assert header == expected
@@ -0,0 +1,88 @@
+"""Pruebas del lector PNG por franjas (png_input.py)"""
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from png_input import iter_png_strips, png_strip_reader_supported, read_png_rows
+from png_output import FILTERS, write_png
+
+
+def _gradient(height: int = 45, width: int = 37) -> np.ndarray:
+    rng = np.random.default_rng(1)
+    base = (np.add.outer(np.arange(height) * 3, np.arange(width) * 5) % 256).astype(np.uint8)
+    return np.dstack([base, base[::-1], rng.integers(0, 256, base.shape, dtype=np.uint8)])
+
+
+def _variants(tmp_path) -> list:
+    rgb = _gradient()
+    paths = []
+
+    def save(name, image, **kwargs):
+        path = str(tmp_path / name)
+        image.save(path, **kwargs)
+        paths.append(path)
+
+    save('rgb.png', Image.fromarray(rgb))
+    save('rgba.png', Image.fromarray(np.dstack([rgb, rgb[:, :, 0]])))
+    save('l.png', Image.fromarray(rgb[:, :, 0]))
+    save('la.png', Image.fromarray(rgb[:, :, :2].copy(), 'LA'))
+    save('p.png', Image.fromarray(rgb).convert('P', palette=Image.ADAPTIVE))
+    for name in FILTERS:
+        path = str(tmp_path / f'filter_{name}.png')
+        write_png(rgb, path, 6, name, 1)
+        paths.append(path)
+    return paths
+
+
+@pytest.mark.parametrize('rows_per_strip', [1, 4, 16, 1000])
+def test_strips_match_full_decode(tmp_path, rows_per_strip):
+    for path in _variants(tmp_path):
+        assert png_strip_reader_supported(path)
+        full = np.array(Image.open(path))
+        strips = [np.array(strip) for strip in iter_png_strips(path, rows_per_strip)]
+        assert np.array_equal(np.concatenate(strips), full), path
+        assert all(len(s) <= rows_per_strip for s in strips)
+
+
+def test_max_rows_stops_early(tmp_path):
+    for path in _variants(tmp_path):
+        full = np.array(Image.open(path))
+        strips = list(iter_png_strips(path, 8, max_rows=10))
+        assert np.array_equal(np.concatenate([np.array(s) for s in strips]), full[:10])
+
+
+def test_read_png_rows(tmp_path):
+    path = _variants(tmp_path)[0]
+    rows, size = read_png_rows(path, 3)
+    assert size == (37, 45)
+    assert np.array_equal(rows, np.array(Image.open(path).convert('RGB'))[:3])
+
+
+def test_unsupported_formats_fall_back(tmp_path):
+    sixteen = str(tmp_path / 'gray16.png')
+    Image.fromarray((np.arange(60, dtype=np.uint16).reshape(6, 10) * 1000)).save(sixteen)
+    interlaced = str(tmp_path / 'interlaced.png')
+    Image.fromarray(_gradient()).save(interlaced, interlace=1)
+    bmp = str(tmp_path / 'cover.bmp')
+    Image.fromarray(_gradient()).save(bmp)
+
+    for path in (sixteen, bmp):
+        assert not png_strip_reader_supported(path)
+        with pytest.raises(ValueError):
+            next(iter_png_strips(path, 4))
+        rows, _ = read_png_rows(path, 2)
+        assert np.array_equal(rows, np.array(Image.open(path).convert('RGB'))[:2])
+    if not png_strip_reader_supported(interlaced):
+        rows, _ = read_png_rows(interlaced, 2)
+        assert np.array_equal(rows, np.array(Image.open(interlaced).convert('RGB'))[:2])
+
+
+def test_truncated_png_raises(tmp_path):
+    path = str(tmp_path / 'cut.png')
+    Image.fromarray(np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)).save(path)
+    data = open(path, 'rb').read()
+    with open(path, 'wb') as f:
+        f.write(data[:len(data) // 2])
+    with pytest.raises(ValueError):
+        list(iter_png_strips(path, 8))
@@ -0,0 +1,100 @@
+"""Pruebas de la política de salida PNG y del escritor paralelo (png_output.py)"""
+
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from png_output import FILTERS, PNG_PRESETS, PNGOutputPolicy, write_png
+
+
+def _pixels(height: int = 70, width: int = 90, channels: int = 3, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    # Mitad ruido, mitad degradado: los filtros tienen algo que predecir
+    pixels = rng.integers(0, 256, (height, width, channels), dtype=np.uint8)
+    pixels[:, width // 2:] = np.arange(width - width // 2, dtype=np.uint8)[None, :, None]
+    return pixels
+
+
+@pytest.mark.parametrize('channels', [3, 4])
+@pytest.mark.parametrize('filter', sorted(FILTERS))
+def test_every_filter_decodes_to_the_same_pixels(tmp_path, filter, channels):
+    pixels = _pixels(channels=channels)
+    output = str(tmp_path / 'out.png')
+    written = write_png(pixels, output, compress_level=6, filter=filter, workers=1)
+    with Image.open(output) as img:
+        assert img.mode == ('RGBA' if channels == 4 else 'RGB')
+        assert np.array_equal(np.asarray(img), pixels)
+    with open(output, 'rb') as f:
+        assert len(f.read()) == written
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_parallel_blocks_form_a_single_valid_stream(tmp_path, workers):
+    # Bloques de 32 KB: decenas de IDAT encadenados con diccionario y Adler-32 combinado
+    pixels = _pixels(height=600, width=200, seed=1)
+    output = str(tmp_path / 'out.png')
+    write_png(pixels, output, compress_level=6, filter='adaptive', workers=workers, chunk_bytes=1 << 15)
+    with Image.open(output) as img:
+        assert np.array_equal(np.asarray(img), pixels)
+
+    with open(output, 'rb') as f:
+        data = f.read()
+    idat, offset = b'', 8
+    while offset < len(data):
+        length = int.from_bytes(data[offset:offset + 4], 'big')
+        if data[offset + 4:offset + 8] == b'IDAT':
+            idat += data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+    raw = zlib.decompress(idat)  # Falla si el Adler-32 final no es correcto
+    assert len(raw) == 600 * (200 * 3 + 1)
+
+
+def test_store_level_is_uncompressed(tmp_path):
+    pixels = _pixels()
+    output = str(tmp_path / 'out.png')
+    written = write_png(pixels, output, compress_level=0, filter='none', workers=2)
+    assert written > pixels.nbytes
+    with Image.open(output) as img:
+        assert np.array_equal(np.asarray(img), pixels)
+
+
+@pytest.mark.parametrize('preset', sorted(PNG_PRESETS))
+def test_presets_keep_the_message(stego, cover, tmp_path, preset):
+    output = str(tmp_path / f'{preset}.png')
+    stego.encode(cover, b"mensaje", output, png_policy=preset)
+    assert stego.decode(output, None) == b"mensaje"
+    with Image.open(output) as a, Image.open(cover) as b:
+        assert np.array_equal(np.asarray(a) >> 1, np.asarray(b) >> 1)
+
+
+def test_default_policy_matches_pillow(stego, cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    stego.encode(cover, b"mensaje", output)
+    with Image.open(output) as img:
+        pixels = np.array(img)
+    pillow = str(tmp_path / 'pillow.png')
+    Image.fromarray(pixels).save(pillow, 'PNG', compress_level=6)
+    with open(output, 'rb') as a, open(pillow, 'rb') as b:
+        assert a.read() == b.read()
+
+
+def test_policy_resolution_and_validation():
+    assert PNGOutputPolicy.resolve(None) is PNG_PRESETS['default']
+    assert PNGOutputPolicy.resolve('small').compress_level == 9
+    custom = PNGOutputPolicy(compress_level=3, filter='up', workers=2)
+    assert PNGOutputPolicy.resolve(custom) is custom
+    assert PNG_PRESETS['default'].uses_pillow and not PNG_PRESETS['fast'].uses_pillow
+    with pytest.raises(ValueError, match="Preset PNG desconocido"):
+        PNGOutputPolicy.resolve('enorme')
+    with pytest.raises(ValueError, match="compress_level"):
+        PNGOutputPolicy(compress_level=10)
+    with pytest.raises(ValueError, match="Filtro desconocido"):
+        PNGOutputPolicy(filter='otro')
+    with pytest.raises(ValueError, match="workers"):
+        PNGOutputPolicy(workers=0)
+    with pytest.raises(ValueError, match="chunk_bytes"):
+        PNGOutputPolicy(chunk_bytes=1024)
+    with pytest.raises(ValueError, match="write_png espera"):
+        write_png(np.zeros((4, 4), dtype=np.uint8), 'no_se_escribe.png')
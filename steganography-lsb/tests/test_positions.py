@@ -0,0 +1,136 @@
+"""Pruebas de los generadores de posiciones (formato 1 y POSITION_GENERATORS)"""
+
+import hashlib
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from stego_system import (POSITION_GENERATORS, EmbeddingMode, FeistelKeyPositionGenerator, FeistelPositionGenerator,
+                          SteganographyConfig, position_generator)
+
+
+@pytest.mark.parametrize('generator_id', sorted(POSITION_GENERATORS))
+def test_permute_is_permutation(crypto, generator_id):
+    generator = position_generator(generator_id, crypto)
+    domain = 10_007
+    values = generator.permute(domain, 0, domain)
+    assert values.dtype == np.int64
+    assert np.array_equal(np.sort(values), np.arange(domain))
+
+
+@pytest.mark.parametrize('generator_id', sorted(POSITION_GENERATORS))
+def test_offsets_continue_the_stream(crypto, generator_id, monkeypatch):
+    generator = position_generator(generator_id, crypto)
+    domain = 50_000
+    full = generator.permute(domain, 0, domain)
+    assert np.array_equal(generator.permute(domain, 1234, 5000), full[1234:6234])
+
+    # Por tramos pequeños, en serie o con hilos, el flujo es el mismo
+    monkeypatch.setattr(SteganographyConfig, 'POSITION_CHUNK', 4096)
+    chunked = position_generator(generator_id, crypto)
+    assert np.array_equal(chunked.permute(domain, 0, domain), full)
+    assert np.array_equal(chunked.permute(domain, 0, domain, workers=3), full)
+
+
+def test_feistel_stream_is_stable():
+    # Valores fijados por la especificación del flujo (README, sección 3.4)
+    generator = FeistelPositionGenerator(b'', 1234)
+    reference = FeistelPositionGenerator.feistel_permute(np.arange(8, dtype=np.uint64), 12,
+                                                         generator.round_keys())
+    expected = []
+    for value in range(8):
+        left, right = value >> 12, value & 0xFFF
+        for key in generator.round_keys().tolist():
+            f = (right ^ key) & 0xFFFFFFFFFFFFFFFF
+            f ^= f >> 33
+            f = (f * 0xFF51AFD7ED558CCD) & 0xFFFFFFFFFFFFFFFF
+            f ^= f >> 33
+            f = (f * 0xC4CEB9FE1A85EC53) & 0xFFFFFFFFFFFFFFFF
+            f ^= f >> 33
+            left, right = right, left ^ (f & 0xFFF)
+        expected.append((left << 12) | right)
+    assert reference.tolist() == expected
+
+
+def test_feistel_working_memory_does_not_grow_with_count(monkeypatch):
+    monkeypatch.setattr(SteganographyConfig, 'POSITION_CHUNK', 1 << 16)
+    generator = FeistelPositionGenerator(b'', 99)
+    count = 2_000_000
+    tracemalloc.start()
+    try:
+        generator.permute(count, 0, count)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # Salida int64 más los buffers de un tramo
+    assert peak < count * 8 + 64 * SteganographyConfig.POSITION_CHUNK * 8
+
+
+def test_format1_positions_skip_header_and_are_unique(stego):
+    capacity = 30_000
+    header_salt_bits = (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE) * 8
+    positions = stego._select_positions(capacity, 5000, stego.crypto.prng_seed,
+                                        SteganographyConfig.FORMAT_VERSION_FEISTEL)
+    assert np.array_equal(positions[:header_salt_bits], np.arange(header_salt_bits))
+    assert len(np.unique(positions)) == 5000
+    assert positions.max() < capacity
+
+
+def test_legacy_positions_match_full_shuffle(stego):
+    capacity = 20_000
+    seed = stego.crypto.prng_seed
+    header_salt_bits = (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE) * 8
+    positions = stego._select_positions(capacity, 3000, seed, SteganographyConfig.FORMAT_VERSION_LEGACY)
+    pool = np.arange(capacity)
+    np.random.RandomState(seed).shuffle(pool)
+    expected = pool[pool >= header_salt_bits][:3000 - header_salt_bits]
+    assert np.array_equal(positions[header_salt_bits:], expected)
+
+
+def test_feistel256_round_keys_follow_the_spec():
+    aes_key = bytes(range(32))
+    keys = FeistelKeyPositionGenerator(aes_key, 0).round_keys().tolist()
+    assert keys == [int.from_bytes(hashlib.sha256(b'posiciones' + aes_key + bytes([i])).digest()[:8], 'big')
+                    for i in range(SteganographyConfig.FEISTEL_ROUNDS)]
+    # No depende del seed de 32 bits
+    assert FeistelKeyPositionGenerator(aes_key, 12345).round_keys().tolist() == keys
+
+
+def test_randomstate_generator_is_the_legacy_permutation(crypto):
+    domain = 5000
+    expected = np.random.RandomState(crypto.prng_seed).permutation(domain)
+    assert np.array_equal(position_generator(2, crypto).permute(domain, 100, 900), expected[100:1000])
+
+
+@pytest.mark.parametrize('generator_id', sorted(POSITION_GENERATORS))
+@pytest.mark.parametrize('stream', [False, True])
+def test_roundtrip_with_each_generator(stego, cover, tmp_path, generator_id, stream):
+    output = str(tmp_path / 'stego.png')
+    message = bytes(range(256)) * 4
+    mode = EmbeddingMode(bits_per_channel=2, generator=generator_id)
+    if stream:
+        stego.encode_stream(cover, message, output, mode=mode, segment_size=300)
+    else:
+        stego.encode(cover, message, output, mode=mode)
+    assert stego.peek_header(output)['mode'] == mode
+    assert stego.decode(output, None) == message
+
+
+def test_one_bit_with_another_generator_uses_format_2(stego, cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    stats = stego.encode(cover, b"mensaje", output, mode=EmbeddingMode(generator=1))
+    assert stats['format_version'] == SteganographyConfig.FORMAT_VERSION_MODES
+    assert stego.plan_mode(cover, 7, generator=1)['format_version'] == SteganographyConfig.FORMAT_VERSION_MODES
+    assert EmbeddingMode.from_byte(EmbeddingMode(3, True, 2).to_byte()) == EmbeddingMode(3, True, 2)
+
+
+def test_unknown_generator(crypto, stego, cover):
+    with pytest.raises(ValueError, match="Generador de posiciones desconocido"):
+        position_generator(7, crypto)
+    with pytest.raises(ValueError, match="Generador de posiciones desconocido"):
+        EmbeddingMode.from_byte(7 << 3)
+    with pytest.raises(ValueError, match="Generador de posiciones desconocido"):
+        stego.plan_mode(cover, 10, generator=5)
+    with pytest.raises(ValueError, match="Se piden"):
+        position_generator(0, crypto).permute(100, 90, 20)
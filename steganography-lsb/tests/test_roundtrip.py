@@ -0,0 +1,105 @@
+"""Pruebas de ida y vuelta de encode/decode y del motor vectorizado de bits"""
+
+import struct
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from benchmark import _legacy_embed, _legacy_extract
+from conftest import PASSWORD, make_cover
+from stego_system import CryptoEngine, LSBSteganography, SteganographyConfig
+
+HEADER_SALT_BITS = (SteganographyConfig.HEADER_SIZE_BYTES + SteganographyConfig.KDF_SALT_SIZE) * 8
+
+
+def _legacy_positions(capacity: int, total_bits: int, seed: int) -> np.ndarray:
+    """Posiciones del formato 0 tal como las calculaba el decodificador original"""
+    pool = np.arange(capacity)
+    np.random.RandomState(seed).shuffle(pool)
+    random_positions = [p for p in pool if p >= HEADER_SALT_BITS][:total_bits - HEADER_SALT_BITS]
+    return np.array(list(range(HEADER_SALT_BITS)) + random_positions, dtype=np.int64)
+
+
+def _legacy_decode(image_path: str, password: str) -> bytes:
+    """Decodificador escalar original del formato 0 (bucles y cadenas de bits)"""
+    pixels = np.array(Image.open(image_path).convert('RGB'))
+    header_salt = _legacy_extract(pixels, np.arange(HEADER_SALT_BITS))
+    total_length = struct.unpack('>I', header_salt[:4])[0]
+    crypto = CryptoEngine(password, header_salt[4:])
+    positions = _legacy_positions(pixels.size, (4 + total_length) * 8, crypto.prng_seed)
+    payload = _legacy_extract(pixels, positions)[4:]
+    nonce, tag, ciphertext = payload[20:32], payload[32:48], payload[48:]
+    return crypto.decrypt(nonce, ciphertext, tag)
+
+
+@pytest.mark.parametrize('message', [b"", b"x", "mensaje con acentos: ñandú".encode(), bytes(range(256)) * 4])
+@pytest.mark.parametrize('format_version', [SteganographyConfig.FORMAT_VERSION_LEGACY,
+                                            SteganographyConfig.FORMAT_VERSION_FEISTEL])
+def test_roundtrip(stego, cover, tmp_path, format_version, message):
+    output = str(tmp_path / 'stego.png')
+    stats = stego.encode(cover, message, output, format_version=format_version)
+    assert isinstance(stats, dict)
+    assert stego.decode(output, PASSWORD) == message
+    assert stego.decode(output, None) == message
+
+
+def test_only_lsbs_change(stego, cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    stego.encode(cover, b"a" * 200, output)
+    before = np.array(Image.open(cover)).astype(np.int16)
+    after = np.array(Image.open(output)).astype(np.int16)
+    assert np.abs(after - before).max() == 1
+
+
+def test_format0_matches_original_decoder(stego, cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    message = b"compatibilidad con el formato 0" * 10
+    stego.encode(cover, message, output, format_version=SteganographyConfig.FORMAT_VERSION_LEGACY)
+    assert _legacy_decode(output, PASSWORD) == message
+
+
+def test_original_encoder_output_still_decodes(stego, cover, tmp_path):
+    # Imagen escrita con el bucle escalar original: las mismas posiciones y los mismos bits
+    message = b"imagen antigua"
+    payload = stego._build_payload(message)
+    full_payload = struct.pack('>I', len(payload)) + payload
+    pixels = np.array(Image.open(cover).convert('RGB'))
+    positions = _legacy_positions(pixels.size, len(full_payload) * 8, stego.crypto.prng_seed)
+    _legacy_embed(pixels, positions, full_payload)
+    output = str(tmp_path / 'legacy.png')
+    Image.fromarray(pixels).save(output)
+    assert stego.decode(output, PASSWORD) == message
+
+
+@pytest.mark.parametrize('channels', [3, 4])
+def test_vectorized_engine_matches_scalar_loop(channels):
+    rng = np.random.default_rng(7)
+    buffer = rng.integers(0, 256, (40, 30, 4), dtype=np.uint8)
+    # Con 3 canales, vista RGB no contigua de un buffer RGBX, como en _load_pixels
+    pixels = buffer[:, :, :3] if channels == 3 else buffer
+    capacity = 40 * 30 * channels
+    payload = rng.bytes(capacity // 16)
+    positions = rng.permutation(capacity)[:len(payload) * 8]
+
+    expected = np.array(pixels)
+    LSBSteganography._embed_bits(pixels, positions, LSBSteganography._bytes_to_bits(payload))
+    extracted = LSBSteganography._extract_bits(pixels, positions)
+    assert LSBSteganography._bits_to_bytes(extracted) == payload
+    if channels == 3:
+        _legacy_embed(expected, positions, payload)
+        assert np.array_equal(pixels, expected)
+        assert _legacy_extract(expected, positions) == payload
+
+
+def test_message_too_large(stego, tmp_path):
+    cover = make_cover(str(tmp_path / 'small.png'), width=16, height=16)
+    with pytest.raises(ValueError, match="demasiado grande"):
+        stego.encode(cover, b"x" * 200, str(tmp_path / 'out.png'))
+
+
+def test_wrong_password_fails(stego, cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    stego.encode(cover, b"secreto", output)
+    with pytest.raises(ValueError):
+        stego.decode(output, "otra contraseña")
@@ -0,0 +1,59 @@
+"""Pruebas de la búsqueda paralela en carpetas (search.py)"""
+
+import pytest
+
+from conftest import PASSWORD, make_cover
+from search import _CachedPositionsStego, _SearchWorker, find_hidden_message, list_candidate_images
+from stego_system import KeyDerivationCache, SteganographyConfig
+
+
+@pytest.fixture
+def folder(stego, tmp_path):
+    for i in range(6):
+        make_cover(str(tmp_path / f'img_{i}.png'), seed=i)
+    (tmp_path / 'notes.txt').write_text("no es una imagen")
+    (tmp_path / 'broken.png').write_bytes(b'no es un png')
+    stego.encode(str(tmp_path / 'img_4.png'), b"aqui esta", str(tmp_path / 'img_4.png'))
+    return tmp_path
+
+
+@pytest.mark.parametrize('use_processes', [False, True])
+def test_finds_the_message(folder, use_processes):
+    result = find_hidden_message(str(folder), PASSWORD, workers=2, use_processes=use_processes)
+    assert result['image'] == str(folder / 'img_4.png')
+    assert result['message'] == b"aqui esta"
+    assert result['total'] == 7
+    assert 1 <= result['scanned'] <= result['total']
+
+
+def test_wrong_password_finds_nothing(folder):
+    assert find_hidden_message(str(folder), "otra contraseña", workers=2, use_processes=False) is None
+
+
+def test_candidates_are_sorted_pngs(folder):
+    names = [p.rsplit('/', 1)[-1] for p in list_candidate_images(str(folder))]
+    assert names == ['broken.png'] + [f'img_{i}.png' for i in range(6)]
+
+
+def test_worker_rejects_covers_without_pbkdf2(folder):
+    worker = _SearchWorker(PASSWORD)
+    assert worker.try_image(str(folder / 'img_0.png')) is None
+    assert worker.try_image(str(folder / 'broken.png')) is None
+    # El header implausible se descarta antes de derivar ninguna clave
+    assert worker.key_cache.stats()['misses'] == 0
+    assert worker.try_image(str(folder / 'img_4.png')) == b"aqui esta"
+    assert worker.key_cache.stats()['misses'] == 1
+
+
+def test_legacy_permutation_is_cached(crypto, tmp_path):
+    stego = _CachedPositionsStego(crypto, KeyDerivationCache())
+    paths = []
+    for i in range(2):
+        path = make_cover(str(tmp_path / f'img_{i}.png'), seed=i)
+        stego.encode(path, b"formato 0", path, format_version=SteganographyConfig.FORMAT_VERSION_LEGACY)
+        paths.append(path)
+    first = stego._generate_position_pool_with_seed(96 * 80 * 3, crypto.prng_seed)
+    assert stego._generate_position_pool_with_seed(96 * 80 * 3, crypto.prng_seed) is first
+    worker = _SearchWorker(PASSWORD)
+    assert [worker.try_image(p) for p in paths] == [b"formato 0"] * 2
+    assert len(worker.stego._pools) == 1
@@ -0,0 +1,102 @@
+"""Pruebas de los mensajes repartidos entre varias portadas (sharding.py, formato 4)"""
+
+import os
+
+import pytest
+
+from conftest import PASSWORD, make_cover
+from sharding import build_shards, decode_sharded, encode_sharded, join_shards, plan_shards, split_sizes
+from stego_system import SHARD_DECODE_ERROR, SHARD_ENCODE_ERROR, EmbeddingMode, SteganographyConfig
+
+
+@pytest.fixture
+def covers(tmp_path):
+    # Tamaños distintos: los trozos se reparten en proporción a la capacidad
+    sizes = [(96, 80), (64, 64), (120, 50)]
+    return [make_cover(str(tmp_path / f'cover_{i}.png'), width=w, height=h, seed=i) for i, (w, h) in enumerate(sizes)]
+
+
+def _outputs(tmp_path, count):
+    return [str(tmp_path / f'shard_{i}.png') for i in range(count)]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_sharded_roundtrip(stego, covers, tmp_path, workers):
+    # Mayor que la capacidad de cualquier portada por separado
+    message = os.urandom(3000)
+    outputs = _outputs(tmp_path, len(covers))
+    stats = encode_sharded(stego, covers, message, outputs, workers=workers)
+    assert stats['shard_count'] == 3 and stats['bits_per_channel'] == 1
+    assert [s['job_index'] for s in stats['shards']] == [0, 1, 2]
+    for output in outputs:
+        assert stego.peek_header(output)['format_version'] == SteganographyConfig.FORMAT_VERSION_SHARD
+
+    # En cualquier orden
+    assert decode_sharded(outputs[::-1], PASSWORD, workers=workers) == message
+
+
+def test_sharded_auto_mode(stego, covers, tmp_path):
+    message = os.urandom(8000)
+    outputs = _outputs(tmp_path, len(covers))
+    with pytest.raises(ValueError, match="Mensaje demasiado grande"):
+        plan_shards(covers, len(message))
+    stats = encode_sharded(stego, covers, message, outputs, mode='auto', workers=1)
+    assert stats['bits_per_channel'] == 2
+    assert decode_sharded(outputs, PASSWORD, workers=1) == message
+
+
+def test_missing_foreign_and_wrong_password(stego, covers, tmp_path):
+    message = os.urandom(2000)
+    outputs = _outputs(tmp_path, len(covers))
+    encode_sharded(stego, covers, message, outputs, workers=1)
+
+    with pytest.raises(ValueError, match=r"faltan \[1\]"):
+        decode_sharded([outputs[0], outputs[2]], PASSWORD, workers=1)
+    with pytest.raises(ValueError, match="Contraseña incorrecta"):
+        decode_sharded(outputs, "otra contraseña", workers=1)
+
+    # Un fragmento de otro conjunto con la misma clave
+    other = _outputs(tmp_path / 'otro', len(covers))
+    os.makedirs(tmp_path / 'otro')
+    encode_sharded(stego, covers, message, other, workers=1)
+    with pytest.raises(ValueError, match="conjuntos distintos"):
+        decode_sharded([outputs[0], other[1], outputs[2]], PASSWORD, workers=1)
+
+
+def test_chain_points_at_the_damaged_shard():
+    sealed = os.urandom(300)
+    set_id = os.urandom(SteganographyConfig.SHARD_SET_ID_SIZE)
+    shards = build_shards(sealed, [100, 120, 80], set_id)
+    assert join_shards(shards[::-1]) == (sealed, set_id, 3)
+
+    damaged = list(shards)
+    damaged[1] = damaged[1][:-1] + bytes([damaged[1][-1] ^ 1])
+    with pytest.raises(ValueError, match="Fragmento 1 corrupto"):
+        join_shards(damaged)
+    with pytest.raises(ValueError, match="repetidos"):
+        join_shards(shards + [shards[2]])
+
+
+def test_split_sizes_is_proportional():
+    assert split_sizes(100, [300, 100, 100]) == [60, 20, 20]
+    assert sum(split_sizes(101, [70, 110, 130])) == 101
+    with pytest.raises(ValueError, match="Mensaje demasiado grande"):
+        split_sizes(32, [10, 20])
+
+
+def test_format_4_stays_out_of_encode_and_decode(stego, covers, tmp_path):
+    with pytest.raises(ValueError, match=SHARD_ENCODE_ERROR):
+        stego.encode(covers[0], b"x", str(tmp_path / 'out.png'), format_version=SteganographyConfig.FORMAT_VERSION_SHARD)
+
+    outputs = _outputs(tmp_path, len(covers))
+    encode_sharded(stego, covers, b"mensaje repartido", outputs, workers=1)
+    with pytest.raises(ValueError, match=r"formato 4\): use sharding"):
+        stego.decode(outputs[0], None)
+    assert SHARD_DECODE_ERROR.startswith("La imagen es un fragmento")
+
+    single = str(tmp_path / 'single.png')
+    stego.encode(covers[0], b"x", single)
+    with pytest.raises(ValueError, match="no es un fragmento"):
+        decode_sharded([single], PASSWORD, workers=1)
+    with pytest.raises(ValueError, match="alfa"):
+        plan_shards(covers, 10, EmbeddingMode(use_alpha=True))
@@ -0,0 +1,214 @@
+"""Pruebas de estegoanálisis (steganalysis.py)"""
+
+import csv
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from conftest import PASSWORD, SCRIPTS_DIR, make_cover
+from stego_system import EmbeddingMode
+from steganalysis import (CHANNELS, DETECTORS, analyze, analyze_fields, analyze_to_csv, chi_square_attack,
+                          keyed_order, rs_analyze, rs_analyze_directory)
+
+
+def _rs_reference(pixels: np.ndarray) -> dict:
+    """RS directo: bloques de 4 píxeles, máscara [0, 1, 1, 0], F1 y F−1 explícitos"""
+    width = pixels.shape[1] - pixels.shape[1] % 4
+    results = {}
+    for c, color in enumerate(CHANNELS):
+        blocks = pixels[:, :width, c].astype(np.int16).reshape(-1, 4)
+        flipped = blocks.copy()
+        flipped[:, 1:3] ^= 1
+        shifted = blocks.copy()
+        shifted[:, 1:3] = ((shifted[:, 1:3] + 1) ^ 1) - 1
+
+        def f(b):
+            return np.abs(np.diff(b, axis=1)).sum(axis=1)
+
+        base = f(blocks)
+        Rm, Sm = np.count_nonzero(f(flipped) > base), np.count_nonzero(f(flipped) < base)
+        R_m, S_m = np.count_nonzero(f(shifted) > base), np.count_nonzero(f(shifted) < base)
+        total = len(blocks)
+        results[color] = {'Rm': Rm / total * 100, 'Sm': Sm / total * 100, 'R_m': R_m / total * 100,
+                          'S_m': S_m / total * 100, 'Diff': abs(Rm - Sm) / total * 100, 'blocks': total}
+    return results
+
+
+def _smooth_cover(path: str, height: int = 64, width: int = 90) -> str:
+    rng = np.random.default_rng(3)
+    base = np.add.outer(np.arange(height), np.arange(width)) % 200
+    pixels = np.clip(base[:, :, None] + rng.integers(0, 6, (height, width, 3)), 0, 255).astype(np.uint8)
+    Image.fromarray(pixels).save(path)
+    return path
+
+
+def test_rs_matches_reference_for_every_input_kind(tmp_path):
+    path = _smooth_cover(str(tmp_path / 'cover.png'))
+    pixels = np.array(Image.open(path))
+    expected = _rs_reference(pixels)
+    for source in (path, Image.open(path), pixels):
+        # Franjas de una sola fila: fuerza muchas franjas y el enlace entre ellas
+        result = rs_analyze(source, max_tile_bytes=1)
+        for color in CHANNELS:
+            for key, value in expected[color].items():
+                assert result[color][key] == pytest.approx(value)
+
+
+def test_rs_flags_full_lsb_embedding(tmp_path):
+    path = _smooth_cover(str(tmp_path / 'cover.png'), 128, 128)
+    pixels = np.array(Image.open(path))
+    rng = np.random.default_rng(0)
+    stego = (pixels & 0xFE) | rng.integers(0, 2, pixels.shape, dtype=np.uint8)
+    clean, embedded = rs_analyze(pixels), rs_analyze(stego)
+    # Con LSB aleatorio en todos los píxeles Rm ≈ Sm y la diferencia con R−m/S−m crece
+    for color in CHANNELS:
+        gap_clean = abs(clean[color]['R_m'] - clean[color]['Rm'])
+        gap_stego = abs(embedded[color]['R_m'] - embedded[color]['Rm'])
+        assert gap_stego > gap_clean
+
+
+def test_rs_unreadable_path_returns_none(tmp_path):
+    broken = tmp_path / 'broken.png'
+    broken.write_bytes(b'\x89PNG\r\n\x1a\n' + b'\x00' * 20)
+    assert rs_analyze(str(broken)) is None
+    assert rs_analyze(str(tmp_path / 'missing.png')) is None
+
+
+def test_rs_directory_is_sorted(tmp_path):
+    for i in range(3):
+        make_cover(str(tmp_path / f'img_{i}.png'), seed=i)
+    table = rs_analyze_directory(str(tmp_path), workers=2)
+    assert len(table) == 3 * len(CHANNELS)
+    diffs = [row['Diff'] for row in table]
+    assert diffs == sorted(diffs, reverse=True)
+
+
+_PEAK_SCRIPT = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from benchmark import _peak_rss_call
+from PIL import Image
+from steganalysis import rs_analyze
+path, kind = sys.argv[2], sys.argv[3]
+if kind == 'path':
+    _, peak = _peak_rss_call(lambda: rs_analyze(path, 1 << 20))
+else:
+    _, peak = _peak_rss_call(lambda: rs_analyze(Image.open(path), 1 << 20))
+print(json.dumps(peak))
+"""
+
+
+@pytest.mark.skipif(not os.path.exists('/proc/self/clear_refs'), reason="requiere /proc (Linux)")
+def test_rs_path_peak_memory_is_bounded_by_tile(tmp_path):
+    path = str(tmp_path / 'large.png')
+    rng = np.random.default_rng(0)
+    Image.fromarray(rng.integers(0, 256, (2000, 3000, 3), dtype=np.uint8)).save(path, compress_level=1)
+    frame_mb = 2000 * 3000 * 4 / 2**20
+
+    def peak(kind: str) -> float:
+        output = subprocess.run([sys.executable, '-c', _PEAK_SCRIPT, SCRIPTS_DIR, path, kind],
+                                capture_output=True, text=True, check=True).stdout
+        return json.loads(output)
+
+    assert peak('image') > frame_mb * 0.8
+    assert peak('path') < frame_mb / 4
+
+
+def _paired_cover(path: str, size: int = 200) -> str:
+    """Portada con parejas (2k, 2k+1) desiguales: el 80 % de los valores son pares"""
+    rng = np.random.default_rng(0)
+    pixels = (rng.integers(0, 128, (size, size, 3)) * 2).astype(np.uint8)
+    pixels |= (rng.random(pixels.shape) < 0.2).astype(np.uint8)
+    Image.fromarray(pixels).save(path)
+    return path
+
+
+@pytest.mark.parametrize('mode', [None, EmbeddingMode(bits_per_channel=2)])
+def test_keyed_order_follows_the_embedding(stego, tmp_path, mode):
+    cover = _paired_cover(str(tmp_path / 'cover.png'))
+    output = str(tmp_path / 'stego.png')
+    capacity = 200 * 200 * 3
+    message = np.random.default_rng(1).bytes(capacity * 3 // 80 - 100)
+    stego.encode(cover, message, output, png_policy='store', mode=mode)
+
+    order = keyed_order(output, PASSWORD, verify=True)
+    assert np.array_equal(np.sort(order), np.arange(capacity))
+    # En orden con clave el payload ocupa el prefijo; en orden de lectura está disperso
+    keyed = chi_square_attack(output, order)['estimated_rate']
+    assert keyed > 0.1
+    assert keyed > chi_square_attack(output)['estimated_rate']
+
+
+def test_keyed_order_rejects_images_without_embedding(stego, tmp_path):
+    cover = _paired_cover(str(tmp_path / 'cover.png'))
+    with pytest.raises(ValueError, match="No hay inserción en la imagen"):
+        keyed_order(cover, PASSWORD)
+
+    output = str(tmp_path / 'stego.png')
+    stego.encode(cover, b"mensaje", output, png_policy='store')
+    keyed_order(output, "otra contraseña")
+    with pytest.raises(ValueError, match="No hay inserción con esta contraseña"):
+        keyed_order(output, "otra contraseña", verify=True)
+
+
+def _pipeline_folder(tmp_path) -> list:
+    paths = [make_cover(str(tmp_path / f'img_{i}.png'), width=64, height=48, seed=i) for i in range(4)]
+    broken = tmp_path / 'broken.png'
+    broken.write_bytes(b'no es un png')
+    return paths + [str(broken)]
+
+
+def _without_timings(row: dict) -> dict:
+    return {k: v for k, v in row.items() if not k.endswith('_s') and k != 'error'}
+
+
+def test_pipeline_rows_match_standalone_detectors(tmp_path):
+    paths = _pipeline_folder(tmp_path)
+    rows = sorted(analyze(paths, workers=1), key=lambda r: r['index'])
+    assert [r['image'] for r in rows] == paths
+    assert 'error' in rows[-1]
+
+    for row, path in zip(rows[:-1], paths):
+        pixels = np.array(Image.open(path).convert('RGB'))
+        assert (row['width'], row['height']) == (64, 48)
+        # Estadístico del notebook con el bucle directo
+        assert row['chi_square'] == pytest.approx(float(np.sum((pixels & 1) - 0.5) ** 2))
+        hist = np.bincount(pixels[:, :, 1].ravel(), minlength=256)
+        assert row['hist_Green_pair_imbalance'] == pytest.approx(
+            np.abs(hist[0::2] - hist[1::2]).sum() / hist.sum())
+        assert row['rs_Blue_Diff'] == pytest.approx(rs_analyze(pixels)['Blue']['Diff'])
+        assert set(row) <= set(analyze_fields())
+
+
+def test_pipeline_process_pool_matches_serial(tmp_path):
+    paths = _pipeline_folder(tmp_path)
+    serial = {r['index']: _without_timings(r) for r in analyze(paths, workers=1)}
+    parallel = {r['index']: _without_timings(r) for r in analyze(iter(paths), workers=2)}
+    assert parallel == serial
+
+
+def test_pipeline_detector_subset_and_unknown(tmp_path):
+    paths = _pipeline_folder(tmp_path)[:1]
+    row = next(analyze(paths, detectors=['histogram'], workers=1))
+    assert 'chi_square' not in row and 'hist_Red_pair_imbalance' in row
+    with pytest.raises(ValueError, match="Detectores desconocidos"):
+        list(analyze(paths, detectors=['otro']))
+
+
+def test_analyze_to_csv(tmp_path):
+    paths = _pipeline_folder(tmp_path)
+    csv_path = str(tmp_path / 'out.csv')
+    summary = analyze_to_csv(paths, csv_path, detectors=['chi_square', 'rs'], workers=1)
+    assert summary['images'] == 5 and summary['errors'] == 1
+    assert set(summary) == {'images', 'errors', 'elapsed', 'decode_s', 'chi_square_s', 'rs_s'}
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    assert reader.fieldnames == analyze_fields(['chi_square', 'rs'])
+    assert len(rows) == 5
+    assert sorted(DETECTORS) == ['chi_square', 'chi_square_pairs', 'histogram', 'rs']
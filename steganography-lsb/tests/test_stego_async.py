@@ -0,0 +1,141 @@
+"""Pruebas del servicio asíncrono (stego_async.py)"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from stego_async import AsyncStegoService, LatencyHistogram
+from stego_system import LSBSteganography
+
+SLOW_SECONDS = 0.5
+
+
+class SlowStego(LSBSteganography):
+    """peek_header bloquea SLOW_SECONDS (simula una operación de CPU larga)"""
+
+    def __init__(self, crypto):
+        super().__init__(crypto)
+        self.started = threading.Event()
+
+    def peek_header(self, image_path):
+        self.started.set()
+        time.sleep(SLOW_SECONDS)
+        return super().peek_header(image_path)
+
+
+async def _wait_started(stego: SlowStego) -> None:
+    await asyncio.to_thread(stego.started.wait, 5)
+
+
+def test_roundtrip_thread_pool(stego, cover, tmp_path):
+    async def run():
+        async with AsyncStegoService(stego, workers=2) as service:
+            outputs = [str(tmp_path / f"out_{i}.png") for i in range(4)]
+            await asyncio.gather(*(service.encode_async(cover, f"m{i}".encode(), out, png_policy='fast')
+                                   for i, out in enumerate(outputs)))
+            messages = await asyncio.gather(*(service.decode_async(out, None) for out in outputs))
+            return messages, service.stats()
+
+    messages, stats = asyncio.run(run())
+    assert messages == [f"m{i}".encode() for i in range(4)]
+    assert stats['completed'] == 8
+    assert stats['latency']['decode_total']['count'] == 4
+
+
+def test_operation_errors_propagate(stego, cover):
+    async def run():
+        async with AsyncStegoService(stego, workers=1) as service:
+            with pytest.raises(ValueError):
+                await service.decode_async(cover, "otra contraseña")
+            return service.stats()
+
+    assert asyncio.run(run())['failed'] == 1
+
+
+def test_reject_when_full(crypto, cover):
+    stego = SlowStego(crypto)
+
+    async def run():
+        async with AsyncStegoService(stego, workers=1, max_queue=1, reject_when_full=True) as service:
+            running = asyncio.create_task(service.peek_header_async(cover))
+            await _wait_started(stego)
+            queued = asyncio.create_task(service.peek_header_async(cover))
+            await asyncio.sleep(0)
+            with pytest.raises(asyncio.QueueFull):
+                await service.peek_header_async(cover)
+            await asyncio.gather(running, queued)
+            return service.stats()
+
+    counters = asyncio.run(run())
+    assert counters['rejected'] == 1
+    assert counters['completed'] == 2
+
+
+def test_timeout_skips_queued_request(crypto, cover):
+    stego = SlowStego(crypto)
+
+    async def run():
+        async with AsyncStegoService(stego, workers=1) as service:
+            running = asyncio.create_task(service.peek_header_async(cover))
+            await _wait_started(stego)
+            with pytest.raises(asyncio.TimeoutError):
+                await service.peek_header_async(cover, timeout=0.05)
+            await running
+            await asyncio.sleep(0.05)
+            return service.stats()
+
+    counters = asyncio.run(run())
+    assert counters['timeouts'] == 1
+    assert counters['skipped'] == 1
+    assert counters['completed'] == 1
+
+
+def test_close_cancels_pending_without_blocking_loop(crypto, cover):
+    stego = SlowStego(crypto)
+
+    async def run():
+        service = AsyncStegoService(stego, workers=1)
+        service.start()
+        tasks = [asyncio.create_task(service.peek_header_async(cover)) for _ in range(3)]
+        await _wait_started(stego)
+
+        lags = []
+
+        async def heartbeat():
+            while True:
+                before = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - before - 0.01)
+
+        beat = asyncio.create_task(heartbeat())
+        await service.close()
+        beat.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        return results, lags, service.counters
+
+    results, lags, counters = asyncio.run(run())
+    assert all(isinstance(r, asyncio.CancelledError) for r in results)
+    assert counters['cancelled'] == 3
+    # close espera a la operación en curso (~SLOW_SECONDS) sin detener el bucle
+    assert lags and max(lags) < SLOW_SECONDS / 2
+
+
+def test_latency_histogram_quantiles():
+    histogram = LatencyHistogram()
+    for ms in range(1, 101):
+        histogram.observe(ms / 1000)
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) <= histogram.quantile(0.95) <= histogram.max == pytest.approx(0.1)
+    assert LatencyHistogram().quantile(0.5) is None
+
+
+def test_process_pool_roundtrip(stego, cover, tmp_path):
+    async def run():
+        output = str(tmp_path / 'out.png')
+        async with AsyncStegoService(stego, workers=1, executor='process') as service:
+            await service.encode_async(cover, b"proceso", output)
+            return await service.decode_async(output, None)
+
+    assert asyncio.run(run()) == b"proceso"
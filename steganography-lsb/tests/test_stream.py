@@ -0,0 +1,88 @@
+"""Pruebas del formato 3: AEAD por segmentos (encode_stream / decode_stream)"""
+
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from stego_system import EmbeddingMode, SteganographyConfig
+
+STREAM_HEADER_SIZE = SteganographyConfig.STREAM_NONCE_PREFIX_SIZE + 4
+SEGMENT = 256
+MESSAGE = bytes(range(256)) * 3 + b"final" * 46  # 998 bytes: 4 segmentos, el último corto
+
+
+@pytest.mark.parametrize('source', [MESSAGE, io.BytesIO(MESSAGE), [MESSAGE[:100], MESSAGE[100:700], MESSAGE[700:]]],
+                         ids=['bytes', 'fichero', 'iterable'])
+def test_stream_roundtrip(stego, cover, tmp_path, source):
+    output = str(tmp_path / 'stego.png')
+    stats = stego.encode_stream(cover, source, output, segment_size=SEGMENT)
+    assert stats['message_bytes'] == len(MESSAGE)
+    assert stats['segments'] == 4
+    assert stego.peek_header(output)['format_version'] == SteganographyConfig.FORMAT_VERSION_STREAM
+
+    chunks = list(stego.decode_stream(output, None))
+    assert [len(c) for c in chunks] == [256, 256, 256, len(MESSAGE) - 768]
+    assert b"".join(chunks) == MESSAGE
+    assert stego.decode(output, None) == MESSAGE
+
+
+def test_stream_with_multibit_mode(stego, cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    message = os.urandom(5000)  # No cabe con 1 LSB en 96 x 80
+    stego.encode_stream(cover, message, output, mode=EmbeddingMode(bits_per_channel=2), segment_size=1000)
+    assert b"".join(stego.decode_stream(output, None)) == message
+
+
+def test_empty_message_is_one_segment(stego, cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    assert stego.encode_stream(cover, b"", output, segment_size=SEGMENT)['segments'] == 1
+    assert list(stego.decode_stream(output, None)) == [b""]
+
+
+def test_corrupt_segment_stops_after_authentic_chunks(stego, cover, tmp_path):
+    output = str(tmp_path / 'stego.png')
+    stego.encode_stream(cover, MESSAGE, output, segment_size=SEGMENT)
+    with Image.open(output) as img:
+        pixels = np.array(img)
+
+    # Primer bit del último segmento en el flujo de campos (1 LSB por campo)
+    offset = (STREAM_HEADER_SIZE + 3 * (SEGMENT + SteganographyConfig.TAG_SIZE)) * 8
+    height, width = pixels.shape[:2]
+    position = stego._select_mode_positions(width, height, EmbeddingMode(), 1, stego.crypto, offset)[0]
+    pixels.reshape(-1)[position] ^= 1
+    Image.fromarray(pixels).save(output)
+
+    received = []
+    with pytest.raises(ValueError, match="Segmento 3 corrupto"):
+        for chunk in stego.decode_stream(output, None):
+            received.append(chunk)
+    assert b"".join(received) == MESSAGE[:3 * SEGMENT]
+    with pytest.raises(ValueError):
+        stego.decode(output, None)
+
+
+def test_stream_detects_truncation_and_reordering(crypto):
+    prefix = os.urandom(SteganographyConfig.STREAM_NONCE_PREFIX_SIZE)
+    plain = [(b"uno", False), (b"dos", False), (b"tres", True)]
+    sealed = list(crypto.encrypt_stream(plain, prefix, b"aad"))
+    assert list(crypto.decrypt_stream(zip(sealed, [False, False, True]), prefix, b"aad")) == [b"uno", b"dos", b"tres"]
+
+    # Truncar: el segmento 1 no se cifró como último
+    with pytest.raises(ValueError, match="Segmento 1"):
+        list(crypto.decrypt_stream([(sealed[0], False), (sealed[1], True)], prefix, b"aad"))
+    # Reordenar: el nonce lleva el índice
+    with pytest.raises(ValueError, match="Segmento 0"):
+        list(crypto.decrypt_stream([(sealed[1], False), (sealed[0], False), (sealed[2], True)], prefix, b"aad"))
+    # Otros datos asociados
+    with pytest.raises(ValueError, match="Segmento 0"):
+        list(crypto.decrypt_stream(zip(sealed, [False, False, True]), prefix, b"otro"))
+
+
+def test_invalid_segment_size(stego, cover, tmp_path):
+    with pytest.raises(ValueError, match="Tamaño de segmento"):
+        stego.encode_stream(cover, MESSAGE, str(tmp_path / 'out.png'), segment_size=0)
+    with pytest.raises(ValueError, match="message_length"):
+        stego.encode_stream(cover, io.BytesIO(MESSAGE), str(tmp_path / 'out.png'), mode='auto')